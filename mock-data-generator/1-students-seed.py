@@ -1,21 +1,39 @@
-import boto3
 from faker import Faker
 import uuid
 import random
 from datetime import datetime, timedelta
-import time
+from bulk_writer import create_writer, DEFAULT_TARGET_WCU
+from export_writer import export_dir_from_argv
+from async_engine import in_flight_from_argv
+from write_backends import backend_from_argv
+from pipeline import run_pipeline
+from parallel_generation import generate_in_processes
+from student_columns import generate_columnar_items
+from partition_schema import KEY_ATTRIBUTES, apply_defaults, projected_attributes
+from run_journal import journaled
+from snapshot_cache import SCHEMA_SOURCES, cached_items, source_fingerprint
+from scale_profiles import profile_from_argv
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # Initialize Faker (use 'ja_JP' for Japanese data, 'en_US' for generic English)
 fake_ja = Faker('ja_JP')
 fake_en = Faker()
 
-# AWS Setup
-TABLE_NAME = "fossy_stg" # Your confirmed table name
-AWS_PROFILE_NAME = "asdf"  # Add your profile name here
-print(f"Using AWS Profile: {AWS_PROFILE_NAME}") # Optional: for confirmation when running
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-# Add region_name to the client initialization for clarity and correctness
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+# AWS Setup (table name and AWS profile are set in seed_config.py)
+dynamodb_client = get_dynamodb_client()
+
+# Streaming pipeline: records are generated while earlier ones are written
+WRITER_THREADS = 4 # Concurrent batch writers
+MAX_PENDING_RECORDS = 1000 # Items buffered between the generator and the writers
+GENERATOR_PROCESSES = 1 # >1 generates records in a process pool (see parallel_generation.py)
+COLUMNAR_GENERATOR = False # True builds whole NumPy columns from value pools (see student_columns.py)
+PARENT_ATTRIBUTES = KEY_ATTRIBUTES + projected_attributes("STUDENT") # Kept in memory for dependent stages
+SCALE_PROFILE = profile_from_argv() # --profile small|prod-like|10x-peak sets the default student count
+MASTER_SEED = None # Set to an int for reproducible data; None picks a random seed and prints it
+WRITE_BACKEND = backend_from_argv("partiql") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
+GENERATOR_VERSION = source_fingerprint("1-students-seed.py", "student_columns.py", "parallel_generation.py", *SCHEMA_SOURCES) # Snapshot cache key part
 
 # User's current time context (JST), converted to UTC as base for timestamps
 current_jst_from_user = datetime(2025, 9, 1, 20, 50, 8) # JST
@@ -25,7 +43,8 @@ def generate_mock_item_for_fossy_stg():
     """Generates a single mock item dictionary for the fossy_stg table."""
     record = {}
     record["partitionKey"] = "STUDENT"
-    record["sortKey"] = str(uuid.uuid4())
+    # Drawn from `random` instead of uuid4() so seeded runs produce the same keys
+    record["sortKey"] = str(uuid.UUID(int=random.getrandbits(128), version=4))
 
     registration_method_original = random.choice(["web", "manual_entry"])
     record["online"] = "true" if registration_method_original == "web" else "false"
@@ -37,7 +56,9 @@ def generate_mock_item_for_fossy_stg():
     record["lastNameKana"] = fake_ja.last_kana_name()
     record["firstNameKana"] = fake_ja.first_kana_name()
 
-    record["birthday"] = fake_ja.date_of_birth(minimum_age=18, maximum_age=65).strftime('%Y-%m-%d')
+    # Between 18 and 65 years before the fixed reference date, so seeded runs repeat on any day
+    age_in_days = fake_ja.random_int(int(18 * 365.25), int(66 * 365.25) - 1)
+    record["birthday"] = (current_jst_from_user.date() - timedelta(days=age_in_days)).strftime('%Y-%m-%d')
     record["gender"] = random.choice(["male", "female", "other"])
 
     record["phoneNumber1"] = f"0{random.choice([7,8,9])}0-{random.randint(1000,9999)}-{random.randint(1000,9999)}"
@@ -97,68 +118,109 @@ def generate_mock_item_for_fossy_stg():
     record["updatedOn"] = updated_on.isoformat(timespec='milliseconds') + "Z"
     record["updatedBy"] = random.choice(["system_update", "admin_portal", generated_username])
     
-    # Ensure all known headers get a value, even if empty, to match schema
-    all_known_headers = [
-        "partitionKey", "sortKey", "addressLine", "birthday", "city", "createdBy", "createdOn", "email",
-        "faxNumber", "firstName", "firstNameKana", "gender", "lastName", "lastNameKana", "mansionBuilding",
-        "noticeName", "noticeStudent", "occupation", "online", "organization", "organizationAddressLine",
-        "organizationCity", "organizationMansionBuilding", "organizationPN", "organizationPostalCode",
-        "organizationPrefecture", "phoneNumber1", "phoneNumber2", "postalCode", "prefecture", "resignation",
-        "sendingAddress", "updatedBy", "updatedOn", "username"
-    ]
-    for header in all_known_headers:
-        if header not in record:
-            record[header] = "" # Add any missing keys as empty strings
-            
-    return record
-
-# <--- MODIFIED: Function now accepts a 'delay_seconds' parameter ---
-def batch_insert_records(records_to_insert, total_records_to_generate, delay_seconds=3, batch_size=25):
-    """Inserts records into DynamoDB using BatchExecuteStatement with PartiQL."""
-    all_statements = []
-    for record_item in records_to_insert:
-        value_map_parts = []
-        for key, value in record_item.items():
-            escaped_value = str(value).replace("'", "''") # Escape single quotes
-            value_map_parts.append(f"'{key}':'{escaped_value}'")
-        
-        value_map_str = "{" + ", ".join(value_map_parts) + "}"
-        statement_str = f"INSERT INTO \"{TABLE_NAME}\" VALUE {value_map_str}"
-        all_statements.append({'Statement': statement_str})
-
-    successful_inserts = 0
-
-    for i in range(0, len(all_statements), batch_size):
-        batch = all_statements[i:i + batch_size]
-        try:
-            response = dynamodb_client.batch_execute_statement(Statements=batch)
-            
-            errors_in_batch = 0
-            if 'Responses' in response:
-                for idx, res in enumerate(response['Responses']):
-                    if 'Error' in res:
-                        errors_in_batch += 1
-                        print(f"  Error in statement {i+idx}: {res['Error']['Code']} - {res['Error']['Message']}")
-            
-            success_in_batch = len(batch) - errors_in_batch
-            successful_inserts += success_in_batch
+    # Ensure every attribute of the schema gets a value, even if empty (see partition_schema.py)
+    return apply_defaults("STUDENT", record)
+
+def generate_mock_items(count):
+    """Yields `count` mock student records one at a time, so no full list is ever built."""
+    for _ in range(count):
+        yield generate_mock_item_for_fossy_stg()
+
+def generate_item_chunk(seed, count):
+    """
+    Generates `count` serialized items from a fixed seed.
+    Runs inside a worker process, which has its own Faker instances, so
+    reseeding them here makes every chunk reproducible.
+    """
+    random.seed(seed)
+    fake_ja.seed_instance(seed)
+    fake_en.seed_instance(seed)
+    return [serialize_record(record) for record in generate_mock_items(count)]
+
+def serialize_record(record_item):
+    """Converts a record to a low-level DynamoDB item, storing every value as a string."""
+    return {key: {'S': str(value)} for key, value in record_item.items()}
+
+def collect_parent_attributes(items, parents):
+    """Passes items through unchanged while keeping the attributes dependent stages need."""
+    for item in items:
+        parents.append({key: item[key] for key in PARENT_ATTRIBUTES})
+        yield item
 
-            print(f"Processed batch of {len(batch)}. Succeeded: {success_in_batch}. (Total Inserted: {successful_inserts}/{total_records_to_generate})")
+def generate_stage(total_records_to_generate, processes=GENERATOR_PROCESSES, master_seed=MASTER_SEED,
+                   columnar=COLUMNAR_GENERATOR):
+    """
+    Returns a lazy iterator over the serialized student items without writing them.
+    With `processes` > 1 the records are generated by a process pool, reproducibly
+    for a given master seed. With `columnar` the vectorized pool-based generator is
+    used instead (single process). Runs with an explicit master seed are cached
+    (snapshot_cache.py); an identical rerun streams the cached items instead.
+    """
+    cache_seed = master_seed # Random seeds are never repeated, so those runs are not cached
+    if master_seed is None:
+        master_seed = random.randrange(2**32)
+    print(f"Master seed: {master_seed}")
 
-        except Exception as e:
-            print(f"Error processing batch starting at index {i}: {e}")
-        
-        # <--- MODIFIED: Uses the 'delay_seconds' parameter for the delay ---
-        print(f"Waiting for {delay_seconds} second(s)...")
-        time.sleep(delay_seconds)
+    def generate():
+        if columnar:
+            return generate_columnar_items(total_records_to_generate, seed=master_seed, base_utc_time=base_utc_time)
+        if processes > 1:
+            return generate_in_processes(generate_item_chunk, total_records_to_generate,
+                                         workers=processes, master_seed=master_seed)
+        random.seed(master_seed)
+        fake_ja.seed_instance(master_seed)
+        fake_en.seed_instance(master_seed)
+        return (serialize_record(record) for record in generate_mock_items(total_records_to_generate))
+
+    params = {"count": total_records_to_generate, "columnar": columnar, "processes": 1 if columnar else processes}
+    return cached_items("STUDENT", GENERATOR_VERSION, cache_seed, generate, params=params)
+
+def stream_insert_records(total_records_to_generate, target_wcu=DEFAULT_TARGET_WCU, writer_threads=WRITER_THREADS,
+                          processes=GENERATOR_PROCESSES, master_seed=MASTER_SEED, backend=WRITE_BACKEND,
+                          export_dir=EXPORT_DIR, columnar=COLUMNAR_GENERATOR, collect_parents=False,
+                          in_flight=IN_FLIGHT, journal=None, index=None):
+    """
+    Generates records (see generate_stage) and inserts them through the selected write
+    backend at the same time. The generator feeds the writer threads through a bounded
+    queue, so peak memory stays flat no matter how many records are requested.
+    With `export_dir` set, items go to gzipped import files instead of the table.
+    With `in_flight` the asyncio engine sends batches, one pipeline thread per in-flight batch.
+    With `collect_parents` the PARENT_ATTRIBUTES of every written item are returned.
+    Every acknowledged item is also recorded in the local parent index (parent_index.py).
+    With `journal` (run_journal.py), batches an interrupted run already wrote are skipped.
+    With `index` (a parent_index.ParentIndex) every written item is also recorded there,
+    e.g. the run-scoped index of top-up.py.
+    """
+    writer = create_writer(dynamodb_client, TABLE_NAME, "STUDENT", export_dir=export_dir, target_wcu=target_wcu,
+                           backend=backend, total=total_records_to_generate, in_flight=in_flight)
+    items = generate_stage(total_records_to_generate, processes=processes, master_seed=master_seed, columnar=columnar)
+    parents = []
+    if collect_parents:
+        items = collect_parent_attributes(items, parents)
+    skipped = None
+    if index is not None:
+        # Only acknowledged batches, and those an earlier attempt wrote, so failed ones leave no orphans
+        writer, skipped = index.writer(writer), index.record
+    writer, items = journaled(journal, "STUDENT", writer, items, skipped)
+    run_pipeline([items], writer.write_batch, workers=in_flight or writer_threads, max_pending=MAX_PENDING_RECORDS)
+    writer.close()
+    writer.print_summary()
+    return parents
+
+def run_stage(number_of_records_to_generate, **options):
+    """
+    Generates and inserts students without any prompts. Returns the serialized
+    PARENT_ATTRIBUTES of each student so dependent stages can use them directly.
+    """
+    return stream_insert_records(number_of_records_to_generate, collect_parents=True, **options)
 
 # --- Main execution ---
 if __name__ == "__main__":
     # <--- NEW: Ask user for the number of records to generate ---
     while True:
         try:
-            num_input = input("How many student records do you want to generate? ")
-            number_of_records_to_generate = int(num_input)
+            num_input = input(f"How many student records do you want to generate? (default is {SCALE_PROFILE['students']}): ")
+            number_of_records_to_generate = int(num_input) if num_input.strip() else SCALE_PROFILE['students']
             if number_of_records_to_generate > 0:
                 break
             else:
@@ -166,26 +228,30 @@ if __name__ == "__main__":
         except ValueError:
             print("Invalid input. Please enter a whole number.")
 
-    # <--- NEW: Ask user for the delay, with a default value ---
+    # Ask user for the write capacity to pace towards, with a default value
     try:
-        delay_input = input("Enter delay in seconds between batches (default is 3): ")
-        batch_delay = int(delay_input)
-        if batch_delay < 0:
-            print("Delay cannot be negative. Using default of 3 seconds.")
-            batch_delay = 3
+        wcu_input = input(f"Enter the table's write capacity (WCU) to pace towards (default is {DEFAULT_TARGET_WCU}): ")
+        target_wcu = int(wcu_input)
+        if target_wcu <= 0:
+            print(f"Capacity must be positive. Using default of {DEFAULT_TARGET_WCU} WCU.")
+            target_wcu = DEFAULT_TARGET_WCU
     except (ValueError, TypeError):
-        print("Invalid or no input. Using default delay of 3 seconds.")
-        batch_delay = 3
+        print(f"Invalid or no input. Using default of {DEFAULT_TARGET_WCU} WCU.")
+        target_wcu = DEFAULT_TARGET_WCU
             
-    print(f"\nGenerating {number_of_records_to_generate} mock records for table '{TABLE_NAME}'...")
-    
-    mock_data_list = []
-    for _ in range(number_of_records_to_generate):
-        mock_data_list.append(generate_mock_item_for_fossy_stg())
-    
-    print(f"Finished generating data. Starting batch insert with a {batch_delay}-second delay...")
+    # Ask how many processes should generate records, with a default value
+    try:
+        processes_input = input(f"How many generator processes? (default is {GENERATOR_PROCESSES}): ")
+        generator_processes = max(1, int(processes_input))
+    except (ValueError, TypeError):
+        generator_processes = GENERATOR_PROCESSES
+
+    columnar_input = input("Use the columnar NumPy generator? It ignores the process count (yes/no, default is no): ")
+    use_columnar = columnar_input.lower() == 'yes' or COLUMNAR_GENERATOR
+
+    print(f"\nGenerating and inserting {number_of_records_to_generate} mock records into table '{TABLE_NAME}', paced towards {target_wcu} WCU...")
     
-    # <--- MODIFIED: Pass the user-defined delay to the function ---
-    batch_insert_records(mock_data_list, number_of_records_to_generate, delay_seconds=batch_delay)
+    stream_insert_records(number_of_records_to_generate, target_wcu=target_wcu, processes=generator_processes,
+                          columnar=use_columnar)
     
     print("\nAll mock data insertion attempts complete.")
\ No newline at end of file
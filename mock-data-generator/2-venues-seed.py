@@ -1,18 +1,24 @@
-import boto3
 import uuid
+import random
 from datetime import datetime, timezone
-import time
+from bulk_writer import create_writer
+from export_writer import export_dir_from_argv
+from async_engine import in_flight_from_argv
+from write_backends import backend_from_argv
+from partition_schema import apply_defaults
+from run_journal import journaled
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # --- Configuration ---
-# Set your DynamoDB table name and AWS profile
-TABLE_NAME = "fossy_stg"
-AWS_PROFILE_NAME = "asdf"
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 100 # Write capacity the batch writer paces itself towards
+WRITE_BACKEND = backend_from_argv("partiql") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
 # ---------------------
 
 # AWS Setup
-print(f"Using AWS Profile: {AWS_PROFILE_NAME}")
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+dynamodb_client = get_dynamodb_client()
 
 def create_hardcoded_venue_data():
     """
@@ -79,69 +85,58 @@ def create_hardcoded_venue_data():
     # Add standard fields to each venue record
     for record in venues:
         record["partitionKey"] = "EXAM_PLACE"
-        record["sortKey"] = str(uuid.uuid4())
+        record["sortKey"] = str(uuid.UUID(int=random.getrandbits(128), version=4))
         record["createdBy"] = created_by_user
         record["createdOn"] = now_utc
         record["updatedBy"] = created_by_user
         record["updatedOn"] = now_utc
         # Add other fields from the schema as empty strings if not present
-        record.setdefault("memo", "")
-        record.setdefault("placeUrl", "")
+        apply_defaults("EXAM_PLACE", record)
 
     return venues
 
-def batch_insert_records(records_to_insert, total_records_to_generate, batch_size=25):
-    """Inserts records into DynamoDB using BatchExecuteStatement with PartiQL."""
-    all_statements = []
-    for record_item in records_to_insert:
-        value_map_parts = []
-        for key, value in record_item.items():
-            # Escape single quotes for PartiQL statement
-            escaped_value = str(value).replace("'", "''")
-            value_map_parts.append(f"'{key}':'{escaped_value}'")
-
-        value_map_str = "{" + ", ".join(value_map_parts) + "}"
-        statement_str = f"INSERT INTO \"{TABLE_NAME}\" VALUE {value_map_str}"
-        all_statements.append({'Statement': statement_str})
-
-    successful_inserts = 0
-
-    # Process statements in batches
-    for i in range(0, len(all_statements), batch_size):
-        batch = all_statements[i:i + batch_size]
-        try:
-            response = dynamodb_client.batch_execute_statement(Statements=batch)
-
-            errors_in_batch = 0
-            if 'Responses' in response:
-                for idx, res in enumerate(response['Responses']):
-                    if 'Error' in res:
-                        errors_in_batch += 1
-                        print(f"  Error in statement {i+idx}: {res['Error']['Code']} - {res['Error']['Message']}")
-
-            success_in_batch = len(batch) - errors_in_batch
-            successful_inserts += success_in_batch
-
-            print(f"Processed batch of {len(batch)}. Succeeded: {success_in_batch}. (Total Inserted: {successful_inserts}/{total_records_to_generate})")
-
-        except Exception as e:
-            print(f"An exception occurred processing batch starting at index {i}: {e}")
+def serialize_record(record_item):
+    """Converts a record to a low-level DynamoDB item, storing every value as a string."""
+    # Every value is stored as a string, as the original PartiQL statements did
+    return {key: {'S': str(value)} for key, value in record_item.items()}
+
+def batch_insert_records(records_to_insert, total_records_to_generate, journal=None):
+    """Inserts records through the selected write backend (PartiQL by default), paced by the shared writer."""
+    items = [serialize_record(record_item) for record_item in records_to_insert]
+
+    writer = create_writer(dynamodb_client, TABLE_NAME, "EXAM_PLACE", export_dir=EXPORT_DIR, target_wcu=TARGET_WCU, backend=WRITE_BACKEND,
+                           in_flight=IN_FLIGHT)
+    writer, pending = journaled(journal, "EXAM_PLACE", writer, items)
+    writer.put_items(pending, total=total_records_to_generate)
+    writer.close()
+    writer.print_summary()
+
+def generate_stage(seed=None):
+    """Generates the venue records without inserting them. With `seed`, the generated keys are reproducible."""
+    if seed is not None:
+        random.seed(seed)
+    return create_hardcoded_venue_data()
+
+def run_stage(seed=None, journal=None):
+    """
+    Generates and inserts the venues. Returns the venue records so dependent stages can use them directly.
+    With `seed`, the generated keys are reproducible.
+    With `journal` (run_journal.py), batches an interrupted run already wrote are skipped.
+    """
+    # Generate the list of 10 venue records
+    venue_data_list = generate_stage(seed)
+    number_of_records_to_generate = len(venue_data_list)
 
-        # Add a small delay to respect provisioned throughput
-        time.sleep(1)
+    print(f"Generated {number_of_records_to_generate} venue records with capacity. Starting batch insert...")
 
+    # Insert the records into DynamoDB
+    batch_insert_records(venue_data_list, number_of_records_to_generate, journal=journal)
+    return venue_data_list
 
 # --- Main execution ---
 if __name__ == "__main__":
     print(f"Preparing to insert hardcoded exam venues into table '{TABLE_NAME}'...")
 
-    # Generate the list of 10 venue records
-    venue_data_list = create_hardcoded_venue_data()
-    number_of_records_to_generate = len(venue_data_list)
-
-    print(f"Generated {number_of_records_to_generate} venue records with capacity. Starting batch insert...")
-
-    # Insert the records into DynamoDB
-    batch_insert_records(venue_data_list, number_of_records_to_generate)
+    run_stage()
 
     print("All venue data insertion attempts complete.")
\ No newline at end of file
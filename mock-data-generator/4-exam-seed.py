@@ -1,9 +1,15 @@
-import boto3
 import uuid
 import random
 from datetime import datetime, timezone
-import time
-from boto3.dynamodb.types import TypeSerializer # Used for handling complex data types
+from bulk_writer import create_writer
+from export_writer import export_dir_from_argv
+from fast_serializer import ItemEncoder
+from async_engine import in_flight_from_argv
+from write_backends import backend_from_argv
+from parent_index import get_parent_index
+from run_journal import journaled
+from snapshot_cache import SCHEMA_SOURCES, cached_items, source_fingerprint
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # --- Partition Structures and Relationships ---
 # This script generates mock data for the EXAM partition.
@@ -22,33 +28,23 @@ from boto3.dynamodb.types import TypeSerializer # Used for handling complex data
 # ---------------------------------------------
 
 # --- Configuration ---
-# Set your DynamoDB table name and AWS profile
-TABLE_NAME = "fossy_stg"
-AWS_PROFILE_NAME = "asdf"
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 100 # Write capacity the batch writer paces itself towards
+WRITE_BACKEND = backend_from_argv("batch_write") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
+GENERATOR_VERSION = source_fingerprint("4-exam-seed.py", *SCHEMA_SOURCES) # Snapshot cache key part
+# Values other than lists and numbers are stored as strings, as per schema
+ITEM_ENCODER = ItemEncoder("EXAM", stringify=True)
 # ---------------------
 
 # AWS Setup
-print(f"Using AWS Profile: {AWS_PROFILE_NAME}")
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+dynamodb_client = get_dynamodb_client()
 
 def get_existing_ids(partition_key):
-    """Queries DynamoDB to get the sortKeys of all items with a given partition key."""
-    try:
-        response = dynamodb_client.query(
-            TableName=TABLE_NAME,
-            KeyConditionExpression="partitionKey = :pk",
-            ExpressionAttributeValues={":pk": {"S": partition_key}}
-        )
-        ids = [item['sortKey']['S'] for item in response.get('Items', [])]
-        if ids:
-            print(f"✅ Successfully fetched {len(ids)} IDs for {partition_key}")
-        else:
-            print(f"⚠️ Warning: Found 0 items with partition key '{partition_key}'")
-        return ids
-    except Exception as e:
-        print(f"❌ Error fetching IDs for {partition_key}: {e}")
-        return []
+    """Returns the sortKeys of a partition from the local parent index (rebuilt from the table if empty)."""
+    items = get_parent_index().load_or_refresh(dynamodb_client, TABLE_NAME, partition_key)
+    return [item['sortKey']['S'] for item in items]
 
 def create_hardcoded_exam_data(bank_account_ids):
     """
@@ -194,57 +190,51 @@ def create_hardcoded_exam_data(bank_account_ids):
     ]
 
     # Add standard fields to each exam record
-    serializer = TypeSerializer()
-    final_records = []
     for record in exams:
-        # Convert all values to string first, as per schema, except for specific types
-        for key, value in record.items():
-            if not isinstance(value, (list, int)):
-                record[key] = str(value)
-
-        # Add standard fields
         record["partitionKey"] = "EXAM"
-        record["sortKey"] = str(uuid.uuid4())
+        record["sortKey"] = str(uuid.UUID(int=random.getrandbits(128), version=4))
         record["createdBy"] = created_by_user
         record["createdOn"] = now_utc
         record["updatedBy"] = created_by_user
         record["updatedOn"] = now_utc
 
-        # The serializer converts the Python dictionary to DynamoDB's format
-        # This correctly handles lists, maps, strings, and numbers
-        dynamodb_item = {k: serializer.serialize(v) for k, v in record.items() if v != ''}
-        final_records.append(dynamodb_item)
-
-    return final_records
-
-def batch_insert_records(records_to_insert, batch_size=25):
-    """Inserts records into DynamoDB using BatchWriteItem, which is ideal for complex data."""
-    successful_inserts = 0
-    total_records = len(records_to_insert)
+    return exams
 
-    # Format for BatchWriteItem
-    put_requests = [{"PutRequest": {"Item": item}} for item in records_to_insert]
+def serialize_record(record_item):
+    """Converts an exam record to a low-level DynamoDB item, dropping empty values."""
+    return ITEM_ENCODER.encode(record_item)
 
-    for i in range(0, len(put_requests), batch_size):
-        batch = put_requests[i:i + batch_size]
-        request_items = {TABLE_NAME: batch}
-        try:
-            response = dynamodb_client.batch_write_item(RequestItems=request_items)
-            
-            # Basic success count - BatchWriteItem is often all-or-nothing unless there are UnprocessedItems
-            success_in_batch = len(batch)
-            if 'UnprocessedItems' in response and response['UnprocessedItems']:
-                unprocessed_count = len(response['UnprocessedItems'].get(TABLE_NAME, []))
-                success_in_batch -= unprocessed_count
-                print(f"  ⚠️ {unprocessed_count} items were not processed and should be retried.")
-
-            successful_inserts += success_in_batch
-            print(f"Processed batch of {len(batch)}. Succeeded: {success_in_batch}. (Total Inserted: {successful_inserts}/{total_records})")
-
-        except Exception as e:
-            print(f"❌ An exception occurred processing batch starting at index {i}: {e}")
-        
-        time.sleep(1)
+def batch_insert_records(records_to_insert, total=None, journal=None):
+    """
+    Streams serialized records through the selected write backend (BatchWriteItem by default), paced by
+    the shared writer. `total` is only used in progress lines. Returns the number of records written.
+    """
+    writer = create_writer(dynamodb_client, TABLE_NAME, "EXAM", export_dir=EXPORT_DIR, target_wcu=TARGET_WCU, backend=WRITE_BACKEND,
+                           in_flight=IN_FLIGHT)
+    writer, pending = journaled(journal, "EXAM", writer, records_to_insert)
+    written = writer.put_items(pending, total=total)
+    writer.close()
+    writer.print_summary()
+    return written
+
+def run_stage(bank_ids, seed=None, journal=None):
+    """
+    Generates and inserts exams linked to the given bank account IDs.
+    Returns the serialized exam items so dependent stages can use them without re-reading the table.
+    With `seed` the output is reproducible and cached (snapshot_cache.py).
+    With `journal` (run_journal.py), batches an interrupted run already wrote are skipped.
+    """
+    if seed is not None:
+        random.seed(seed)
+    exam_data_list = list(cached_items(
+        "EXAM", GENERATOR_VERSION, seed,
+        lambda: [serialize_record(exam) for exam in create_hardcoded_exam_data(bank_ids)],
+        parents=[bank_ids]))
+    number_of_records = len(exam_data_list)
+    print(f"Generated {number_of_records} exam records. Starting batch insert...")
+
+    batch_insert_records(exam_data_list, number_of_records, journal=journal)
+    return exam_data_list
 
 # --- Main execution ---
 if __name__ == "__main__":
@@ -255,13 +245,8 @@ if __name__ == "__main__":
 
     # 2. Proceed only if bank accounts were found
     if bank_ids:
-        # 3. Generate the list of exam records
-        exam_data_list = create_hardcoded_exam_data(bank_ids)
-        number_of_records = len(exam_data_list)
-        print(f"Generated {number_of_records} exam records. Starting batch insert...")
-        
-        # 4. Insert the records into DynamoDB
-        batch_insert_records(exam_data_list)
+        # 3. Generate the exam records and insert them into DynamoDB
+        run_stage(bank_ids)
         
         print("✅ All exam data insertion attempts complete.")
     else:
@@ -1,9 +1,18 @@
-import boto3
 import uuid
 import random
 from datetime import datetime, timezone, timedelta
-import time
-from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from boto3.dynamodb.types import TypeDeserializer
+from bulk_writer import create_writer
+from export_writer import export_dir_from_argv
+from fast_serializer import ItemEncoder
+from async_engine import in_flight_from_argv
+from write_backends import backend_from_argv
+from parent_index import get_parent_index
+from partition_schema import inherited_attributes
+from run_journal import journaled
+from snapshot_cache import SCHEMA_SOURCES, cached_items, source_fingerprint
+from scale_profiles import profile_from_argv
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # --- Partition Structures and Relationships ---
 # This script generates mock data for the EXAM_HOLD partition.
@@ -22,55 +31,34 @@ from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
 # ---------------------------------------------
 
 # --- Configuration ---
-TABLE_NAME = "fossy_stg"
-AWS_PROFILE_NAME = "asdf"
-NUMBER_OF_SCHEDULES_TO_CREATE = 5 # How many schedules to generate
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 100 # Write capacity the batch writer paces itself towards
+WRITE_BACKEND = backend_from_argv("batch_write") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
+GENERATOR_VERSION = source_fingerprint("5-examhold-seed.py", *SCHEMA_SOURCES) # Snapshot cache key part
+SCALE_PROFILE = profile_from_argv() # --profile small|prod-like|10x-peak (see scale_profiles.py)
+NUMBER_OF_SCHEDULES_TO_CREATE = SCALE_PROFILE["exam_holds"] # How many schedules to generate
+DOCUMENTS_REQUIRED = ["写真付き身分証明書"] # Example override shared by every schedule
+CAUTIONS = ["会場内での飲食はご遠慮ください。", "試験開始後の入室は認められません。"]
+# Inherited exam blocks and the constant lists are encoded once and shared between items
+ITEM_ENCODER = ItemEncoder("EXAM_HOLD", shared=("score", "examItems", "documentsRequired", "cautions"),
+                           keep=lambda v: v or isinstance(v, (list, bool, int, float)))
 # ---------------------
 
 # AWS Setup
-print(f"Using AWS Profile: {AWS_PROFILE_NAME}")
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+dynamodb_client = get_dynamodb_client()
 
 def get_full_items_by_pk(partition_key):
     """
-    Queries DynamoDB to get all full items for a given partition key.
-    Handles pagination and deserializes items into Python dictionaries.
+    Returns the indexed items of a partition from the local parent index
+    (rebuilt from the table if empty), deserialized into Python dictionaries.
     """
-    print(f"🔍 Fetching all items for partitionKey '{partition_key}'...")
-    items = []
     deserializer = TypeDeserializer()
-    last_evaluated_key = None
+    items = get_parent_index().load_or_refresh(dynamodb_client, TABLE_NAME, partition_key)
+    return [deserializer.deserialize({'M': item}) for item in items]
 
-    while True:
-        query_args = {
-            'TableName': TABLE_NAME,
-            'KeyConditionExpression': 'partitionKey = :pk',
-            'ExpressionAttributeValues': {':pk': {'S': partition_key}}
-        }
-        if last_evaluated_key:
-            query_args['ExclusiveStartKey'] = last_evaluated_key
-        
-        try:
-            response = dynamodb_client.query(**query_args)
-            deserialized_items = [deserializer.deserialize({'M': item}) for item in response.get('Items', [])]
-            items.extend(deserialized_items)
-            
-            last_evaluated_key = response.get('LastEvaluatedKey', None)
-            if not last_evaluated_key:
-                break
-        except Exception as e:
-            print(f"❌ Error fetching items for '{partition_key}': {e}")
-            return []
-
-    if items:
-        print(f"✅ Successfully fetched {len(items)} items for '{partition_key}'")
-    else:
-        print(f"⚠️ Warning: Found 0 items with partition key '{partition_key}'")
-    return items
-
-
-def create_mock_schedule_data(all_exams, all_venues):
+def create_mock_schedule_data(all_exams, all_venues, count=NUMBER_OF_SCHEDULES_TO_CREATE):
     """
     Creates a list of mock exam schedules. It now inherits a comprehensive set of
     attributes from the parent exam to create a complete record.
@@ -81,7 +69,7 @@ def create_mock_schedule_data(all_exams, all_venues):
     
     schedules = []
     
-    for i in range(NUMBER_OF_SCHEDULES_TO_CREATE):
+    for i in range(count):
         chosen_exam = random.choice(all_exams)
         num_venues = random.randint(1, min(2, len(all_venues)))
         chosen_venues = random.sample(all_venues, num_venues)
@@ -91,7 +79,8 @@ def create_mock_schedule_data(all_exams, all_venues):
         ]
         prefectures = sorted(list(set([v['prefecture'] for v in chosen_venues])))
 
-        exam_hold_date = today_date + timedelta(days=random.randint(45, 120) + (i * 10))
+        # Sessions are 10 days apart, wrapping after a year so large profiles stay within it
+        exam_hold_date = today_date + timedelta(days=random.randint(45, 120) + (i % 36) * 10)
         application_to_date = exam_hold_date - timedelta(days=10)
         application_from_date = application_to_date - timedelta(days=30)
         result_date = exam_hold_date + timedelta(days=21)
@@ -106,34 +95,8 @@ def create_mock_schedule_data(all_exams, all_venues):
             "examHoldNo": i + 1,
             "bankAccountId": chosen_exam['bankAccountId'],
             
-            # --- Comprehensive Details Inherited from Parent Exam ---
-            "timeRequired": chosen_exam.get('timeRequired', '60'),
-            "score": chosen_exam.get('score', []),
-            "scoreComment": chosen_exam.get('scoreComment', ''),
-            "examItems": chosen_exam.get('examItems', []),
-            "faceImgRequired": chosen_exam.get('faceImgRequired', 'false'),
-            "lesson": chosen_exam.get('lesson', 'false'),
-            "certificationType": chosen_exam.get('certificationType', 'none'),
-            "certificationTemporaryDeadline": chosen_exam.get('certificationTemporaryDeadline', 'false'),
-            "certificationShipped": chosen_exam.get('certificationShipped', 14),
-            "certificationPrefix": chosen_exam.get('certificationPrefix', ''),
-            "licenseExpirationDate": chosen_exam.get('licenseExpirationDate', ''),
-            "renewText": chosen_exam.get('renewText', 'none'),
-            "renewTextInclusion": chosen_exam.get('renewTextInclusion', 'none'),
-            "renewLesson": chosen_exam.get('renewLesson', 'none'),
-            "renewLessonInclusion": chosen_exam.get('renewLessonInclusion', 'none'),
-            "revisionLawInformation": chosen_exam.get('revisionLawInformation', 'false'),
-            
-            # --- All Fee Types Inherited from Parent Exam ---
-            "examFee": chosen_exam.get('examFee', '0'),
-            "studentFee": chosen_exam.get('studentFee', ''),
-            "groupFee": chosen_exam.get('groupFee', ''),
-            "lessonFee": chosen_exam.get('lessonFee', ''),
-            "certificationFee": chosen_exam.get('certificationFee', ''),
-            "renewalFee": chosen_exam.get('renewalFee', ''),
-            "renewTextFee": chosen_exam.get('renewTextFee', ''),
-            "renewLessonFee": chosen_exam.get('renewLessonFee', ''),
-            "specialFee": chosen_exam.get('specialFee', ''),
+            # --- Comprehensive Details and Fees Inherited from Parent Exam (see partition_schema.py) ---
+            **inherited_attributes("EXAM_HOLD", "EXAM", chosen_exam),
 
             # --- Derived from Venues ---
             "prefectures": prefectures,
@@ -156,47 +119,57 @@ def create_mock_schedule_data(all_exams, all_venues):
             "examHoldActivation": random.choice(["true", "false"]),
             "renewal": "false",
             "renewalReserve": "false",
-            "documentsRequired": ["写真付き身分証明書"], # Example override
-            "cautions": ["会場内での飲食はご遠慮ください。", "試験開始後の入室は認められません。"],
+            "documentsRequired": DOCUMENTS_REQUIRED,
+            "cautions": CAUTIONS,
             "memo": f"第{i+1}回 {chosen_exam['examName']} の試験日程です。"
         }
         schedules.append(schedule)
 
-    # Add standard fields and serialize for DynamoDB
-    serializer = TypeSerializer()
-    final_records = []
+    # Add standard fields
     for record in schedules:
         record["partitionKey"] = "EXAM_HOLD"
-        record["sortKey"] = str(uuid.uuid4())
+        record["sortKey"] = str(uuid.UUID(int=random.getrandbits(128), version=4))
         record["createdBy"] = created_by_user
         record["createdOn"] = now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
         record["updatedBy"] = created_by_user
         record["updatedOn"] = now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
 
-        dynamodb_item = {k: serializer.serialize(v) for k, v in record.items() if v or isinstance(v, (list, bool, int, float))}
-        final_records.append(dynamodb_item)
-
-    return final_records
-
-def batch_insert_records(records_to_insert, batch_size=25):
-    """Inserts records into DynamoDB using BatchWriteItem."""
-    total_records = len(records_to_insert)
-    put_requests = [{"PutRequest": {"Item": item}} for item in records_to_insert]
-    print(f"\n📨 Starting batch insert of {total_records} schedule records...")
-
-    for i in range(0, len(put_requests), batch_size):
-        batch = put_requests[i:i + batch_size]
-        try:
-            response = dynamodb_client.batch_write_item(RequestItems={TABLE_NAME: batch})
-            success_count = len(batch)
-            if 'UnprocessedItems' in response and response['UnprocessedItems']:
-                unprocessed_count = len(response['UnprocessedItems'].get(TABLE_NAME, []))
-                success_count -= unprocessed_count
-                print(f"  ⚠️ {unprocessed_count} items were not processed.")
-            print(f"Processed batch of {len(batch)}. Succeeded: {success_count}.")
-        except Exception as e:
-            print(f"❌ An exception occurred during batch insert: {e}")
-        time.sleep(1)
+    return schedules
+
+def serialize_record(record_item):
+    """Converts a schedule record to a low-level DynamoDB item, dropping empty values."""
+    return ITEM_ENCODER.encode(record_item)
+
+def batch_insert_records(records_to_insert, total=None, journal=None):
+    """
+    Streams serialized records through the selected write backend (BatchWriteItem by default), paced by
+    the shared writer. `total` is only used in progress lines. Returns the number of records written.
+    """
+    print(f"\n📨 Starting batch insert of {total or 'the'} schedule records...")
+
+    writer = create_writer(dynamodb_client, TABLE_NAME, "EXAM_HOLD", export_dir=EXPORT_DIR, target_wcu=TARGET_WCU, backend=WRITE_BACKEND,
+                           in_flight=IN_FLIGHT)
+    writer, pending = journaled(journal, "EXAM_HOLD", writer, records_to_insert)
+    written = writer.put_items(pending, total=total)
+    writer.close()
+    writer.print_summary()
+    return written
+
+def run_stage(all_exams, all_venues, seed=None, count=NUMBER_OF_SCHEDULES_TO_CREATE, journal=None):
+    """
+    Generates and inserts schedules for the given (deserialized) exams and venues.
+    Returns the serialized schedule items so dependent stages can use them without re-reading the table.
+    With `seed` the output is reproducible and cached (snapshot_cache.py).
+    With `journal` (run_journal.py), batches an interrupted run already wrote are skipped.
+    """
+    if seed is not None:
+        random.seed(seed)
+    schedule_data_list = list(cached_items(
+        "EXAM_HOLD", GENERATOR_VERSION, seed,
+        lambda: [serialize_record(schedule) for schedule in create_mock_schedule_data(all_exams, all_venues, count)],
+        params={"count": count}, parents=[all_exams, all_venues]))
+    batch_insert_records(schedule_data_list, len(schedule_data_list), journal=journal)
+    return schedule_data_list
 
 # --- Main execution ---
 if __name__ == "__main__":
@@ -206,8 +179,7 @@ if __name__ == "__main__":
     all_venues = get_full_items_by_pk("EXAM_PLACE")
 
     if all_exams and all_venues:
-        schedule_data_list = create_mock_schedule_data(all_exams, all_venues)
-        batch_insert_records(schedule_data_list)
+        run_stage(all_exams, all_venues)
         print("\n✅ All exam schedule data insertion attempts complete.")
     else:
         print("\n❌ Script stopped. Cannot create schedules without existing exams AND venues to link.")
\ No newline at end of file
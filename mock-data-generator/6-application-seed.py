@@ -1,9 +1,16 @@
-import boto3
 import uuid
 import random
 from datetime import datetime, timezone, timedelta
-import time
-from boto3.dynamodb.types import TypeSerializer # Used for handling complex data types
+from bulk_writer import create_writer
+from export_writer import export_dir_from_argv
+from fast_serializer import ItemEncoder
+from async_engine import in_flight_from_argv
+from write_backends import backend_from_argv
+from parent_index import get_parent_index
+from run_journal import journaled
+from snapshot_cache import SCHEMA_SOURCES, cached_items, source_fingerprint
+from scale_profiles import FanOut, SkewedChoice, profile_from_argv
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # --- Partition Structures and Relationships ---
 # This script generates mock data for the APPLICATION partition.
@@ -22,115 +29,114 @@ from boto3.dynamodb.types import TypeSerializer # Used for handling complex data
 # ---------------------------------------------
 
 # --- Configuration ---
-# Set your DynamoDB table name and AWS profile
-TABLE_NAME = "fossy_stg"
-AWS_PROFILE_NAME = "asdf"
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 100 # Write capacity the batch writer paces itself towards
+WRITE_BACKEND = backend_from_argv("batch_write") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
+GENERATOR_VERSION = source_fingerprint("6-application-seed.py", "scale_profiles.py", *SCHEMA_SOURCES) # Snapshot cache key part
+# Values other than lists and numbers are stored as strings, as per schema. examPlace is
+# the parent exam hold's examHoldPlace, shared by its applications, so it is converted once
+ITEM_ENCODER = ItemEncoder("APPLICATION", shared=("examPlace",), stringify=True)
+SCALE_PROFILE = profile_from_argv() # --profile small|prod-like|10x-peak (see scale_profiles.py)
+APPLICATIONS_PER_STUDENT = SCALE_PROFILE["applications_per_student"] # {applications: weight} per student
+EXAM_HOLD_SKEW = SCALE_PROFILE["exam_hold_skew"] # 0 = uniform, >1 = a few exam holds get most applications
 # ---------------------
 
 # AWS Setup
-print(f"Using AWS Profile: {AWS_PROFILE_NAME}")
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+dynamodb_client = get_dynamodb_client()
 
 def get_existing_items(partition_key):
-    """Queries DynamoDB to get all items with a given partition key."""
-    try:
-        response = dynamodb_client.query(
-            TableName=TABLE_NAME,
-            KeyConditionExpression="partitionKey = :pk",
-            ExpressionAttributeValues={":pk": {"S": partition_key}}
-        )
-        items = response.get('Items', [])
-        if items:
-            print(f"✅ Successfully fetched {len(items)} items for {partition_key}")
-        else:
-            print(f"⚠️ Warning: Found 0 items with partition key '{partition_key}'")
-        return items
-    except Exception as e:
-        print(f"❌ Error fetching items for {partition_key}: {e}")
-        return []
+    """Returns the indexed items of a partition from the local parent index (rebuilt from the table if empty)."""
+    return get_parent_index().load_or_refresh(dynamodb_client, TABLE_NAME, partition_key)
 
-def create_hardcoded_application_data(students, exam_holds):
+def create_hardcoded_application_data(students, exam_holds, applications_per_student=APPLICATIONS_PER_STUDENT,
+                                      exam_hold_skew=EXAM_HOLD_SKEW, rng=random):
     """
-    Creates a list of hardcoded mock application records, linking them to existing students and exam holds.
+    Yields hardcoded mock application records, linking them to existing students and exam holds.
+    Each student gets a number of applications drawn from `applications_per_student`, each for an
+    exam hold picked with Zipf-like popularity `exam_hold_skew`. Random draws come from `rng`.
     """
     now_utc = datetime.now(timezone.utc)
     created_by_user = "system_seed_script"
 
-    applications = []
+    fan_out = FanOut(applications_per_student, rng)
+    exam_hold_choice = SkewedChoice(exam_holds, exam_hold_skew, rng)
 
     for student in students:
-        # Each student will apply for one random exam hold
-        exam_hold = random.choice(exam_holds)
-
-        application = {
-            "partitionKey": "APPLICATION",
-            "sortKey": str(uuid.uuid4()),
-            "studentId": student['sortKey']['S'],
-            "examHoldId": exam_hold['sortKey']['S'],
-            "examId": exam_hold['examId']['S'],
-            "examName": exam_hold['examName']['S'],
-            "examDate": exam_hold['examHoldDate']['S'],
-            "examPlace": exam_hold['examHoldPlace'], # This is a list of maps
-            "applicationDate": now_utc.strftime('%Y-%m-%d'),
-            "paymentMethod": random.choice(["credit_card", "bank_transfer"]),
-            "paymentStatus": random.choice(["pending", "completed", "failed"]),
-            "examFee": exam_hold['examFee']['S'],
-            "lessonFee": exam_hold.get('lessonFee', {'S': '0'})['S'],
-            "certificationFee": exam_hold.get('certificationFee', {'S': '0'})['S'],
-            "totalFee": str(int(exam_hold['examFee']['S']) + int(exam_hold.get('lessonFee', {'S': '0'})['S']) + int(exam_hold.get('certificationFee', {'S': '0'})['S'])),
-            "memo": f"Mock application for {student['firstName']['S']} {student['lastName']['S']}",
-            "createdBy": created_by_user,
-            "createdOn": now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
-            "updatedBy": created_by_user,
-            "updatedOn": now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
-        }
-        applications.append(application)
-
-    # Add standard fields to each exam record
-    serializer = TypeSerializer()
-    final_records = []
-    for record in applications:
-        # Convert all values to string first, as per schema, except for specific types
-        for key, value in record.items():
-            if not isinstance(value, (list, int, bool)):
-                record[key] = str(value)
-
-        # The serializer converts the Python dictionary to DynamoDB's format
-        # This correctly handles lists, maps, strings, and numbers
-        dynamodb_item = {k: serializer.serialize(v) for k, v in record.items() if v != ''}
-        final_records.append(dynamodb_item)
-
-    return final_records
-
-def batch_insert_records(records_to_insert, batch_size=25):
-    """Inserts records into DynamoDB using BatchWriteItem, which is ideal for complex data."""
-    successful_inserts = 0
-    total_records = len(records_to_insert)
-
-    # Format for BatchWriteItem
-    put_requests = [{"PutRequest": {"Item": item}} for item in records_to_insert]
-
-    for i in range(0, len(put_requests), batch_size):
-        batch = put_requests[i:i + batch_size]
-        request_items = {TABLE_NAME: batch}
-        try:
-            response = dynamodb_client.batch_write_item(RequestItems=request_items)
-            
-            # Basic success count - BatchWriteItem is often all-or-nothing unless there are UnprocessedItems
-            success_in_batch = len(batch)
-            if 'UnprocessedItems' in response and response['UnprocessedItems']:
-                unprocessed_count = len(response['UnprocessedItems'].get(TABLE_NAME, []))
-                success_in_batch -= unprocessed_count
-                print(f"  ⚠️ {unprocessed_count} items were not processed and should be retried.")
-
-            successful_inserts += success_in_batch
-            print(f"Processed batch of {len(batch)}. Succeeded: {success_in_batch}. (Total Inserted: {successful_inserts}/{total_records})")
-
-        except Exception as e:
-            print(f"❌ An exception occurred processing batch starting at index {i}: {e}")
-        
-        time.sleep(1)
+        # Each student applies for a drawn number of exam holds, popular ones more often
+        for _ in range(fan_out.draw()):
+            exam_hold = exam_hold_choice.pick()
+
+            application = {
+                "partitionKey": "APPLICATION",
+                "sortKey": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "studentId": student['sortKey']['S'],
+                "examHoldId": exam_hold['sortKey']['S'],
+                "examId": exam_hold['examId']['S'],
+                "examName": exam_hold['examName']['S'],
+                "examDate": exam_hold['examHoldDate']['S'],
+                "examPlace": exam_hold['examHoldPlace'], # This is a list of maps
+                "applicationDate": now_utc.strftime('%Y-%m-%d'),
+                "paymentMethod": rng.choice(["credit_card", "bank_transfer"]),
+                "paymentStatus": rng.choice(["pending", "completed", "failed"]),
+                "examFee": exam_hold['examFee']['S'],
+                "lessonFee": exam_hold.get('lessonFee', {'S': '0'})['S'],
+                "certificationFee": exam_hold.get('certificationFee', {'S': '0'})['S'],
+                "totalFee": str(int(exam_hold['examFee']['S']) + int(exam_hold.get('lessonFee', {'S': '0'})['S']) + int(exam_hold.get('certificationFee', {'S': '0'})['S'])),
+                "memo": f"Mock application for {student['firstName']['S']} {student['lastName']['S']}",
+                "createdBy": created_by_user,
+                "createdOn": now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                "updatedBy": created_by_user,
+                "updatedOn": now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            }
+            yield application
+
+def serialize_record(record_item):
+    """Converts an application record to a low-level DynamoDB item, dropping empty values."""
+    return ITEM_ENCODER.encode(record_item)
+
+def batch_insert_records(records_to_insert, total=None, journal=None, index=None):
+    """
+    Streams serialized records through the selected write backend (BatchWriteItem by default), paced by
+    the shared writer. `total` is only used in progress lines. Returns the number of records written.
+    With `index` (a parent_index.ParentIndex) every written record is also recorded there.
+    """
+    writer = create_writer(dynamodb_client, TABLE_NAME, "APPLICATION", export_dir=EXPORT_DIR, target_wcu=TARGET_WCU, backend=WRITE_BACKEND,
+                           in_flight=IN_FLIGHT)
+    skipped = None
+    if index is not None:
+        # Only acknowledged batches, and those an earlier attempt wrote, so failed ones leave no orphans
+        writer, skipped = index.writer(writer), index.record
+    writer, pending = journaled(journal, "APPLICATION", writer, records_to_insert, skipped)
+    written = writer.put_items(pending, total=total)
+    writer.close()
+    writer.print_summary()
+    return written
+
+def run_stage(students, exam_holds, seed=None, applications_per_student=APPLICATIONS_PER_STUDENT,
+              exam_hold_skew=EXAM_HOLD_SKEW, journal=None, index=None):
+    """
+    Generates and inserts applications for the given (serialized) students and exam holds,
+    with the fan-out of the scale profile. The items stream into the writer as they are generated.
+    Returns the number of applications written.
+    With `seed` the output is reproducible and cached (snapshot_cache.py).
+    With `journal` (run_journal.py), batches an interrupted run already wrote are skipped.
+    With `index` (a parent_index.ParentIndex) every written application is also recorded there,
+    so the PAYMENT and CERTIFICATION stages can stream exactly this run's applications from it.
+    """
+    # A private generator: the writer threads draw backoff jitter from `random` while items are generated
+    rng = random.Random(seed)
+    application_data = cached_items(
+        "APPLICATION", GENERATOR_VERSION, seed,
+        lambda: (serialize_record(application) for application in create_hardcoded_application_data(
+            students, exam_holds, applications_per_student, exam_hold_skew, rng)),
+        params={"applications_per_student": applications_per_student, "exam_hold_skew": exam_hold_skew},
+        parents=[students, exam_holds])
+    print("Generating application records and inserting them as they come...")
+    written = batch_insert_records(application_data, journal=journal, index=index)
+    print(f"Inserted {written} application records.")
+    return written
 
 # --- Main execution ---
 if __name__ == "__main__":
@@ -142,13 +148,8 @@ if __name__ == "__main__":
 
     # 2. Proceed only if students and exam holds were found
     if students and exam_holds:
-        # 3. Generate the list of application records
-        application_data_list = create_hardcoded_application_data(students, exam_holds)
-        number_of_records = len(application_data_list)
-        print(f"Generated {number_of_records} application records. Starting batch insert...")
-        
-        # 4. Insert the records into DynamoDB
-        batch_insert_records(application_data_list)
+        # 3. Generate the application records and insert them into DynamoDB
+        run_stage(students, exam_holds)
         
         print("✅ All application data insertion attempts complete.")
     else:
@@ -1,9 +1,15 @@
-import boto3
 import uuid
 import random
 from datetime import datetime, timezone, timedelta
-import time
-from boto3.dynamodb.types import TypeSerializer # Used for handling complex data types
+from bulk_writer import create_writer
+from export_writer import export_dir_from_argv
+from fast_serializer import ItemEncoder
+from async_engine import in_flight_from_argv
+from write_backends import backend_from_argv
+from parent_index import get_parent_index
+from run_journal import journaled
+from snapshot_cache import SCHEMA_SOURCES, cached_items, source_fingerprint
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # --- Partition Structures and Relationships ---
 # This script generates mock data for the CERTIFICATION partition.
@@ -22,56 +28,47 @@ from boto3.dynamodb.types import TypeSerializer # Used for handling complex data
 # ---------------------------------------------
 
 # --- Configuration ---
-# Set your DynamoDB table name and AWS profile
-TABLE_NAME = "fossy_stg"
-AWS_PROFILE_NAME = "asdf"
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 100 # Write capacity the batch writer paces itself towards
+WRITE_BACKEND = backend_from_argv("batch_write") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
+GENERATOR_VERSION = source_fingerprint("8-certification-seed.py", *SCHEMA_SOURCES) # Snapshot cache key part
+# Values other than lists and numbers are stored as strings, as per schema
+ITEM_ENCODER = ItemEncoder("CERTIFICATION", stringify=True)
 # ---------------------
 
 # AWS Setup
-print(f"Using AWS Profile: {AWS_PROFILE_NAME}")
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+dynamodb_client = get_dynamodb_client()
 
 def get_existing_items(partition_key):
-    """Queries DynamoDB to get all items with a given partition key."""
-    try:
-        response = dynamodb_client.query(
-            TableName=TABLE_NAME,
-            KeyConditionExpression="partitionKey = :pk",
-            ExpressionAttributeValues={":pk": {"S": partition_key}}
-        )
-        items = response.get('Items', [])
-        if items:
-            print(f"✅ Successfully fetched {len(items)} items for {partition_key}")
-        else:
-            print(f"⚠️ Warning: Found 0 items with partition key '{partition_key}'")
-        return items
-    except Exception as e:
-        print(f"❌ Error fetching items for {partition_key}: {e}")
-        return []
+    """
+    Returns the indexed items of a partition from the local parent index (rebuilt from the table if empty),
+    streamed page by page whenever they are iterated.
+    """
+    return get_parent_index().partition_or_refresh(dynamodb_client, TABLE_NAME, partition_key)
 
-def create_hardcoded_certification_data(applications):
+def create_hardcoded_certification_data(applications, rng=random):
     """
-    Creates a list of hardcoded mock certification records, linking them to existing applications.
+    Yields hardcoded mock certification records, linking them to existing applications.
+    Random draws come from `rng`.
     """
     now_utc = datetime.now(timezone.utc)
     created_by_user = "system_seed_script"
 
-    certifications = []
-
     for application in applications:
         # Only create certifications for completed payments
         if application['paymentStatus']['S'] == 'completed':
             certification = {
                 "partitionKey": "CERTIFICATION",
-                "sortKey": str(uuid.uuid4()),
+                "sortKey": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
                 "applicationId": application['sortKey']['S'],
                 "studentId": application['studentId']['S'],
                 "examId": application['examId']['S'],
                 "examName": application['examName']['S'],
                 "issueDate": now_utc.strftime('%Y-%m-%d'),
                 "expirationDate": (now_utc + timedelta(days=365*2)).strftime('%Y-%m-%d'), # 2 years expiration
-                "certificationNumber": f"CERT-{random.randint(1000, 9999)}-{random.randint(1000, 9999)}",
+                "certificationNumber": f"CERT-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
                 "status": "active",
                 "memo": f"Mock certification for application {application['sortKey']['S']}",
                 "createdBy": created_by_user,
@@ -79,52 +76,49 @@ def create_hardcoded_certification_data(applications):
                 "updatedBy": created_by_user,
                 "updatedOn": now_utc.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
             }
-            certifications.append(certification)
-
-    # Add standard fields to each exam record
-    serializer = TypeSerializer()
-    final_records = []
-    for record in certifications:
-        # Convert all values to string first, as per schema, except for specific types
-        for key, value in record.items():
-            if not isinstance(value, (list, int, bool)):
-                record[key] = str(value)
-
-        # The serializer converts the Python dictionary to DynamoDB's format
-        # This correctly handles lists, maps, strings, and numbers
-        dynamodb_item = {k: serializer.serialize(v) for k, v in record.items() if v != ''}
-        final_records.append(dynamodb_item)
-
-    return final_records
-
-def batch_insert_records(records_to_insert, batch_size=25):
-    """Inserts records into DynamoDB using BatchWriteItem, which is ideal for complex data."""
-    successful_inserts = 0
-    total_records = len(records_to_insert)
-
-    # Format for BatchWriteItem
-    put_requests = [{"PutRequest": {"Item": item}} for item in records_to_insert]
-
-    for i in range(0, len(put_requests), batch_size):
-        batch = put_requests[i:i + batch_size]
-        request_items = {TABLE_NAME: batch}
-        try:
-            response = dynamodb_client.batch_write_item(RequestItems=request_items)
-            
-            # Basic success count - BatchWriteItem is often all-or-nothing unless there are UnprocessedItems
-            success_in_batch = len(batch)
-            if 'UnprocessedItems' in response and response['UnprocessedItems']:
-                unprocessed_count = len(response['UnprocessedItems'].get(TABLE_NAME, []))
-                success_in_batch -= unprocessed_count
-                print(f"  ⚠️ {unprocessed_count} items were not processed and should be retried.")
+            yield certification
 
-            successful_inserts += success_in_batch
-            print(f"Processed batch of {len(batch)}. Succeeded: {success_in_batch}. (Total Inserted: {successful_inserts}/{total_records})")
+def serialize_record(record_item):
+    """Converts a certification record to a low-level DynamoDB item, dropping empty values."""
+    return ITEM_ENCODER.encode(record_item)
 
-        except Exception as e:
-            print(f"❌ An exception occurred processing batch starting at index {i}: {e}")
-        
-        time.sleep(1)
+def batch_insert_records(records_to_insert, total=None, journal=None):
+    """
+    Streams serialized records through the selected write backend (BatchWriteItem by default), paced by
+    the shared writer. `total` is only used in progress lines. Returns the number of records written.
+    """
+    writer = create_writer(dynamodb_client, TABLE_NAME, "CERTIFICATION", export_dir=EXPORT_DIR, target_wcu=TARGET_WCU, backend=WRITE_BACKEND,
+                           in_flight=IN_FLIGHT)
+    writer, pending = journaled(journal, "CERTIFICATION", writer, records_to_insert)
+    written = writer.put_items(pending, total=total)
+    writer.close()
+    writer.print_summary()
+    return written
+
+def generate_stage(applications, seed=None):
+    """
+    Lazily generates the serialized certification items for the given (serialized) applications without inserting them.
+    `applications` may be any iterable that can be iterated twice, e.g. a parent_index.IndexedPartition.
+    Returns an iterator; with `seed` the output is reproducible and cached (snapshot_cache.py).
+    """
+    # A private generator, so other stages or writer threads drawing from `random` meanwhile change nothing
+    rng = random.Random(seed)
+    return cached_items(
+        "CERTIFICATION", GENERATOR_VERSION, seed,
+        lambda: (serialize_record(certification) for certification in create_hardcoded_certification_data(applications, rng)),
+        parents=[applications])
+
+def run_stage(applications, seed=None, journal=None):
+    """
+    Generates and inserts certifications for the given (serialized) applications with completed payments.
+    The items stream into the writer as they are generated. Returns the number of certifications written.
+    With `seed` the output is reproducible and cached (snapshot_cache.py).
+    With `journal` (run_journal.py), batches an interrupted run already wrote are skipped.
+    """
+    print("Generating certification records and inserting them as they come...")
+    written = batch_insert_records(generate_stage(applications, seed), journal=journal)
+    print(f"Inserted {written} certification records.")
+    return written
 
 # --- Main execution ---
 if __name__ == "__main__":
@@ -135,13 +129,8 @@ if __name__ == "__main__":
 
     # 2. Proceed only if applications were found
     if applications:
-        # 3. Generate the list of certification records
-        certification_data_list = create_hardcoded_certification_data(applications)
-        number_of_records = len(certification_data_list)
-        print(f"Generated {number_of_records} certification records. Starting batch insert...")
-        
-        # 4. Insert the records into DynamoDB
-        batch_insert_records(certification_data_list)
+        # 3. Generate the certification records and insert them into DynamoDB
+        run_stage(applications)
         
         print("✅ All certification data insertion attempts complete.")
     else:
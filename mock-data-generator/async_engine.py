@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import AioSession
+except ImportError:  # aiobotocore is only needed for --in-flight against AWS or DynamoDB Local
+    AioSession = None
+
+import seed_config
+from bulk_writer import BATCH_SIZE, AdaptiveBatchWriter
+
+# --- asyncio write engine ---
+# AdaptiveBatchWriter sends one batch per calling thread and waits for its
+# round-trip, so a stage's throughput is bounded by RTT x batches. This engine
+# runs an asyncio event loop in a background thread and keeps up to N batch
+# requests in flight over one aiobotocore client, whose keep-alive connection
+# pool is sized to N. Pacing, per-partition buckets, retries and throttle
+# handling are inherited from AdaptiveBatchWriter unchanged.
+#
+# Every seed script accepts --in-flight N, which switches its writer to this
+# engine (see bulk_writer.create_writer). The stage functions stay the same:
+# put_items() keeps N batches in flight on its own, and write_batch() can be
+# called from N threads (the student stage sizes its pipeline to match).
+#
+# Requires aiobotocore (pip3 install aiobotocore), except against the
+# in-process fake (local_dynamodb.py), which provides its own asyncio view.
+# ---------------------------------------------
+
+DEFAULT_IN_FLIGHT = 16  # Batch requests in flight when --in-flight is given without a value
+
+
+def in_flight_from_argv(default=None):
+    """Reads an optional `--in-flight [N]` flag from the command line; None keeps the synchronous writer."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--in-flight", type=int, nargs="?", const=DEFAULT_IN_FLIGHT, default=default)
+    args, _ = parser.parse_known_args()
+    return args.in_flight
+
+
+def _require_aiobotocore():
+    if AioSession is None:
+        raise ImportError("The asyncio engine needs aiobotocore. Install it with: pip3 install aiobotocore")
+
+
+def create_async_client(client, in_flight):
+    """
+    Returns an async context manager that yields an asyncio DynamoDB client matching `client`:
+    the client's own asyncio view if it has one (local_dynamodb.py), otherwise an aiobotocore
+    client with the settings from seed_config.py and a connection pool of `in_flight`.
+    """
+    if hasattr(client, "async_client"):
+        return client.async_client(in_flight)
+    _require_aiobotocore()
+    config = AioConfig(max_pool_connections=in_flight, tcp_keepalive=True, retries=seed_config.WRITER_RETRIES)
+    if seed_config.DYNAMODB_ENDPOINT_URL:
+        return AioSession().create_client(
+            "dynamodb", region_name=seed_config.AWS_REGION, endpoint_url=seed_config.DYNAMODB_ENDPOINT_URL,
+            aws_access_key_id="local", aws_secret_access_key="local", config=config)
+    return AioSession(profile=seed_config.AWS_PROFILE_NAME).create_client(
+        "dynamodb", region_name=seed_config.AWS_REGION, config=config)
+
+
+class AsyncBatchWriter(AdaptiveBatchWriter):
+    """
+    AdaptiveBatchWriter that sends its batches from an asyncio event loop, with up to
+    `in_flight` requests outstanding at once. Safe to share between threads; call close()
+    when done so the client and its connections are released.
+    """
+
+    def __init__(self, client, table_name, in_flight=DEFAULT_IN_FLIGHT, **options):
+        super().__init__(client, table_name, **options)
+        self.in_flight = in_flight
+        self.slots = threading.BoundedSemaphore(in_flight)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-writer", daemon=True)
+        self.thread.start()
+        self.client_context = create_async_client(client, in_flight)
+        self.async_client = self._run(self.client_context.__aenter__())
+
+    def write_batch(self, items):
+        return self._submit([self.backend.prepare(item) for item in items], self.backend).result()
+
+    def delete_batch(self, keys):
+        return self._submit([self.delete_backend.prepare_delete(key) for key in keys], self.delete_backend).result()
+
+    def close(self):
+        """Waits for outstanding batches, then closes the asyncio client and stops the event loop."""
+        if self.loop.is_closed():
+            return
+        self._drain()
+        self._run(self.client_context.__aexit__(None, None, None))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        super().close()
+
+    # --- Scheduling on the event loop ---
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def _submit(self, batch, backend, total=None, on_done=None):
+        """Schedules a batch once one of the `in_flight` slots is free and returns its future."""
+        self.slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(self._write_with_retries_async(batch, backend, total), self.loop)
+
+        def finished(done):
+            if on_done:
+                on_done(done)
+            self.slots.release()
+        future.add_done_callback(finished)
+        return future
+
+    def _drain(self):
+        """Blocks until every submitted batch has finished."""
+        for _ in range(self.in_flight):
+            self.slots.acquire()
+        for _ in range(self.in_flight):
+            self.slots.release()
+
+    def _run_batches(self, requests, backend, total):
+        outcome = {"written": 0, "error": None}
+        lock = threading.Lock()
+
+        def collect(future):
+            with lock:
+                if future.exception():
+                    outcome["error"] = future.exception()
+                else:
+                    outcome["written"] += future.result()
+
+        batch = []
+        for request in requests:
+            batch.append(request)
+            if len(batch) == BATCH_SIZE:
+                self._submit(batch, backend, total, on_done=collect)
+                batch = []
+        if batch:
+            self._submit(batch, backend, total, on_done=collect)
+        self._drain()
+        if outcome["error"]:
+            raise outcome["error"]
+        return outcome["written"]
+
+    async def _write_with_retries_async(self, batch, backend, total=None):
+        # Same steps as AdaptiveBatchWriter._write_with_retries, with the waits awaited
+        pending = batch
+        attempt = 0
+        batch_size = len(batch)
+        succeeded = 0
+        failed = 0
+
+        while pending:
+            estimated, partition_estimates, wait_seconds = self._reserve(pending, backend)
+            await asyncio.sleep(wait_seconds)
+            sent_at = time.monotonic()
+            try:
+                result = await backend.send_async(self.async_client, pending)
+            except ClientError as e:
+                result = self._send_error(e, pending, backend, estimated, partition_estimates, time.monotonic() - sent_at)
+                if result is None:
+                    failed += len(pending)
+                    break
+
+            unprocessed, processed, failed_now = self._settle_attempt(pending, backend, estimated, partition_estimates,
+                                                                      result, time.monotonic() - sent_at)
+            succeeded += processed
+            failed += failed_now
+            if not unprocessed:
+                break
+
+            attempt += 1
+            if attempt > self.max_retries:
+                print(f"  ❌ Giving up on {len(unprocessed)} items after {self.max_retries} retries.")
+                failed += len(unprocessed)
+                break
+            self._count_retry()
+            await asyncio.sleep(self._backoff(attempt))
+            pending = unprocessed
+
+        return self._finish_batch(batch_size, succeeded, failed, total)
@@ -0,0 +1,318 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import seed_config
+from async_engine import DEFAULT_IN_FLIGHT, create_async_client
+from local_dynamodb import InMemoryDynamoDB
+from parent_index import ParentIndex, set_parent_index
+from run_manifest import set_run_manifest
+from snapshot_cache import set_snapshot_cache
+from scale_profiles import DEFAULT_PROFILE, SCALE_PROFILES
+from seed_config import TABLE_NAME, get_dynamodb_client, set_dynamodb_client
+from write_backends import BACKENDS
+
+# --- Seeding benchmark harness ---
+# Runs the whole seed chain (seed-all.py) against a local stand-in instead of
+# AWS and records, per stage: items/s, p50/p99 latency of the write calls,
+# peak RSS and CPU seconds (including generator processes). Results are
+# appended to a JSON file together with the git commit, so runs can be
+# compared across commits.
+#
+#   python3 benchmark-seeding.py --scales 10k 100k 1M
+#   python3 benchmark-seeding.py --endpoint http://localhost:8000   # DynamoDB Local
+#
+# Without --endpoint the in-process fake from local_dynamodb.py is used, which
+# measures the client side only (generation, serialization, pacing, threads).
+# ---------------------------------------------
+
+DEFAULT_SCALES = ["10k"]
+DEFAULT_RESULTS_FILE = "benchmark-results.json"
+BENCHMARK_TARGET_WCU = 1000000 # High enough that pacing never limits a local endpoint
+RSS_SAMPLE_INTERVAL = 0.05 # Seconds between RSS samples while a stage runs
+
+# Write calls and how many items each one carries
+WRITE_CALLS = {
+    "batch_write_item": lambda kwargs: sum(len(requests) for requests in kwargs["RequestItems"].values()),
+    "batch_execute_statement": lambda kwargs: len(kwargs["Statements"]),
+    "put_item": lambda kwargs: 1,
+}
+
+
+class TimedClient:
+    """Wraps a DynamoDB client and records the latency and item count of every write call."""
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.latencies_ms = []
+        self.items = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        if name not in WRITE_CALLS:
+            return method
+        count_items = WRITE_CALLS[name]
+
+        def timed_call(**kwargs):
+            started = time.perf_counter()
+            try:
+                return method(**kwargs)
+            finally:
+                self.record(started, count_items(kwargs))
+        return timed_call
+
+    def async_client(self, in_flight):
+        """Timed asyncio client for the async engine, wrapping the one the engine would create."""
+        return TimedAsyncClient(self, create_async_client(self.client, in_flight))
+
+    def record(self, started, items):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latencies_ms.append(elapsed_ms)
+            self.items += items
+
+    def take(self):
+        """Returns (latencies_ms, items) recorded since the last call and resets them."""
+        with self.lock:
+            latencies, items = self.latencies_ms, self.items
+            self.latencies_ms, self.items = [], 0
+        return latencies, items
+
+
+class TimedAsyncClient:
+    """Async counterpart of TimedClient: an async context manager whose write coroutines are timed."""
+
+    def __init__(self, timed_client, client_context):
+        self.timed_client = timed_client
+        self.client_context = client_context
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = await self.client_context.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self.client_context.__aexit__(*exc_info)
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        if name not in WRITE_CALLS:
+            return method
+        count_items = WRITE_CALLS[name]
+
+        async def timed_call(**kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(**kwargs)
+            finally:
+                self.timed_client.record(started, count_items(kwargs))
+        return timed_call
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or its peak so far where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def cpu_seconds():
+    """User + system CPU of this process and of its finished child processes."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def parse_scale(text):
+    """Parses '10k', '100k', '1M' or a plain number into a student count."""
+    multipliers = {"k": 1000, "m": 1000000}
+    suffix = text[-1].lower()
+    if suffix in multipliers:
+        return int(float(text[:-1]) * multipliers[suffix])
+    return int(text)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ensure_table(client):
+    """Creates the seed table on a local endpoint if it does not exist yet."""
+    try:
+        client.describe_table(TableName=TABLE_NAME)
+    except client.exceptions.ResourceNotFoundException:
+        print(f"Creating table '{TABLE_NAME}' on the local endpoint...")
+        client.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "partitionKey", "KeyType": "HASH"},
+                       {"AttributeName": "sortKey", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "partitionKey", "AttributeType": "S"},
+                                  {"AttributeName": "sortKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        client.get_waiter("table_exists").wait(TableName=TABLE_NAME)
+
+
+class StageMeter:
+    """measure_stage hook for seed_all(): collects wall time, latencies, RSS and CPU per stage."""
+
+    def __init__(self, timed_client):
+        self.timed_client = timed_client
+        self.stages = {}
+
+    def __call__(self, name, run):
+        self.timed_client.take()
+        peak_rss = [current_rss_bytes()]
+        done = threading.Event()
+
+        def sample_rss():
+            while not done.wait(RSS_SAMPLE_INTERVAL):
+                peak_rss[0] = max(peak_rss[0], current_rss_bytes())
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+        cpu_started = cpu_seconds()
+        wall_started = time.perf_counter()
+        try:
+            return run()
+        finally:
+            wall_seconds = time.perf_counter() - wall_started
+            cpu_used = cpu_seconds() - cpu_started
+            done.set()
+            sampler.join()
+            peak_rss[0] = max(peak_rss[0], current_rss_bytes())
+            latencies, items = self.timed_client.take()
+            self.stages[name] = {
+                "items": items,
+                "seconds": round(wall_seconds, 3),
+                "items_per_second": round(items / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+                "write_calls": len(latencies),
+                "p50_batch_ms": round(percentile(latencies, 0.50), 3),
+                "p99_batch_ms": round(percentile(latencies, 0.99), 3),
+                "peak_rss_mb": round(peak_rss[0] / 2**20, 1),
+                "cpu_seconds": round(cpu_used, 3),
+            }
+
+
+def run_benchmark(seed_all_module, timed_client, students, args):
+    """Seeds `students` students plus their dependent partitions once and returns the run's result entry."""
+    meter = StageMeter(timed_client)
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+        seed_all_module.seed_all(students, target_wcu=args.target_wcu, processes=args.processes,
+                                 columnar=args.columnar, master_seed=args.seed, measure_stage=meter,
+                                 interleave=args.interleave)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "endpoint": args.endpoint or "in-process",
+        "fake_latency_ms": None if args.endpoint else args.fake_latency_ms,
+        "backend": args.backend,
+        "profile": args.profile,
+        "students": students,
+        "processes": args.processes,
+        "columnar": args.columnar,
+        "cache": args.cache,
+        "interleave": args.interleave,
+        "in_flight": args.in_flight,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "stages": meter.stages,
+    }
+
+
+def append_results(path, entries):
+    """Appends run entries to the JSON results file ({"runs": [...]})."""
+    results = {"runs": []}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f)
+    results["runs"].extend(entries)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def print_run(entry):
+    print(f"\n📊 {entry['students']} students on {entry['endpoint']} ({entry['total_seconds']:.1f}s total)")
+    width = max([14] + [len(name) for name in entry["stages"]])
+    print(f"  {'stage':<{width}} {'items':>9} {'items/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'CPU s':>8}")
+    for name, stage in entry["stages"].items():
+        print(f"  {name:<{width}} {stage['items']:>9} {stage['items_per_second']:>10.1f} {stage['p50_batch_ms']:>8.2f} "
+              f"{stage['p99_batch_ms']:>8.2f} {stage['peak_rss_mb']:>8.1f} {stage['cpu_seconds']:>8.2f}")
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every seed stage against a local DynamoDB stand-in.")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES,
+                        help="Student counts to run, e.g. 10k 100k 1M (default: 10k)")
+    parser.add_argument("--endpoint", help="Local DynamoDB endpoint (e.g. http://localhost:8000); "
+                                           "default is the in-process fake")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0,
+                        help="Latency the in-process fake adds to every call")
+    parser.add_argument("--target-wcu", type=int, default=BENCHMARK_TARGET_WCU, help="Write capacity to pace towards")
+    parser.add_argument("--processes", type=int, default=1, help="Generator processes for the student stage")
+    parser.add_argument("--columnar", action="store_true", help="Use the columnar NumPy student generator")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed for the student stage")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSON file the results are appended to")
+    parser.add_argument("--cache", action="store_true", help="Allow cached snapshots (measures the cached path)")
+    parser.add_argument("--interleave", action="store_true", help="Write independent stages together")
+    parser.add_argument("--verbose", action="store_true", help="Show the stages' own progress output")
+    # Read by each stage module itself; declared here so they show up in --help
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Write backend for every stage")
+    parser.add_argument("--in-flight", type=int, nargs="?", const=DEFAULT_IN_FLIGHT,
+                        help="Batch requests kept in flight by the asyncio engine")
+    parser.add_argument("--profile", choices=sorted(SCALE_PROFILES), default=DEFAULT_PROFILE,
+                        help="Fan-out of the dependent partitions (the scales set the student count)")
+    args = parser.parse_args()
+
+    if args.endpoint:
+        seed_config.DYNAMODB_ENDPOINT_URL = args.endpoint
+        local_client = get_dynamodb_client()
+        ensure_table(local_client)
+    timed_client = TimedClient(None)
+    set_dynamodb_client(timed_client)
+    # Benchmarks must never touch the real parent index
+    scratch_dir = tempfile.TemporaryDirectory(prefix="seed-benchmark-")
+    set_parent_index(ParentIndex(os.path.join(scratch_dir.name, "parent_index.sqlite3")))
+    set_run_manifest(None) # Nothing a benchmark writes needs tearing down
+    if not args.cache:
+        set_snapshot_cache(None) # Otherwise every run after the first would only measure cache reads
+    seed_all_module = importlib.import_module("seed-all")
+
+    entries = []
+    for scale in args.scales:
+        students = parse_scale(scale)
+        # A fresh fake per scale; it keeps only counts so large scales do not hold the dataset
+        timed_client.client = local_client if args.endpoint else InMemoryDynamoDB(
+            latency=args.fake_latency_ms / 1000, store_items=False)
+        print(f"🚀 Benchmarking {students} students...")
+        entry = run_benchmark(seed_all_module, timed_client, students, args)
+        print_run(entry)
+        entries.append(entry)
+
+    append_results(args.output, entries)
+    print(f"\n✅ Appended {len(entries)} run(s) to '{args.output}'")
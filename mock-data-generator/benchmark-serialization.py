@@ -0,0 +1,114 @@
+import argparse
+import importlib
+import random
+import time
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from local_dynamodb import InMemoryDynamoDB
+from parallel_generation import derive_seed
+from scale_profiles import DEFAULT_PROFILE, SCALE_PROFILES
+from seed_config import set_dynamodb_client
+
+# --- Serializer micro-benchmark ---
+# Generates the plain records of stages 4-8 once, then times turning them
+# into low-level items two ways: the stage's ItemEncoder (fast_serializer.py)
+# and the per-attribute TypeSerializer path the stages used before. Every
+# encoded item is checked against the TypeSerializer output.
+#
+#   python3 benchmark-serialization.py --students 5000 --profile prod-like
+#
+# Nothing is written: the stage modules get the in-process fake as client.
+# ---------------------------------------------
+
+DEFAULT_STUDENTS = 2000
+DEFAULT_REPEAT = 5  # Timed passes per encoder; the fastest one counts
+MASTER_SEED = 0
+
+type_serializer = TypeSerializer()
+
+
+def type_serializer_item(record, encoder):
+    """The stages' former path: stringify like `encoder`, then TypeSerializer on every attribute."""
+    if encoder.stringify:
+        record = {key: value if isinstance(value, (list, int)) else str(value) for key, value in record.items()}
+    return {key: type_serializer.serialize(value) for key, value in record.items() if encoder.keep(value)}
+
+
+def generate_records(students_count):
+    """Returns {partition: (stage module, plain records)} for stages 4-8, built from a fixed seed."""
+    stages = {number: importlib.import_module(name) for number, name in [
+        (1, "1-students-seed"), (2, "2-venues-seed"), (3, "3-bank-seed"), (4, "4-exam-seed"),
+        (5, "5-examhold-seed"), (6, "6-application-seed"), (7, "7-payment-seed"), (8, "8-certification-seed")]}
+
+    def seeded(stage_number):
+        random.seed(derive_seed(MASTER_SEED, stage_number, 0))
+
+    students = []
+    for _ in stages[1].collect_parent_attributes(stages[1].generate_stage(students_count, processes=1,
+                                                                           master_seed=MASTER_SEED), students):
+        pass
+    venues = stages[2].generate_stage(seed=derive_seed(MASTER_SEED, 2, 0))
+    bank_accounts = stages[3].generate_stage(seed=derive_seed(MASTER_SEED, 3, 0))
+
+    seeded(4)
+    exam_records = stages[4].create_hardcoded_exam_data([account["sortKey"] for account in bank_accounts])
+    exams = [stages[4].serialize_record(record) for record in exam_records]
+    deserializer = TypeDeserializer()
+    seeded(5)
+    hold_records = stages[5].create_mock_schedule_data([deserializer.deserialize({"M": exam}) for exam in exams], venues)
+    holds = [stages[5].serialize_record(record) for record in hold_records]
+    seeded(6)
+    application_records = list(stages[6].create_hardcoded_application_data(students, holds))
+    applications = [stages[6].serialize_record(record) for record in application_records]
+    seeded(7)
+    payment_records = list(stages[7].create_hardcoded_payment_data(applications))
+    seeded(8)
+    certification_records = list(stages[8].create_hardcoded_certification_data(applications))
+    return {
+        "EXAM": (stages[4], exam_records),
+        "EXAM_HOLD": (stages[5], hold_records),
+        "APPLICATION": (stages[6], application_records),
+        "PAYMENT": (stages[7], payment_records),
+        "CERTIFICATION": (stages[8], certification_records),
+    }
+
+
+def best_seconds(encode, records, repeat):
+    """Fastest of `repeat` passes of encode() over every record."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for record in records:
+            encode(record)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ItemEncoder with TypeSerializer on the records of stages 4-8.")
+    parser.add_argument("--students", type=int, default=DEFAULT_STUDENTS, help="Students the dependent records fan out from")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed passes per encoder")
+    # Read by each stage module itself; declared here so it shows up in --help
+    parser.add_argument("--profile", choices=sorted(SCALE_PROFILES), default=DEFAULT_PROFILE,
+                        help="Fan-out of the dependent partitions")
+    args = parser.parse_args()
+
+    set_dynamodb_client(InMemoryDynamoDB(store_items=False))  # The stage modules create no AWS client
+    print(f"🚀 Generating records for {args.students} students...")
+    records_by_partition = generate_records(args.students)
+
+    print(f"\n📊 Best of {args.repeat} passes")
+    print(f"  {'partition':<14} {'items':>8} {'attrs':>6} {'TypeSerializer µs':>18} {'ItemEncoder µs':>15} {'speedup':>8}")
+    for partition, (stage, records) in records_by_partition.items():
+        encoder = stage.ITEM_ENCODER
+        mismatches = sum(stage.serialize_record(record) != type_serializer_item(record, encoder) for record in records)
+        if mismatches:
+            print(f"  ❌ {partition}: {mismatches} item(s) differ from the TypeSerializer output")
+        reference = best_seconds(lambda record: type_serializer_item(record, encoder), records, args.repeat)
+        fast = best_seconds(stage.serialize_record, records, args.repeat)
+        attributes = sum(len(record) for record in records) / len(records)
+        print(f"  {partition:<14} {len(records):>8} {attributes:>6.0f} {reference / len(records) * 1e6:>18.1f} "
+              f"{fast / len(records) * 1e6:>15.1f} {reference / fast:>7.1f}x")
@@ -0,0 +1,382 @@
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from dataset_stamp import get_dataset_stamp
+from export_writer import ExportWriter
+from parent_index import get_parent_index, indexes
+from run_manifest import get_run_manifest
+from seed_config import writer_client_for
+from seed_metrics import get_metrics
+from write_backends import THROTTLE_ERROR_CODES, TRANSIENT_ERROR_CODES, BatchWriteBackend, create_backend
+
+# --- Shared capacity-aware bulk writer ---
+# Every seed script used to send 25 items and then sleep a fixed 1-3 seconds,
+# which caps throughput no matter how much capacity the table has. This writer
+# paces itself with a token bucket measured in WCU instead:
+#
+# - Each request asks for ReturnConsumedCapacity and the bucket is settled
+#   against what DynamoDB actually charged, so wide items cost more tokens.
+# - Throttling (exceptions, UnprocessedItems, per-statement PartiQL errors)
+#   halves the send rate; every clean batch nudges it back towards the target.
+# - Unprocessed / throttled items are retried with jittered exponential backoff
+#   instead of only being logged. Transient server errors (InternalServerError)
+#   are retried the same way but leave the rate alone. The writer is the only
+#   retry layer: it sends through seed_config.writer_client_for(client), which
+#   has botocore's own retries turned off, so every throttle is counted here.
+# - How batches are sent is delegated to a backend from write_backends.py
+#   (PartiQL, BatchWriteItem or parallel PutItem), chosen by name.
+# - With `partition_wcu` every partition key value also gets its own bucket,
+#   and throttling only slows down the partitions whose items came back
+#   (used by partition_scheduler.py for batches mixing several partitions).
+# - Every request's latency, consumed capacity and unprocessed items go to
+#   seed_metrics.py, labelled with the writer's `stage`. Progress lines are
+#   printed at most every PROGRESS_INTERVAL seconds instead of per batch.
+# ---------------------------------------------
+
+DEFAULT_TARGET_WCU = 100  # Matches the WCU the readme suggests for seeding
+BATCH_SIZE = 25  # BatchWriteItem / BatchExecuteStatement hard limit
+DEFAULT_BACKEND = "batch_write"
+PARTITION_WCU_LIMIT = 1000  # DynamoDB's write ceiling for a single partition key value
+PROGRESS_INTERVAL = 2.0  # Seconds between console progress lines
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second.
+    Tokens may go negative: callers debit their estimated cost up front and
+    sleep off the debt, then settle the difference once the real cost is known.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def reserve(self, amount):
+        """Debits `amount` tokens and returns how long the caller must wait before sending."""
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def acquire(self, amount):
+        """Debits `amount` tokens, sleeping until the bucket is out of debt."""
+        wait_seconds = self.reserve(amount)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+    def available(self):
+        """Current token balance; negative while earlier callers are still sleeping off debt."""
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+    def settle(self, estimated, actual):
+        """Corrects an earlier debit once the real consumed capacity is known."""
+        with self.lock:
+            self.tokens += estimated - actual
+
+
+class AdaptiveBatchWriter:
+    """
+    Writes items to DynamoDB in batches of 25, pacing requests towards
+    `target_wcu` and retrying anything DynamoDB could not process.
+    Puts go through the `backend` named in write_backends.BACKENDS; deletes
+    always use BatchWriteItem. With `partition_wcu`, each partition key value
+    is additionally paced by its own bucket. Safe to share between threads.
+    """
+
+    def __init__(self, client, table_name, target_wcu=DEFAULT_TARGET_WCU, backend=DEFAULT_BACKEND, max_retries=8,
+                 base_backoff=0.05, max_backoff=20.0, min_rate=1.0, verbose=True, action="Inserted", total=None,
+                 partition_wcu=None, stage=None):
+        client = writer_client_for(client)
+        self.client = client
+        self.table_name = table_name
+        self.backend = create_backend(backend, client, table_name)
+        self.delete_backend = BatchWriteBackend(client, table_name)
+        self.target_wcu = float(target_wcu)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_rate = min_rate
+        self.verbose = verbose
+        self.action = action  # Verb used in progress lines ("Inserted", "Deleted", ...)
+        self.total = total  # Expected item count shown in progress lines, if known
+        self.partition_wcu = float(partition_wcu) if partition_wcu else None
+        self.stage = stage or action  # Metrics label (seed_metrics.py)
+        self.metrics = get_metrics()
+
+        self.bucket = TokenBucket(self.target_wcu)
+        self.partition_buckets = {}  # partition key value -> TokenBucket, only with partition_wcu
+        self.wcu_per_item = 1.0  # Running estimate, corrected by ConsumedCapacity
+        self.lock = threading.Lock()
+
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttles = 0
+        self.consumed_wcu = 0.0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    # --- Public entry points ---
+
+    def put_items(self, items, total=None):
+        """Writes already-serialized (low-level) items through the configured backend."""
+        requests = (self.backend.prepare(item) for item in items)
+        return self._run_batches(requests, self.backend, total)
+
+    def delete_keys(self, keys, total=None):
+        """Deletes items by primary key ({'partitionKey': {...}, 'sortKey': {...}})."""
+        requests = (self.delete_backend.prepare_delete(key) for key in keys)
+        return self._run_batches(requests, self.delete_backend, total)
+
+    def write_batch(self, items):
+        """Writes a single batch of up to 25 low-level items and returns the success count."""
+        return self._write_with_retries([self.backend.prepare(item) for item in items], self.backend)
+
+    def delete_batch(self, keys):
+        """Deletes a single batch of up to 25 primary keys and returns the success count."""
+        return self._write_with_retries([self.delete_backend.prepare_delete(key) for key in keys], self.delete_backend)
+
+    def partition_ready(self, partition_key):
+        """False while `partition_key`'s own bucket is in debt; always True without partition_wcu."""
+        if not self.partition_wcu:
+            return True
+        return self._partition_bucket(partition_key).available() > 0
+
+    def items_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.succeeded / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        """Releases the backend (the put_item thread pool); API writes have nothing to flush."""
+        self.backend.close()
+
+    def print_summary(self):
+        elapsed = time.monotonic() - self.started
+        print(f"📊 {self.action} {self.succeeded} items in {elapsed:.1f}s ({self.items_per_second():.1f} items/s). "
+              f"Failed: {self.failed}, retries: {self.retries}, throttles: {self.throttles}, "
+              f"consumed: {self.consumed_wcu:.1f} WCU.")
+
+    # --- Batching and retries ---
+
+    def _run_batches(self, requests, backend, total):
+        written = 0
+        batch = []
+        for request in requests:
+            batch.append(request)
+            if len(batch) == BATCH_SIZE:
+                written += self._write_with_retries(batch, backend, total)
+                batch = []
+        if batch:
+            written += self._write_with_retries(batch, backend, total)
+        return written
+
+    def _write_with_retries(self, batch, backend, total=None):
+        pending = batch
+        attempt = 0
+        batch_size = len(batch)
+        succeeded = 0
+        failed = 0
+
+        while pending:
+            estimated, partition_estimates, wait_seconds = self._reserve(pending, backend)
+            time.sleep(wait_seconds)
+            sent_at = time.monotonic()
+            try:
+                result = backend.send(pending)
+            except ClientError as e:
+                result = self._send_error(e, pending, backend, estimated, partition_estimates, time.monotonic() - sent_at)
+                if result is None:
+                    failed += len(pending)
+                    break
+
+            unprocessed, processed, failed_now = self._settle_attempt(pending, backend, estimated, partition_estimates,
+                                                                      result, time.monotonic() - sent_at)
+            succeeded += processed
+            failed += failed_now
+            if not unprocessed:
+                break
+
+            attempt += 1
+            if attempt > self.max_retries:
+                print(f"  ❌ Giving up on {len(unprocessed)} items after {self.max_retries} retries.")
+                failed += len(unprocessed)
+                break
+            self._count_retry()
+            time.sleep(self._backoff(attempt))
+            pending = unprocessed
+
+        return self._finish_batch(batch_size, succeeded, failed, total)
+
+    def _reserve(self, pending, backend):
+        """Debits the buckets for a send; returns (estimated WCU, per-partition estimates, seconds to wait)."""
+        estimated = self.wcu_per_item * len(pending)
+        partition_estimates = {}
+        wait_seconds = self.bucket.reserve(estimated)
+        for partition_key, count in self._partition_counts(pending, backend).items():
+            partition_estimates[partition_key] = self.wcu_per_item * count
+            partition_wait = self._partition_bucket(partition_key).reserve(partition_estimates[partition_key])
+            wait_seconds = max(wait_seconds, partition_wait)
+        return estimated, partition_estimates, wait_seconds
+
+    def _send_error(self, error, pending, backend, estimated, partition_estimates, seconds=0.0):
+        """
+        Refunds a send that raised; returns a retry-everything result when it was throttled
+        or hit a transient server error (retried without slowing down), else None.
+        """
+        code = error.response.get("Error", {}).get("Code", "")
+        self.bucket.settle(estimated, 0)
+        self._settle_partitions(partition_estimates, 0.0)
+        if code in THROTTLE_ERROR_CODES:
+            return pending, 0, 0.0, 0
+        if code in TRANSIENT_ERROR_CODES:
+            return pending, 0, 0.0, len(pending)
+        print(f"❌ An exception occurred writing a batch of {len(pending)}: {error}")
+        self.metrics.record_request(self.stage, seconds, 0.0, self._batch_partitions(pending, backend), {})
+        return None
+
+    def _settle_attempt(self, pending, backend, estimated, partition_estimates, result, seconds=0.0):
+        """Books a send's outcome against the buckets, rates and metrics; returns (unprocessed, processed, failed)."""
+        unprocessed, failed_now, consumed, transient = result
+        throttled = unprocessed[:len(unprocessed) - transient]
+        processed = len(pending) - len(unprocessed) - failed_now
+        self.metrics.record_request(self.stage, seconds, consumed, self._batch_partitions(pending, backend),
+                                    self._batch_partitions(throttled, backend))
+        self._record_capacity(estimated, consumed, processed + failed_now)
+        if consumed:
+            self._settle_partitions(partition_estimates, consumed / estimated)
+        if throttled:
+            self._on_throttle(self._partition_counts(throttled, backend))
+        elif not unprocessed:
+            self._increase_rate(partition_estimates)
+        return unprocessed, processed, failed_now
+
+    def _count_retry(self):
+        with self.lock:
+            self.retries += 1
+        self.metrics.record_retry(self.stage)
+
+    def _finish_batch(self, batch_size, succeeded, failed, total):
+        self.metrics.record_batch(self.stage, succeeded, failed)
+        total = total or self.total
+        now = time.monotonic()
+        with self.lock:
+            self.succeeded += succeeded
+            self.failed += failed
+            total_succeeded = self.succeeded
+            # One line per PROGRESS_INTERVAL, plus the one that completes a known total
+            report = now - self.last_report >= PROGRESS_INTERVAL or bool(total and total_succeeded >= total)
+            if report:
+                self.last_report = now
+        if self.verbose and report:
+            total_text = f"/{total}" if total else ""
+            print(f"{self.action} {total_succeeded}{total_text} items ({self.items_per_second():.1f} items/s, "
+                  f"rate {self.bucket.rate:.0f} WCU/s, {self.failed} failed, {self.retries} retries)")
+        return succeeded
+
+    # --- Rate control ---
+
+    def _record_capacity(self, estimated, consumed, item_count):
+        if consumed:
+            self.bucket.settle(estimated, consumed)
+        if consumed and item_count:
+            with self.lock:
+                self.consumed_wcu += consumed
+                # Exponential moving average so one odd batch does not swing pacing
+                self.wcu_per_item = 0.8 * self.wcu_per_item + 0.2 * (consumed / item_count)
+
+    def _on_throttle(self, throttled_partitions=None):
+        with self.lock:
+            self.throttles += 1
+        if throttled_partitions:
+            # A mixed batch only tells us which partitions are hot; the others keep their rate
+            for partition_key in throttled_partitions:
+                bucket = self._partition_bucket(partition_key)
+                bucket.set_rate(max(self.min_rate, bucket.rate / 2))
+            return
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+
+    def _increase_rate(self, partitions=()):
+        if self.bucket.rate < self.target_wcu:
+            self.bucket.set_rate(min(self.target_wcu, self.bucket.rate + max(1.0, self.target_wcu * 0.05)))
+        for partition_key in partitions:
+            bucket = self._partition_bucket(partition_key)
+            if bucket.rate < self.partition_wcu:
+                bucket.set_rate(min(self.partition_wcu, bucket.rate + max(1.0, self.partition_wcu * 0.05)))
+
+    # --- Per-partition pacing ---
+
+    def _partition_bucket(self, partition_key):
+        with self.lock:
+            bucket = self.partition_buckets.get(partition_key)
+            if bucket is None:
+                bucket = self.partition_buckets[partition_key] = TokenBucket(self.partition_wcu)
+            return bucket
+
+    def _batch_partitions(self, requests, backend):
+        """{partition key value: request count} of a batch, for the metrics."""
+        counts = {}
+        for request in requests:
+            partition_key = backend.partition_of(request)
+            counts[partition_key] = counts.get(partition_key, 0) + 1
+        return counts
+
+    def _partition_counts(self, requests, backend):
+        """{partition key value: request count}, or {} when partitions are not paced separately."""
+        counts = {}
+        if self.partition_wcu:
+            for request in requests:
+                partition_key = backend.partition_of(request)
+                counts[partition_key] = counts.get(partition_key, 0) + 1
+        return counts
+
+    def _settle_partitions(self, estimates, ratio):
+        # ConsumedCapacity is reported per table, so each partition is charged its share of it
+        for partition_key, estimated in estimates.items():
+            self._partition_bucket(partition_key).settle(estimated, estimated * ratio)
+
+    def _backoff(self, attempt):
+        # "Full jitter": sleep a random amount up to the exponential ceiling
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+
+def create_writer(client, table_name, stage, export_dir=None, in_flight=None, **options):
+    """
+    Returns an ExportWriter writing gzipped DynamoDB JSON under `export_dir/stage`
+    when `export_dir` is set, an AsyncBatchWriter keeping `in_flight` batches in
+    flight when that is set, otherwise an AdaptiveBatchWriter for the table.
+    When the run has a dataset stamp (--lifetime / --run-id, see dataset_stamp.py),
+    the writer adds `ttl` and `seedRunId` to every item. Table writers also record
+    the keys they write in the run's manifest (run_manifest.py), and the fully
+    acknowledged batches of parent partitions in the parent index (parent_index.py).
+    """
+    if export_dir:
+        writer = ExportWriter(export_dir, stage, verbose=options.get("verbose", True), total=options.get("total"))
+    elif in_flight:
+        from async_engine import AsyncBatchWriter  # Imported here because async_engine builds on this module
+        writer = AsyncBatchWriter(client, table_name, in_flight=in_flight, stage=stage, **options)
+    else:
+        writer = AdaptiveBatchWriter(client, table_name, stage=stage, **options)
+    if not export_dir and indexes(stage):
+        writer = get_parent_index().writer(writer)
+    stamp = get_dataset_stamp()
+    if stamp:
+        writer = stamp.writer(writer)
+    manifest = None if export_dir else get_run_manifest()
+    return manifest.writer(writer) if manifest else writer
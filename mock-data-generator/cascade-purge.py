@@ -0,0 +1,194 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk_writer import AdaptiveBatchWriter
+from key_set import KeySet, key_hash
+from parent_index import INDEXED_ATTRIBUTES, RECORD_BUFFER_SIZE, get_parent_index
+from partition_schema import KEY_ATTRIBUTES, SCHEMAS, get_schema, reference_values
+from pipeline import run_pipeline
+from seed_config import TABLE_NAME, get_dynamodb_client
+
+# --- Dependency-aware cascade purge ---
+# Deletes a whole partition, or some of its items, together with everything
+# that references them, so no orphans are left behind:
+#
+#   python3 cascade-purge.py EXAM_HOLD                  # every schedule, its applications, payments, certifications
+#   python3 cascade-purge.py STUDENT --sort-keys <id>   # one student and what hangs off it
+#
+# The dependency graph comes from the references in partition_schema.py:
+# BANK_ACCOUNT <- EXAM <- EXAM_HOLD (<- EXAM_PLACE) <- APPLICATION (<- STUDENT)
+# <- PAYMENT, CERTIFICATION. A partition sits one level below the deepest
+# purged partition it references.
+#
+# 1. Discovery, top-down: the partitions of each level are queried at the same
+#    time (paginated, keys and reference attributes only). An item is purged
+#    when one of its references points to a purged item. Purged sortKeys are
+#    kept as 8-byte hashes (key_set.py).
+# 2. Deletion, leaves first: the partitions of each level are queried again
+#    (keys only) and the purged keys stream through a bounded queue to
+#    parallel, retrying delete writers. An interrupted purge therefore never
+#    leaves children without parents; running it again finishes the job.
+#
+# Purged parents are removed from the local parent index as they are deleted.
+# ---------------------------------------------
+
+# --- Configuration ---
+# Table name and AWS profile are set in seed_config.py
+DEFAULT_PARTITION = "EXAM_HOLD" # Partition purged when none is given (what schedules-remove.py deleted)
+TARGET_WCU = 100 # Write capacity the delete writers pace themselves towards
+DELETE_WORKERS = 4 # Concurrent delete writer threads
+MAX_PENDING_KEYS = 5000 # Keys buffered between the queries and the delete writers
+# ---------------------
+
+dynamodb_client = get_dynamodb_client()
+
+EVERY_ITEM = None  # Purged-set value of a partition that is deleted as a whole
+
+
+def cascade_levels(root):
+    """
+    Returns (levels, links) for a purge of `root`: levels lists the reached partitions
+    top-down ([[root], [children], ...]), links maps each dependent partition to its
+    (reference path, parent) pairs that point into the purge.
+    """
+    get_schema(root)
+    depth = {root: 0}
+    links = {root: []}
+    for partition_key, schema in SCHEMAS.items():  # The registry lists parents before their children
+        purged_parents = [(path, parent) for path, parent in schema["references"].items() if parent in depth]
+        if partition_key != root and purged_parents:
+            depth[partition_key] = 1 + max(depth[parent] for _, parent in purged_parents)
+            links[partition_key] = purged_parents
+    levels = [[] for _ in range(max(depth.values()) + 1)]
+    for partition_key, level in depth.items():
+        levels[level].append(partition_key)
+    return levels, links
+
+
+def query_partition(partition_key, attributes=()):
+    """Yields the items of a partition, page by page, with only the key and `attributes`."""
+    names = KEY_ATTRIBUTES + list(attributes)
+    paginator = dynamodb_client.get_paginator("query")
+    for page in paginator.paginate(TableName=TABLE_NAME, KeyConditionExpression="partitionKey = :pk",
+                                   ExpressionAttributeValues={":pk": {"S": partition_key}},
+                                   ProjectionExpression=", ".join(f"#a{i}" for i in range(len(names))),
+                                   ExpressionAttributeNames={f"#a{i}": name for i, name in enumerate(names)}):
+        yield from page.get("Items", [])
+
+
+def references_purged(item, links, purged):
+    """True if one of the item's references (links) points to a purged item."""
+    for path, parent in links:
+        for parent_key in reference_values(item, path):
+            if purged[parent] is EVERY_ITEM or key_hash(parent_key) in purged[parent]:
+                return True
+    return False
+
+
+def find_dependents(partition_key, links, purged):
+    """Returns the KeySet of a partition's items that reference purged items."""
+    attributes = sorted({path.partition(".")[0] for path, _ in links})
+    dependents = KeySet()
+    for item in query_partition(partition_key, attributes):
+        if references_purged(item, links, purged):
+            dependents.add(item["sortKey"]["S"])
+    return dependents.freeze()
+
+
+def discover(root, sort_keys=None):
+    """
+    Finds everything a purge of `root` (or of its `sort_keys` only) deletes.
+
+    Returns:
+        tuple: (levels, {partition: KeySet or EVERY_ITEM}, {partition: item count}).
+    """
+    levels, links = cascade_levels(root)
+    purged = {root: KeySet(sort_keys).freeze() if sort_keys else EVERY_ITEM}
+    counts = {root: len(sort_keys) if sort_keys else sum(1 for _ in query_partition(root))}
+    with ThreadPoolExecutor(max_workers=max(len(level) for level in levels)) as pool:
+        for level in levels[1:]:
+            found = pool.map(lambda partition_key: find_dependents(partition_key, links[partition_key], purged), level)
+            for partition_key, keys in zip(level, found):
+                purged[partition_key] = keys
+                counts[partition_key] = len(keys)
+                print(f"  🔍 {partition_key:<14} {len(keys):>10,} item(s) via "
+                      f"{', '.join(path + ' -> ' + parent for path, parent in links[partition_key])}")
+    return levels, purged, counts
+
+
+def purged_keys(partition_key, purged, sort_keys=None):
+    """
+    Yields the primary keys of a partition's purged items and removes them from the parent index
+    as they go. The given `sort_keys` are used as they are, without querying the partition.
+    """
+    keys = purged[partition_key]
+    index = get_parent_index() if partition_key in INDEXED_ATTRIBUTES else None
+    if sort_keys is not None:
+        candidates = iter(sort_keys)
+    else:
+        candidates = (item["sortKey"]["S"] for item in query_partition(partition_key))
+    buffer = []
+    for sort_key in candidates:
+        if keys is not EVERY_ITEM and key_hash(sort_key) not in keys:
+            continue
+        yield {"partitionKey": {"S": partition_key}, "sortKey": {"S": sort_key}}
+        if index:
+            buffer.append(sort_key)
+            if len(buffer) >= RECORD_BUFFER_SIZE:
+                index.forget(partition_key, buffer)
+                buffer = []
+    if index:
+        index.forget(partition_key, buffer)
+
+
+def cascade_purge(root, levels, purged, sort_keys=None, target_wcu=TARGET_WCU, delete_workers=DELETE_WORKERS):
+    """
+    Deletes what discover() found, deepest level first. Within a level every partition
+    is read by its own thread and all of them feed the same pool of delete writers.
+    """
+    writer = AdaptiveBatchWriter(dynamodb_client, TABLE_NAME, target_wcu=target_wcu, action="Deleted")
+    for level in reversed(levels):
+        print(f"\n🗑️ Deleting {', '.join(level)}...")
+        sources = [purged_keys(partition_key, purged, sort_keys if partition_key == root else None)
+                   for partition_key in level]
+        run_pipeline(sources, writer.delete_batch, workers=delete_workers, max_pending=MAX_PENDING_KEYS)
+        for partition_key in level:
+            if purged[partition_key] is EVERY_ITEM and partition_key in INDEXED_ATTRIBUTES:
+                get_parent_index().clear(partition_key)
+    writer.print_summary()
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete a partition, or some of its items, and every item that depends on them.")
+    parser.add_argument("partition", nargs="?", choices=list(SCHEMAS), default=DEFAULT_PARTITION,
+                        help=f"Partition to purge (default: {DEFAULT_PARTITION})")
+    parser.add_argument("--sort-keys", nargs="+", metavar="SORT_KEY",
+                        help="Purge only these items of the partition (and their dependents)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    parser.add_argument("--target-wcu", type=float, default=TARGET_WCU, help="Write capacity to pace the deletes towards")
+    parser.add_argument("--workers", type=int, default=DELETE_WORKERS, help="Concurrent delete writer threads")
+    args = parser.parse_args()
+
+    root_sort_keys = list(dict.fromkeys(args.sort_keys)) if args.sort_keys else None
+    scope = f"{len(root_sort_keys)} '{args.partition}' item(s)" if root_sort_keys else f"every '{args.partition}' item"
+    print(f"🚀 Finding {scope} and their dependents in table '{TABLE_NAME}'...")
+    cascade, purged_sets, item_counts = discover(args.partition, root_sort_keys)
+    total = sum(item_counts.values())
+
+    print("\n📋 Deletion order (leaves first):")
+    for cascade_level in reversed(cascade):
+        for partition in cascade_level:
+            print(f"  {partition:<14} {item_counts[partition]:>10,}")
+
+    if total == 0:
+        print("\n✅ No records found. Nothing to do.")
+    elif args.dry_run:
+        print(f"\n🛑 Dry run: {total:,} records would be deleted.")
+    else:
+        confirm = input(f"\nAre you sure you want to permanently delete these {total:,} records? (type 'yes' to confirm): ")
+        if confirm.lower() == 'yes':
+            cascade_purge(args.partition, cascade, purged_sets, root_sort_keys, args.target_wcu, args.workers)
+            print("\n✅ All deletion attempts complete.")
+        else:
+            print("\n🛑 Operation cancelled by user. No records were deleted.")
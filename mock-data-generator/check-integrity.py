@@ -0,0 +1,191 @@
+import argparse
+import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from key_set import KeySet, key_hash
+from partition_schema import KEY_ATTRIBUTES, SCHEMAS, reference_values
+from seed_config import TABLE_NAME, get_dynamodb_client
+
+# --- Referential integrity checker ---
+# Reports child items whose references point to items that no longer exist,
+# for example PAYMENTs left behind by a partial or interrupted delete. The
+# references checked are the ones declared in partition_schema.py (studentId
+# -> STUDENT, examHoldId -> EXAM_HOLD, examHoldPlace.placeId -> EXAM_PLACE, ...).
+#
+# One parallel segmented Scan reads only the keys and the reference
+# attributes. Every segment thread collects, per partition, the 64-bit hashes
+# of the sortKeys it saw (a key_set.KeySet) and, per reference, (child hash,
+# parent hash) pairs, all in flat arrays of 8-byte integers. Memory therefore
+# grows with the number of keys, not with item size. Once the scan is done, the key sets are
+# sorted and every reference is looked up by binary search.
+#
+# Hashing can only hide a dangling link on a 64-bit collision. Orphans are
+# only counted; the hashes of a few sample orphans per reference are kept, and
+# the child partition is queried again (keys only) to turn them back into
+# sortKeys.
+# ---------------------------------------------
+
+TOTAL_SEGMENTS = 8 # Parallel scan segments (one scanning thread each)
+SAMPLE_ORPHANS = 5 # Orphaned child sortKeys printed per reference
+
+dynamodb_client = get_dynamodb_client()
+
+# (reference path, parent partition) pairs per child partition
+REFERENCES = {partition_key: list(schema["references"].items()) for partition_key, schema in SCHEMAS.items()}
+
+
+def scan_projection():
+    """ProjectionExpression and names reading the key and every top-level reference attribute."""
+    names = KEY_ATTRIBUTES + sorted({path.partition(".")[0] for references in REFERENCES.values()
+                                     for path, _ in references})
+    return (", ".join(f"#a{i}" for i in range(len(names))),
+            {f"#a{i}": name for i, name in enumerate(names)})
+
+
+class ScanTally:
+    """Key sets and reference pairs collected from the scanned items."""
+
+    def __init__(self):
+        self.items = 0
+        self.keys = {}  # partition key -> KeySet
+        self.references = {}  # (child partition, path) -> (child hashes, parent hashes)
+
+    def add(self, item):
+        partition_key = item["partitionKey"]["S"]
+        child = key_hash(item["sortKey"]["S"])
+        self.items += 1
+        self.keys.setdefault(partition_key, KeySet()).hashes.append(child)
+        for path, _ in REFERENCES.get(partition_key, []):
+            for parent_key in reference_values(item, path):
+                children, parents = self.references.setdefault((partition_key, path), (array("Q"), array("Q")))
+                children.append(child)
+                parents.append(key_hash(parent_key))
+
+    def merge(self, other):
+        self.items += other.items
+        for partition_key, keys in other.keys.items():
+            self.keys.setdefault(partition_key, KeySet()).hashes.extend(keys.hashes)
+        for reference, (children, parents) in other.references.items():
+            merged = self.references.setdefault(reference, (array("Q"), array("Q")))
+            merged[0].extend(children)
+            merged[1].extend(parents)
+
+    def bytes_used(self):
+        arrays = [keys.hashes for keys in self.keys.values()] + [a for pair in self.references.values() for a in pair]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+def scan_segment(segment, total_segments):
+    """Scans one segment (keys and reference attributes only) into its own ScanTally."""
+    projection, names = scan_projection()
+    tally = ScanTally()
+    paginator = dynamodb_client.get_paginator("scan")
+    for page in paginator.paginate(TableName=TABLE_NAME, ProjectionExpression=projection,
+                                   ExpressionAttributeNames=names, Segment=segment, TotalSegments=total_segments):
+        for item in page.get("Items", []):
+            tally.add(item)
+    return tally
+
+
+def check_integrity(total_segments=TOTAL_SEGMENTS, samples=SAMPLE_ORPHANS):
+    """
+    Scans the table and checks every declared reference against the keys that exist.
+
+    Returns:
+        tuple: (ScanTally, {(child partition, path): {"parent", "links", "dangling",
+            "missing_parents", "orphans" (count), "sample_orphans" (up to `samples` child sortKey hashes)}}).
+    """
+    tally = ScanTally()
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        for segment_tally in pool.map(lambda segment: scan_segment(segment, total_segments), range(total_segments)):
+            tally.merge(segment_tally)
+    for keys in tally.keys.values():
+        keys.freeze()
+
+    results = {}
+    for (partition_key, path), (children, parents) in tally.references.items():
+        parent_partition = dict(REFERENCES[partition_key])[path]
+        existing = tally.keys.get(parent_partition, KeySet())
+        orphans = 0
+        sample_orphans = set()
+        last_orphan = None
+        missing = KeySet()
+        dangling = 0
+        for child, parent in zip(children, parents):
+            if parent not in existing:
+                dangling += 1
+                missing.hashes.append(parent)
+                # An item's references were appended together, so its dangling links are adjacent
+                if child != last_orphan:
+                    orphans += 1
+                    last_orphan = child
+                    if len(sample_orphans) < samples:
+                        sample_orphans.add(child)
+        results[(partition_key, path)] = {"parent": parent_partition, "links": len(parents), "dangling": dangling,
+                                          "missing_parents": missing.freeze().distinct(), "orphans": orphans,
+                                          "sample_orphans": sample_orphans}
+    return tally, dict(sorted(results.items(), key=lambda entry: registry_order(entry[0][0])))
+
+
+def registry_order(partition_key):
+    """Sort key listing partitions in partition_schema.py order, unknown ones last."""
+    order = list(SCHEMAS)
+    return order.index(partition_key) if partition_key in order else len(order)
+
+
+def sample_sort_keys(partition_key, hashes, limit=SAMPLE_ORPHANS):
+    """Queries a partition's keys until `limit` sortKeys whose hash is in `hashes` are found."""
+    found = []
+    paginator = dynamodb_client.get_paginator("query")
+    for page in paginator.paginate(TableName=TABLE_NAME, KeyConditionExpression="partitionKey = :pk",
+                                   ExpressionAttributeValues={":pk": {"S": partition_key}},
+                                   ProjectionExpression="sortKey"):
+        for item in page.get("Items", []):
+            if key_hash(item["sortKey"]["S"]) in hashes:
+                found.append(item["sortKey"]["S"])
+                if len(found) >= limit:
+                    return found
+    return found
+
+
+def print_report(tally, results, samples=SAMPLE_ORPHANS):
+    print(f"\n📊 Scanned {tally.items:,} items in {len(tally.keys)} partitions "
+          f"({tally.bytes_used() / 2**20:.1f} MB of key hashes)")
+    for partition_key, keys in sorted(tally.keys.items(), key=lambda entry: registry_order(entry[0])):
+        print(f"  {partition_key:<14} {len(keys):>12,} keys")
+
+    width = max([20] + [len(f"{child}.{path}") for child, path in results])
+    print(f"\n  {'reference':<{width}}    {'parent':<14} {'links':>12} {'dangling':>10} {'orphans':>10}")
+    for (child, path), result in results.items():
+        print(f"  {child + '.' + path:<{width}} -> {result['parent']:<14} {result['links']:>12,} "
+              f"{result['dangling']:>10,} {result['orphans']:>10,}")
+
+    orphaned = {}
+    for (child, path), result in results.items():
+        orphaned[child] = orphaned.get(child, 0) + result["orphans"]
+        if result["sample_orphans"] and samples:
+            examples = sample_sort_keys(child, result["sample_orphans"], samples)
+            print(f"  ⚠️ {child}.{path} points to {result['missing_parents']:,} missing {result['parent']} item(s); "
+                  f"orphans include {', '.join(examples)}")
+    for child, orphans in orphaned.items():
+        if orphans:
+            # Only counts are kept, so an item with several dangling references is counted for each
+            print(f"❌ {orphans:,} {child} item(s) reference missing parents (counted per reference)")
+    if not any(orphaned.values()):
+        print("\n✅ Every reference points to an existing item.")
+    return sum(orphaned.values())
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find child items whose references point to missing parents.")
+    parser.add_argument("--segments", type=int, default=TOTAL_SEGMENTS, help="Parallel scan segments")
+    parser.add_argument("--samples", type=int, default=SAMPLE_ORPHANS,
+                        help="Orphaned sortKeys to print per reference (0 skips the extra queries)")
+    args = parser.parse_args()
+
+    print(f"🔍 Scanning '{TABLE_NAME}' with {args.segments} segments (keys and references only)...")
+    scan_tally, reference_results = check_integrity(args.segments, args.samples)
+    orphan_count = print_report(scan_tally, reference_results, args.samples)
+    sys.exit(1 if orphan_count else 0)
@@ -0,0 +1,87 @@
+import argparse
+import importlib
+import time
+import uuid
+
+from bulk_writer import AdaptiveBatchWriter, DEFAULT_TARGET_WCU
+from write_backends import BACKENDS
+
+# --- Write backend throughput comparison ---
+# Writes the same generated dataset through every write backend and reports
+# items/s, client CPU per item and error rates, so each partition can use
+# whichever path is actually fastest. Each backend gets fresh sortKeys (PartiQL
+# INSERT would otherwise fail on the keys the previous backend wrote), and the
+# items are deleted again afterwards unless --keep is given.
+# ---------------------------------------------
+
+# The student stage provides the dataset, the table name and the client
+students_seed = importlib.import_module("1-students-seed")
+TABLE_NAME = students_seed.TABLE_NAME
+dynamodb_client = students_seed.dynamodb_client
+
+
+def with_fresh_sort_key(item):
+    """Returns a copy of a low-level item with a new sortKey."""
+    copy = dict(item)
+    copy["sortKey"] = {"S": str(uuid.uuid4())}
+    return copy
+
+
+def compare_backends(items, backend_names, target_wcu=DEFAULT_TARGET_WCU, clean_up=True):
+    """
+    Writes `items` through each backend in `backend_names` and returns one result dict per backend.
+    """
+    results = []
+    for name in backend_names:
+        dataset = [with_fresh_sort_key(item) for item in items]
+        writer = AdaptiveBatchWriter(dynamodb_client, TABLE_NAME, target_wcu=target_wcu, backend=name, verbose=False)
+
+        print(f"⏱️ Writing {len(dataset)} items with the '{name}' backend...")
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        writer.put_items(dataset)
+        wall_seconds = time.perf_counter() - wall_started
+        cpu_seconds = time.process_time() - cpu_started
+
+        results.append({
+            "backend": name,
+            "items": len(dataset),
+            "succeeded": writer.succeeded,
+            "failed": writer.failed,
+            "retries": writer.retries,
+            "throttles": writer.throttles,
+            "items_per_second": writer.succeeded / wall_seconds if wall_seconds > 0 else 0.0,
+            "cpu_ms_per_item": cpu_seconds * 1000 / len(dataset) if dataset else 0.0,
+            "error_rate": writer.failed / len(dataset) if dataset else 0.0,
+            "consumed_wcu": writer.consumed_wcu,
+        })
+
+        if clean_up:
+            cleaner = AdaptiveBatchWriter(dynamodb_client, TABLE_NAME, target_wcu=target_wcu, verbose=False)
+            cleaner.delete_keys({"partitionKey": item["partitionKey"], "sortKey": item["sortKey"]} for item in dataset)
+
+    return results
+
+
+def print_results(results):
+    print(f"\n{'backend':<12} {'items/s':>10} {'cpu ms/item':>12} {'errors':>8} {'retries':>8} {'WCU':>10}")
+    for result in sorted(results, key=lambda r: r["items_per_second"], reverse=True):
+        print(f"{result['backend']:<12} {result['items_per_second']:>10.1f} {result['cpu_ms_per_item']:>12.3f} "
+              f"{result['error_rate']:>7.1%} {result['retries']:>8} {result['consumed_wcu']:>10.1f}")
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare write backends on the same student dataset.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of student items to write per backend")
+    parser.add_argument("--target-wcu", type=int, default=DEFAULT_TARGET_WCU, help="Write capacity to pace towards")
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument("--seed", type=int, default=0, help="Master seed for the generated dataset")
+    parser.add_argument("--keep", action="store_true", help="Keep the written items instead of deleting them")
+    args = parser.parse_args()
+
+    print(f"🚀 Generating {args.count} student items (seed {args.seed})...")
+    dataset = students_seed.generate_item_chunk(args.seed, args.count)
+
+    results = compare_backends(dataset, args.backends, target_wcu=args.target_wcu, clean_up=not args.keep)
+    print_results(results)
@@ -0,0 +1,121 @@
+import argparse
+import re
+import time
+
+# --- Dataset lifetime stamps ---
+# The table has TTL enabled on the `ttl` attribute (serverless.yml), so items
+# carrying an expiry are deleted by DynamoDB for free, without a Scan and
+# without consuming write capacity. Every seed script accepts:
+#
+#   --lifetime 12h   stamp `ttl` (epoch seconds) = now + lifetime on every item
+#   --run-id NAME    stamp `seedRunId` = NAME (default: the start time)
+#
+# Either flag turns stamping on; both attributes are then written. Stamping
+# happens in bulk_writer.create_writer, after generation, so snapshots stay
+# reusable across runs and journaled batches (run_journal.py) are unaffected.
+# seed-all.py records the stamp of a run, so --resume writes the same values.
+#
+# DynamoDB deletes expired items in the background, usually within a few days
+# of expiry; until then they still show up in reads. Run report-seed-runs.py to
+# see how many items of each run are still live.
+# ---------------------------------------------
+
+TTL_ATTRIBUTE = "ttl"  # Must match TimeToLiveSpecification.AttributeName in serverless.yml
+RUN_ID_ATTRIBUTE = "seedRunId"
+LIFETIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}  # A lifetime without a unit is in hours
+
+
+def parse_lifetime(text):
+    """Converts a lifetime like '90m', '12h', '7d' or '6' (hours) to seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", text)
+    if not match:
+        raise ValueError(f"Invalid lifetime '{text}'. Use a number with an optional unit: s, m, h or d (e.g. 12h)")
+    return int(float(match.group(1)) * LIFETIME_UNITS[match.group(2) or "h"])
+
+
+def new_run_id():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+class DatasetStamp:
+    """The `seedRunId` and optional `ttl` written on every item of one seed run."""
+
+    def __init__(self, run_id, expires_at=None):
+        self.run_id = run_id
+        self.expires_at = int(expires_at) if expires_at is not None else None
+        self.attributes = {RUN_ID_ATTRIBUTE: {"S": run_id}}
+        if self.expires_at is not None:
+            self.attributes[TTL_ATTRIBUTE] = {"N": str(self.expires_at)}
+
+    @classmethod
+    def for_lifetime(cls, lifetime_seconds=None, run_id=None):
+        expires_at = time.time() + lifetime_seconds if lifetime_seconds is not None else None
+        return cls(run_id or new_run_id(), expires_at)
+
+    def apply(self, item):
+        """Returns a stamped copy of a low-level item; the item itself is shared (parents, journal) and not changed."""
+        return {**item, **self.attributes}
+
+    def writer(self, writer):
+        return StampedWriter(writer, self)
+
+    def to_settings(self):
+        return {"run_id": self.run_id, "expires_at": self.expires_at}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings["run_id"], settings["expires_at"])
+
+    def describe(self):
+        if self.expires_at is None:
+            return f"seedRunId '{self.run_id}', no expiry"
+        expiry = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.expires_at))
+        return f"seedRunId '{self.run_id}', expires {expiry}"
+
+
+class StampedWriter:
+    """Wraps a writer so every item it writes carries the stamp; otherwise behaves like the writer."""
+
+    def __init__(self, writer, stamp):
+        self.writer = writer
+        self.stamp = stamp
+
+    def write_batch(self, items):
+        return self.writer.write_batch([self.stamp.apply(item) for item in items])
+
+    def put_items(self, items, total=None):
+        return self.writer.put_items((self.stamp.apply(item) for item in items), total=total)
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+def stamp_from_argv():
+    """Reads optional `--lifetime` and `--run-id` flags; returns a DatasetStamp, or None when neither is given."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--lifetime", type=parse_lifetime, default=None)
+    parser.add_argument("--run-id", default=None)
+    args, _ = parser.parse_known_args()
+    if args.lifetime is None and args.run_id is None:
+        return None
+    return DatasetStamp.for_lifetime(args.lifetime, args.run_id)
+
+
+_UNSET = object()
+_dataset_stamp = _UNSET
+
+
+def get_dataset_stamp():
+    """Returns the stamp of this process's run (from the command line on first use), or None."""
+    global _dataset_stamp
+    if _dataset_stamp is _UNSET:
+        _dataset_stamp = stamp_from_argv()
+        if _dataset_stamp:
+            print(f"🏷️ Stamping every item with {_dataset_stamp.describe()}")
+    return _dataset_stamp
+
+
+def set_dataset_stamp(stamp):
+    """Makes get_dataset_stamp() return `stamp` (a DatasetStamp or None) from now on, e.g. a resumed run's."""
+    global _dataset_stamp
+    _dataset_stamp = stamp
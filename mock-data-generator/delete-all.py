@@ -1,16 +1,45 @@
-import boto3
 import time
+from bulk_writer import AdaptiveBatchWriter
+from pipeline import run_pipeline
+from parent_index import INDEXED_ATTRIBUTES, get_parent_index
+from seed_config import TABLE_NAME, get_dynamodb_client
 
 # --- Configuration ---
-TABLE_NAME = "fossy_stg"
+# Table name and AWS profile are set in seed_config.py
 USERNAMES_TO_KEEP = ["carlos", "carlos-admin"]
-# If you configured a specific AWS profile in your aws cli, add it here.
-# Otherwise, boto3 will use your default credentials.
-AWS_PROFILE_NAME = "asdf" # IMPORTANT: Replace with your AWS profile name
-session = boto3.Session(profile_name=AWS_PROFILE_NAME)
-dynamodb_client = session.client('dynamodb', region_name='ap-northeast-1')
+dynamodb_client = get_dynamodb_client()
+TARGET_WCU = 100 # Write capacity the delete writers pace themselves towards
+TOTAL_SEGMENTS = 8 # Parallel scan segments (one scanning thread each)
+DELETE_WORKERS = 4 # Concurrent delete writer threads
+MAX_PENDING_KEYS = 5000 # Keys buffered between scanners and delete writers
 # --------------------
 
+def build_scan_filter():
+    """Builds the FilterExpression and values that exclude USERNAMES_TO_KEEP."""
+    filter_expression = "NOT ({})".format(
+        ' OR '.join([f'username = :u{i}' for i in range(len(USERNAMES_TO_KEEP))])
+    )
+    expression_attribute_values = {
+        f':u{i}': {'S': username} for i, username in enumerate(USERNAMES_TO_KEEP)
+    }
+    return filter_expression, expression_attribute_values
+
+def forget_deleted(keys):
+    """Removes deleted primary keys from the local parent index, so dependent stages stop linking to them."""
+    sort_keys_by_partition = {}
+    for key in keys:
+        sort_keys_by_partition.setdefault(key['partitionKey']['S'], []).append(key['sortKey']['S'])
+    index = get_parent_index()
+    for partition_key, sort_keys in sort_keys_by_partition.items():
+        if partition_key in INDEXED_ATTRIBUTES:
+            index.forget(partition_key, sort_keys)
+
+def delete_and_forget_batch(writer, keys):
+    """Deletes one batch of keys and removes them from the parent index."""
+    deleted = writer.delete_batch(keys)
+    forget_deleted(keys)
+    return deleted
+
 def delete_unwanted_items(limit=None):
     """
     Scans a DynamoDB table and deletes items except for those with usernames
@@ -26,12 +55,7 @@ def delete_unwanted_items(limit=None):
     
     paginator = dynamodb_client.get_paginator('scan')
     
-    filter_expression = "NOT ({})".format(
-        ' OR '.join([f'username = :u{i}' for i in range(len(USERNAMES_TO_KEEP))])
-    )
-    expression_attribute_values = {
-        f':u{i}': {'S': username} for i, username in enumerate(USERNAMES_TO_KEEP)
-    }
+    filter_expression, expression_attribute_values = build_scan_filter()
 
     print(f"Scanning table '{TABLE_NAME}' to find items to delete...")
     
@@ -79,30 +103,62 @@ def delete_unwanted_items(limit=None):
     total_to_delete = len(items_to_delete)
     print(f"Preparing to delete {total_to_delete} items. Starting batch deletion...")
 
-    batch_size = 25
-    total_deleted_count = 0 
+    writer = AdaptiveBatchWriter(dynamodb_client, TABLE_NAME, target_wcu=TARGET_WCU, action="Deleted")
+    writer.delete_keys((request['DeleteRequest']['Key'] for request in items_to_delete), total=total_to_delete)
+    writer.print_summary()
+    forget_deleted(request['DeleteRequest']['Key'] for request in items_to_delete)
 
-    for i in range(0, total_to_delete, batch_size):
-        batch = items_to_delete[i:i + batch_size]
-        try:
-            response = dynamodb_client.batch_write_item(
-                RequestItems={
-                    TABLE_NAME: batch
-                }
-            )
-            
-            total_deleted_count += len(batch) 
-            print(f"  Successfully deleted batch of {len(batch)} items. (Total: {total_deleted_count}/{total_to_delete})")
-            
-            if 'UnprocessedItems' in response and response['UnprocessedItems']:
-                print(f"  WARNING: Could not process {len(response['UnprocessedItems'])} items. You may need to run the script again.")
+    print("\nDeletion process complete.")
 
-        except Exception as e:
-            print(f"Error deleting batch: {e}")
-            
+def scan_segment_keys(segment, total_segments):
+    """Yields the primary keys of one Scan segment, page by page, without buffering the segment."""
+    filter_expression, expression_attribute_values = build_scan_filter()
+    paginator = dynamodb_client.get_paginator('scan')
+    page_iterator = paginator.paginate(
+        TableName=TABLE_NAME,
+        ProjectionExpression="partitionKey, sortKey",
+        FilterExpression=filter_expression,
+        ExpressionAttributeValues=expression_attribute_values,
+        Segment=segment,
+        TotalSegments=total_segments
+    )
+    for page in page_iterator:
+        for item in page.get('Items', []):
+            yield {'partitionKey': item['partitionKey'], 'sortKey': item['sortKey']}
+
+def delete_unwanted_items_parallel(limit=None, total_segments=TOTAL_SEGMENTS, delete_workers=DELETE_WORKERS):
+    """
+    Same selection as delete_unwanted_items, but scans the table with
+    Segment/TotalSegments across a pool of threads and streams the keys straight
+    into concurrent, retrying delete writers through a bounded queue.
+    Memory stays constant regardless of how many items are deleted.
+
+    Args:
+        limit (int, optional): The maximum number of items to delete.
+                               If None, all found items will be deleted. Defaults to None.
+        total_segments (int): Number of parallel scan segments.
+        delete_workers (int): Number of concurrent delete writer threads.
+    """
+    print(f"Scanning table '{TABLE_NAME}' with {total_segments} segments and deleting with {delete_workers} writers...")
+
+    writer = AdaptiveBatchWriter(dynamodb_client, TABLE_NAME, target_wcu=TARGET_WCU, action="Deleted")
+    sources = [scan_segment_keys(segment, total_segments) for segment in range(total_segments)]
+    queued = run_pipeline(
+        sources,
+        lambda keys: delete_and_forget_batch(writer, keys),
+        workers=delete_workers,
+        max_pending=MAX_PENDING_KEYS,
+        limit=limit
+    )
+
+    if not queued:
+        print("No items found to delete. All relevant items are in the keep list.")
+        return
+
+    writer.print_summary()
     print("\nDeletion process complete.")
 
-# --- Main execution (No changes needed here) ---
+# --- Main execution ---
 if __name__ == "__main__":
     confirm = input(f"This will delete items from '{TABLE_NAME}' except where username is in {USERNAMES_TO_KEEP}.\nHave you backed up your table? (yes/no): ")
     
@@ -129,4 +185,8 @@ if __name__ == "__main__":
             else:
                 print("Invalid choice. Please enter 'all' or 'amount'.")
         
-        delete_unwanted_items(limit=deletion_limit)
\ No newline at end of file
+        parallel = input(f"Use a parallel segmented scan ({TOTAL_SEGMENTS} segments, {DELETE_WORKERS} delete writers)? (yes/no): ").lower()
+        if parallel == 'yes':
+            delete_unwanted_items_parallel(limit=deletion_limit)
+        else:
+            delete_unwanted_items(limit=deletion_limit)
@@ -0,0 +1,153 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+
+# --- Offline bulk export ---
+# For fresh tables, DynamoDB's import-from-S3 is far cheaper and faster than
+# paying WCU for every item. ExportWriter has the same interface as
+# AdaptiveBatchWriter (put_items / write_batch / close / print_summary) but
+# writes each low-level item as one line of DynamoDB JSON ({"Item": {...}})
+# into gzipped shard files on local disk instead of calling the API.
+#
+# Several shards are open at once so writer threads do not contend, and each
+# batch goes to the shard with the fewest bytes so far, which keeps the files
+# size-balanced. A shard that reaches MAX_SHARD_BYTES is closed and replaced
+# by a new part file. Upload the stage directory to S3 and import it with
+# input format DYNAMODB_JSON and GZIP compression.
+# ---------------------------------------------
+
+DEFAULT_SHARD_COUNT = 4  # Shard files open at the same time
+MAX_SHARD_BYTES = 256 * 1024 * 1024  # Uncompressed bytes before a shard rolls over
+COMPRESS_LEVEL = 1  # Fastest gzip level; import files are transient
+
+
+class _Shard:
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL)
+        self.bytes = 0
+        self.items = 0
+        self.lock = threading.Lock()
+
+
+class ExportWriter:
+    """Writes low-level items to sharded, gzipped DynamoDB JSON files. Safe to share between threads."""
+
+    def __init__(self, export_dir, stage, shard_count=DEFAULT_SHARD_COUNT, max_shard_bytes=MAX_SHARD_BYTES,
+                 verbose=True, total=None):
+        self.stage_dir = os.path.join(export_dir, stage)
+        os.makedirs(self.stage_dir, exist_ok=True)
+        self.max_shard_bytes = max_shard_bytes
+        self.verbose = verbose
+        self.total = total
+
+        self.lock = threading.Lock()
+        self.next_part = 0
+        self.closed_shards = []
+        self.shards = [self._open_shard() for _ in range(shard_count)]
+
+        self.succeeded = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    # --- Public entry points (mirroring AdaptiveBatchWriter) ---
+
+    def put_items(self, items, total=None):
+        """Streams low-level items into the shard files in batches."""
+        written = 0
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == 1000:
+                written += self.write_batch(batch)
+                batch = []
+        if batch:
+            written += self.write_batch(batch)
+        return written
+
+    def write_batch(self, items):
+        """Appends a batch of low-level items to the currently smallest shard."""
+        lines = "".join(json.dumps({"Item": item}, ensure_ascii=False, separators=(",", ":")) + "\n" for item in items)
+        size = len(lines.encode("utf-8"))
+
+        with self.lock:
+            shard = min(self.shards, key=lambda s: s.bytes)
+            shard.bytes += size  # Reserve the space so other threads pick a different shard
+            # Taken before releasing self.lock so a roll-over cannot close the shard first
+            shard.lock.acquire()
+        try:
+            shard.file.write(lines)
+            shard.items += len(items)
+        finally:
+            shard.lock.release()
+        if shard.bytes >= self.max_shard_bytes:
+            self._roll_over(shard)
+
+        with self.lock:
+            self.succeeded += len(items)
+            self.bytes_written += size
+        self._report_progress()
+        return len(items)
+
+    def items_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.succeeded / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        """Closes every open shard and drops empty ones."""
+        with self.lock:
+            shards, self.shards = self.shards, []
+        for shard in shards:
+            self._close_shard(shard)
+
+    def print_summary(self):
+        elapsed = time.monotonic() - self.started
+        files = len(self.closed_shards)
+        print(f"📦 Exported {self.succeeded} items to {files} file(s) in '{self.stage_dir}' "
+              f"({self.bytes_written / 1024 / 1024:.1f} MB uncompressed) in {elapsed:.1f}s "
+              f"({self.items_per_second():.1f} items/s).")
+
+    # --- Shard management ---
+
+    def _open_shard(self):
+        path = os.path.join(self.stage_dir, f"part-{self.next_part:05d}.json.gz")
+        self.next_part += 1
+        return _Shard(path)
+
+    def _roll_over(self, shard):
+        with self.lock:
+            if shard not in self.shards:
+                return
+            self.shards[self.shards.index(shard)] = self._open_shard()
+        self._close_shard(shard)
+
+    def _close_shard(self, shard):
+        with shard.lock:
+            shard.file.close()
+        if shard.items:
+            self.closed_shards.append(shard.path)
+        else:
+            os.remove(shard.path)
+
+    def _report_progress(self):
+        if not self.verbose:
+            return
+        now = time.monotonic()
+        if now - self.last_report < 2:
+            return
+        self.last_report = now
+        total_text = f"/{self.total}" if self.total else ""
+        print(f"Exported {self.succeeded}{total_text} items ({self.items_per_second():.1f} items/s)")
+
+
+def export_dir_from_argv():
+    """Reads an optional `--export-dir DIR` flag; when set, stages write import files instead of calling the API."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--export-dir", default=None)
+    args, _ = parser.parse_known_args()
+    return args.export_dir
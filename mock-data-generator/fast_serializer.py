@@ -0,0 +1,114 @@
+from boto3.dynamodb.types import TypeSerializer
+
+from partition_schema import check_attribute
+
+# --- Schema-specialized item encoder ---
+# Stages 4-8 used to run TypeSerializer().serialize on every attribute of
+# every item. Its generic dispatch (a chain of isinstance checks, Decimal
+# contexts for numbers) dominates the CPU of wide items such as EXAM_HOLD.
+#
+# An ItemEncoder is created once per partition and emits the low-level
+# {"S": ...} / {"L": ...} structures directly:
+#
+# - Each attribute gets an encoder picked for its type the first time it is
+#   seen, so an item costs one dict lookup and one call per attribute.
+# - Attributes listed in `shared` hold values that many items share by
+#   reference: constant lists like `cautions`, or blocks inherited from a
+#   parent exam like `score`. Each distinct value is encoded once and the
+#   encoded structure is reused (encoded items must not be mutated).
+# - `stringify` and `keep` reproduce the stages' own conventions: values
+#   other than lists and numbers stored as strings, empty values dropped.
+# - With a partition key, each attribute is checked against the schema
+#   registry (partition_schema.py) when its encoder is picked, so validation
+#   costs nothing per item.
+#
+# The output is identical to TypeSerializer's; types without a fast path
+# (Decimal, sets, binary) are still handed to it. Compare the two with
+# python3 benchmark-serialization.py.
+# ---------------------------------------------
+
+MAX_SHARED_VALUES = 4096  # Distinct values remembered per shared attribute
+
+_type_serializer = TypeSerializer()
+_SKIP = object()  # Marks attribute values `keep` drops
+# Low-level type each Python type encodes as, for the schema check (None is not checked)
+_ATTRIBUTE_TYPES = {str: "S", bool: "BOOL", int: "N", list: "L", tuple: "L", dict: "M"}
+
+
+def encode_value(value):
+    """Encodes a Python value as a low-level DynamoDB attribute value, like TypeSerializer.serialize."""
+    encoder = _ENCODERS.get(type(value))
+    return encoder(value) if encoder else _type_serializer.serialize(value)
+
+
+_ENCODERS = {
+    str: lambda value: {"S": value},
+    bool: lambda value: {"BOOL": value},
+    int: lambda value: {"N": str(value)},
+    type(None): lambda value: {"NULL": True},
+    list: lambda value: {"L": [encode_value(element) for element in value]},
+    tuple: lambda value: {"L": [encode_value(element) for element in value]},
+    dict: lambda value: {"M": {key: encode_value(element) for key, element in value.items()}},
+}
+
+
+def not_empty_string(value):
+    """Default `keep` rule of the stages: every value except ''."""
+    return value != ''
+
+
+class ItemEncoder:
+    """
+    Encodes records of one partition into low-level DynamoDB items.
+
+    Args:
+        partition_key (str, optional): Validate attributes against this partition's schema.
+        shared (iterable): Attributes whose values are shared between records; encoded once per value.
+        stringify (bool): Store values other than lists and ints/bools as their str().
+        keep (callable): keep(value) -> bool, applied after stringify; False drops the attribute.
+    """
+
+    def __init__(self, partition_key=None, shared=(), stringify=False, keep=not_empty_string):
+        self.partition_key = partition_key
+        self.shared = set(shared)
+        self.stringify = stringify
+        self.keep = keep
+        self.fields = {}  # attribute name -> (value type, encoder for that type)
+
+    def encode(self, record):
+        """Returns the low-level item for a plain record. The record is not modified."""
+        item = {}
+        fields = self.fields
+        for name, value in record.items():
+            field = fields.get(name)
+            if field is None or field[0] is not type(value):
+                field = fields[name] = (type(value), self._compile(name, type(value)))
+            encoded = field[1](value)
+            if encoded is not _SKIP:
+                item[name] = encoded
+        return item
+
+    def _compile(self, name, kind):
+        convert = self.stringify and not issubclass(kind, (list, int))
+        if self.partition_key and (convert or kind in _ATTRIBUTE_TYPES):
+            check_attribute(self.partition_key, name, "S" if convert else _ATTRIBUTE_TYPES[kind])
+        encode = _ENCODERS[str] if convert else _ENCODERS.get(kind, _type_serializer.serialize)
+        keep = self.keep
+
+        def encode_field(value):
+            if convert:
+                value = str(value)
+            return encode(value) if keep(value) else _SKIP
+
+        if name not in self.shared:
+            return encode_field
+        memo = {}  # id(value) -> (value, encoded); holding the value keeps its id from being reused
+
+        def encode_shared(value):
+            hit = memo.get(id(value))
+            if hit is None:
+                if len(memo) >= MAX_SHARED_VALUES:
+                    return encode_field(value)
+                hit = memo[id(value)] = (value, encode_field(value))
+            return hit[1]
+        return encode_shared
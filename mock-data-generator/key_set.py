@@ -0,0 +1,52 @@
+import bisect
+import hashlib
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up freeze()
+    np = None
+
+# --- Compact sortKey sets ---
+# Tools that walk whole partitions (check-integrity.py, cascade-purge.py) need
+# to remember which sortKeys they saw without holding millions of strings.
+# A KeySet stores 64-bit hashes of the sortKeys in a flat array of 8-byte
+# integers, sorted once it is filled, and answers membership by binary search.
+# A lookup can only be wrong on a 64-bit hash collision. With numpy installed
+# the array is sorted in place; without it, sorting briefly needs a list of
+# Python ints (about 40 bytes per key).
+# ---------------------------------------------
+
+
+def key_hash(sort_key):
+    """64-bit hash of a sortKey; key sets store these instead of the strings."""
+    return int.from_bytes(hashlib.blake2b(sort_key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class KeySet:
+    """Compact set of sortKey hashes (8 bytes each). Call freeze() once filled, before lookups."""
+
+    def __init__(self, sort_keys=()):
+        self.hashes = array("Q", (key_hash(sort_key) for sort_key in sort_keys))
+
+    def add(self, sort_key):
+        self.hashes.append(key_hash(sort_key))
+
+    def freeze(self):
+        if np is not None:
+            np.frombuffer(self.hashes, dtype=np.uint64).sort()  # A view of the array, so no copy
+        else:
+            self.hashes = array("Q", sorted(self.hashes))
+        return self
+
+    def distinct(self):
+        """Number of different hashes; the set must be frozen."""
+        return sum(1 for position, hashed in enumerate(self.hashes)
+                   if position == 0 or hashed != self.hashes[position - 1])
+
+    def __contains__(self, hashed):
+        position = bisect.bisect_left(self.hashes, hashed)
+        return position < len(self.hashes) and self.hashes[position] == hashed
+
+    def __len__(self):
+        return len(self.hashes)
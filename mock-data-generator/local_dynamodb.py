@@ -0,0 +1,230 @@
+import asyncio
+import math
+import re
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# --- In-process DynamoDB stand-in ---
+# A small thread-safe fake of the DynamoDB client calls the seed scripts make
+# (BatchWriteItem, BatchExecuteStatement INSERTs, PutItem and partition-key
+# Query/Scan pagination). It reports ConsumedCapacity the way DynamoDB does
+# (1 WCU per started KB of item) and can add a fixed latency per call. That
+# is enough to measure the client side of seeding without an AWS table:
+#
+#   from seed_config import set_dynamodb_client
+#   set_dynamodb_client(InMemoryDynamoDB(latency=0.005))
+#
+# With store_items=False only counts are kept, so multi-million-item
+# benchmarks do not hold the dataset in memory (reads then return nothing).
+# async_client() returns an asyncio view for async_engine.py, which awaits
+# the latency instead of sleeping, so in-flight requests overlap.
+# ---------------------------------------------
+
+WRITE_UNIT_BYTES = 1024  # One WCU covers up to 1 KB of item
+QUERY_PAGE_ITEMS = 1000  # Items per Query/Scan page (stands in for the 1 MB page limit)
+
+_PARTIQL_ATTRIBUTE = re.compile(r"'((?:[^']|'')*)'\s*:\s*\?")
+
+
+def number_size(text):
+    """Billed size of a number: 1 byte per two significant digits, plus 1 byte."""
+    digits = text.lstrip("+-").lower().split("e")[0].replace(".", "").strip("0")
+    return (len(digits) + 1) // 2 + 1
+
+
+def attribute_value_size(value):
+    """
+    Stored size in bytes of a low-level attribute value, following DynamoDB's item size rules:
+    strings and binaries by their UTF-8 length, lists and maps 3 bytes plus 1 byte per element.
+    """
+    (kind, data), = value.items()
+    if kind in ("S", "B"):
+        return len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+    if kind == "N":
+        return number_size(data)
+    if kind in ("BOOL", "NULL"):
+        return 1
+    if kind == "L":
+        return 3 + sum(1 + attribute_value_size(element) for element in data)
+    if kind == "M":
+        return 3 + sum(1 + len(key.encode("utf-8")) + attribute_value_size(element) for key, element in data.items())
+    if kind == "NS":
+        return sum(number_size(element) for element in data)
+    if kind in ("SS", "BS"):
+        return sum(len(element.encode("utf-8")) if isinstance(element, str) else len(element) for element in data)
+    raise ValueError(f"Unknown attribute type '{kind}'")
+
+
+def item_size(item):
+    """Stored size in bytes of a low-level item (attribute names plus values)."""
+    return sum(len(name.encode("utf-8")) + attribute_value_size(value) for name, value in item.items())
+
+
+def write_units(item):
+    """Write capacity units one put of `item` consumes."""
+    return max(1, math.ceil(item_size(item) / WRITE_UNIT_BYTES))
+
+
+class _Paginator:
+    def __init__(self, method):
+        self.method = method
+
+    def paginate(self, **kwargs):
+        while True:
+            page = self.method(**kwargs)
+            yield page
+            if "LastEvaluatedKey" not in page:
+                return
+            kwargs = dict(kwargs, ExclusiveStartKey=page["LastEvaluatedKey"])
+
+
+class InMemoryDynamoDB:
+    """Thread-safe in-memory fake of the DynamoDB client methods used by the seed scripts."""
+
+    def __init__(self, latency=0.0, store_items=True):
+        self.latency = latency
+        self.store_items = store_items
+        self.lock = threading.Lock()
+        self.items = {}  # (partitionKey, sortKey) -> item
+        self.written = 0
+        self.calls = 0
+        self.local = threading.local()  # local.awaited is set while the asyncio view calls in
+
+    # --- Writes ---
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity=None, **kwargs):
+        consumed = []
+        for table_name, requests in RequestItems.items():
+            units = 0
+            for request in requests:
+                if "PutRequest" in request:
+                    units += self._put(request["PutRequest"]["Item"])
+                else:
+                    units += self._delete(request["DeleteRequest"]["Key"])
+            consumed.append({"TableName": table_name, "CapacityUnits": float(units)})
+        return self._respond({"UnprocessedItems": {}}, ReturnConsumedCapacity, consumed)
+
+    def batch_execute_statement(self, Statements, ReturnConsumedCapacity=None, **kwargs):
+        responses = []
+        units = 0
+        for statement in Statements:
+            text = statement["Statement"]
+            if not text.lstrip().upper().startswith("INSERT"):
+                raise ClientError({"Error": {"Code": "ValidationException",
+                                             "Message": "Only INSERT statements are supported"}}, "BatchExecuteStatement")
+            names = [name.replace("''", "'") for name in _PARTIQL_ATTRIBUTE.findall(text)]
+            item = dict(zip(names, statement.get("Parameters", [])))
+            if self.store_items and self._key(item) in self.items:
+                responses.append({"Error": {"Code": "DuplicateItem", "Message": "Duplicate primary key exists in table"}})
+                continue
+            units += self._put(item)
+            responses.append({})
+        return self._respond({"Responses": responses}, ReturnConsumedCapacity, [{"CapacityUnits": float(units)}])
+
+    def put_item(self, TableName, Item, ReturnConsumedCapacity=None, **kwargs):
+        units = self._put(Item)
+        return self._respond({}, ReturnConsumedCapacity, {"TableName": TableName, "CapacityUnits": float(units)})
+
+    # --- Reads ---
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues, ExclusiveStartKey=None,
+              Limit=None, Select=None, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        if KeyConditionExpression.replace(" ", "") != "partitionKey=:pk":
+            raise ClientError({"Error": {"Code": "ValidationException",
+                                         "Message": "Only 'partitionKey = :pk' key conditions are supported"}}, "Query")
+        partition_key = ExpressionAttributeValues[":pk"]["S"]
+        with self.lock:
+            keys = sorted(key for key in self.items if key[0] == partition_key)
+        return self._page(keys, ExclusiveStartKey, Limit, Select, ProjectionExpression, ExpressionAttributeNames)
+
+    def scan(self, TableName, ExclusiveStartKey=None, Limit=None, Select=None, ProjectionExpression=None,
+             ExpressionAttributeNames=None, Segment=0, TotalSegments=1, FilterExpression=None, **kwargs):
+        if FilterExpression:
+            raise ClientError({"Error": {"Code": "ValidationException",
+                                         "Message": "FilterExpression is not supported"}}, "Scan")
+        with self.lock:
+            keys = sorted(key for key in self.items if hash(key) % TotalSegments == Segment)
+        return self._page(keys, ExclusiveStartKey, Limit, Select, ProjectionExpression, ExpressionAttributeNames)
+
+    def get_paginator(self, operation_name):
+        if operation_name not in ("query", "scan"):
+            raise NotImplementedError(f"No paginator for '{operation_name}'")
+        return _Paginator(getattr(self, operation_name))
+
+    def async_client(self, in_flight=None):
+        """Returns an asyncio view of this fake, usable like an aiobotocore client context."""
+        return AsyncInMemoryDynamoDB(self)
+
+    # --- Internals ---
+
+    def _key(self, item):
+        return item["partitionKey"]["S"], item["sortKey"]["S"]
+
+    def _put(self, item):
+        with self.lock:
+            if self.store_items:
+                self.items[self._key(item)] = item
+            self.written += 1
+        return write_units(item)
+
+    def _delete(self, key):
+        with self.lock:
+            item = self.items.pop(self._key(key), None)
+        return write_units(item) if item else 1
+
+    def _page(self, keys, start_key, limit, select, projection, names):
+        if start_key:
+            start = self._key(start_key)
+            keys = [key for key in keys if key > start]
+        page_size = min(limit or QUERY_PAGE_ITEMS, QUERY_PAGE_ITEMS)
+        page_keys = keys[:page_size]
+        page = {"Count": len(page_keys), "ScannedCount": len(page_keys)}
+        if select != "COUNT":
+            attributes = None
+            if projection:
+                attributes = [(names or {}).get(name.strip(), name.strip()) for name in projection.split(",")]
+            with self.lock:
+                items = [self.items[key] for key in page_keys if key in self.items]
+            page["Items"] = [{k: v for k, v in item.items() if k in attributes} if attributes else item
+                             for item in items]
+        if len(keys) > page_size:
+            last = page_keys[-1]
+            page["LastEvaluatedKey"] = {"partitionKey": {"S": last[0]}, "sortKey": {"S": last[1]}}
+        return self._respond(page, None, None)
+
+    def _respond(self, response, return_consumed_capacity, consumed):
+        with self.lock:
+            self.calls += 1
+        if self.latency and not getattr(self.local, "awaited", False):
+            time.sleep(self.latency)
+        if return_consumed_capacity and return_consumed_capacity != "NONE" and consumed is not None:
+            response["ConsumedCapacity"] = consumed
+        return response
+
+
+class AsyncInMemoryDynamoDB:
+    """asyncio view of an InMemoryDynamoDB: the same calls as coroutines, with the latency awaited."""
+
+    def __init__(self, fake):
+        self.fake = fake
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        method = getattr(self.fake, name)
+
+        async def call(**kwargs):
+            if self.fake.latency:
+                await asyncio.sleep(self.fake.latency)
+            self.fake.local.awaited = True
+            try:
+                return method(**kwargs)
+            finally:
+                self.fake.local.awaited = False
+        return call
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# --- Multi-process record generation ---
+# Faker is CPU-bound, so a single process becomes the bottleneck once the
+# writer is fast. This module splits a requested record count across a pool
+# of processes. Every worker generates its share in fixed-size chunks, and each
+# chunk is generated from a seed derived from (master seed, worker, chunk), so
+# the output is reproducible for a given master seed and worker count no
+# matter how the OS schedules the processes. Chunks are yielded back in plan
+# order with a bounded number in flight, so memory stays flat.
+# ---------------------------------------------
+
+DEFAULT_CHUNK_SIZE = 500  # Records generated per task sent to a worker
+
+
+def derive_seed(master_seed, worker_index, chunk_index=0):
+    """Derives a stable 64-bit seed for one chunk of one worker."""
+    digest = hashlib.sha256(f"{master_seed}:{worker_index}:{chunk_index}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def split_count(count, workers):
+    """Splits `count` into `workers` shares that differ by at most one."""
+    base, remainder = divmod(count, workers)
+    return [base + (1 if i < remainder else 0) for i in range(workers)]
+
+
+def _run_chunk(generate_chunk, seed, count):
+    started = time.perf_counter()
+    records = generate_chunk(seed, count)
+    return records, time.perf_counter() - started
+
+
+def generate_in_processes(generate_chunk, count, workers=None, master_seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields `count` records produced by `generate_chunk(seed, n)` across a process pool.
+
+    Args:
+        generate_chunk (callable): Top-level (picklable) function that seeds its own
+                                   Faker/random state from `seed` and returns `n` records.
+        count (int): Total number of records to generate.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        master_seed (int): Seed every per-worker seed is derived from.
+        chunk_size (int): Records generated per task.
+    """
+    workers = workers or os.cpu_count() or 1
+    plan = []
+    for worker_index, share in enumerate(split_count(count, workers)):
+        for chunk_index, start in enumerate(range(0, share, chunk_size)):
+            seed = derive_seed(master_seed, worker_index, chunk_index)
+            plan.append((chunk_index, worker_index, seed, min(chunk_size, share - start)))
+
+    # Interleave the workers' chunks so every process is kept busy from the start
+    plan.sort()
+
+    stats = {worker_index: [0, 0.0] for worker_index in range(workers)}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for _, worker_index, seed, chunk_count in plan:
+            in_flight.append((worker_index, pool.submit(_run_chunk, generate_chunk, seed, chunk_count)))
+            if len(in_flight) >= workers * 2:
+                yield from _collect(in_flight.popleft(), stats)
+        while in_flight:
+            yield from _collect(in_flight.popleft(), stats)
+
+    for worker_index, (records, elapsed) in stats.items():
+        rate = records / elapsed if elapsed > 0 else 0.0
+        print(f"  Worker {worker_index}: {records} records in {elapsed:.1f}s ({rate:.1f} records/s)")
+
+
+def _collect(entry, stats):
+    worker_index, future = entry
+    records, elapsed = future.result()
+    stats[worker_index][0] += len(records)
+    stats[worker_index][1] += elapsed
+    return records
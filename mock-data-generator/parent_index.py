@@ -0,0 +1,342 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from partition_schema import parent_partitions, projected_attributes, projection_expression
+from pipeline import run_pipeline
+from seed_config import AWS_PROFILE_NAME, AWS_REGION, DYNAMODB_ENDPOINT_URL, TABLE_NAME
+from seed_metrics import get_metrics
+
+# --- Persistent local parent-key index ---
+# Dependent stages used to query their parents from DynamoDB on every run, and
+# the single-page queries silently stopped at 1 MB. This SQLite index keeps
+# partitionKey -> sortKey plus the few attributes child stages need, stored as
+# low-level DynamoDB JSON. Table writers (bulk_writer.create_writer) record
+# every batch DynamoDB fully acknowledged, and dependent stages load their
+# parents from here without reading the table. Export runs record nothing.
+#
+# There is one file per table and endpoint (parent_index.<table>@<endpoint>.sqlite3),
+# so pointing seed_config.py at another table, profile, region or
+# DYNAMODB_ENDPOINT_URL never loads parents that table does not have.
+#
+# Rebuild it from the table with a parallel paginated query per partition:
+#   python3 parent_index.py --refresh [PARTITION ...]
+# ---------------------------------------------
+
+INDEX_DIR = os.path.dirname(os.path.abspath(__file__))
+RECORD_BUFFER_SIZE = 1000  # Rows buffered before an executemany while streaming
+
+# Attributes each parent partition keeps for its child stages: exactly what the
+# children read, as declared in partition_schema.py
+INDEXED_ATTRIBUTES = {partition_key: projected_attributes(partition_key) for partition_key in parent_partitions()}
+
+
+def index_path(table_name=TABLE_NAME, endpoint=None, index_dir=INDEX_DIR):
+    """The index file of `table_name` at `endpoint` (default: seed_config's endpoint URL, or profile and region)."""
+    endpoint = endpoint or DYNAMODB_ENDPOINT_URL or f"{AWS_PROFILE_NAME}-{AWS_REGION}"
+    name = re.sub(r"[^A-Za-z0-9._@-]+", "_", f"{table_name}@{endpoint}")
+    return os.path.join(index_dir, f"parent_index.{name}.sqlite3")
+
+
+class ParentIndex:
+    """SQLite-backed index of parent keys and attributes. Safe to share between threads."""
+
+    def __init__(self, path=None):
+        path = path or index_path()
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS parents ("
+            " partition_key TEXT NOT NULL,"
+            " sort_key TEXT NOT NULL,"
+            " attributes TEXT NOT NULL,"
+            " PRIMARY KEY (partition_key, sort_key))"
+        )
+        # sortKeys load(..., excluded=True) leaves out; a TEMP table lives with the connection, not in the file
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS excluded (sort_key TEXT PRIMARY KEY)")
+        self.connection.commit()
+
+    # --- Writing ---
+
+    def record(self, items):
+        """Adds or replaces low-level items of indexed partitions; other partitions are ignored."""
+        rows = [row for row in (self._to_row(item) for item in items) if row]
+        if not rows:
+            return
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO parents (partition_key, sort_key, attributes) VALUES (?, ?, ?)", rows)
+            self.connection.commit()
+
+    def writer(self, writer):
+        """Wraps `writer` so every batch it fully writes is recorded."""
+        return IndexedWriter(writer, self)
+
+    def clear(self, partition_key=None):
+        """Forgets one partition, or every partition when none is given."""
+        with self.lock:
+            if partition_key is None:
+                self.connection.execute("DELETE FROM parents")
+            else:
+                self.connection.execute("DELETE FROM parents WHERE partition_key = ?", (partition_key,))
+            self.connection.commit()
+
+    def exclude(self, sort_keys):
+        """Adds sortKeys (any iterable, streamed in chunks) for load(..., excluded=True) to leave out."""
+        buffer = []
+        for sort_key in sort_keys:
+            buffer.append((sort_key,))
+            if len(buffer) >= RECORD_BUFFER_SIZE:
+                self._insert_excluded(buffer)
+                buffer = []
+        self._insert_excluded(buffer)
+
+    def clear_excluded(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM excluded")
+            self.connection.commit()
+
+    def _insert_excluded(self, rows):
+        if not rows:
+            return
+        with self.lock:
+            self.connection.executemany("INSERT OR IGNORE INTO excluded (sort_key) VALUES (?)", rows)
+            self.connection.commit()
+
+    def forget(self, partition_key, sort_keys):
+        """Removes the given sortKeys of one partition (e.g. items deleted from the table)."""
+        with self.lock:
+            self.connection.executemany("DELETE FROM parents WHERE partition_key = ? AND sort_key = ?",
+                                        [(partition_key, sort_key) for sort_key in sort_keys])
+            self.connection.commit()
+
+    # --- Reading ---
+
+    def count(self, partition_key):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM parents WHERE partition_key = ?", (partition_key,)).fetchone()[0]
+
+    def load(self, partition_key, limit=None, sample=False, excluded=False):
+        """
+        Returns indexed items of a partition as low-level DynamoDB items
+        (partitionKey, sortKey and the indexed attributes).
+
+        Args:
+            partition_key (str): The parent partition to load.
+            limit (int, optional): Maximum number of items to return.
+            sample (bool): Pick the items at random instead of in key order.
+            excluded (bool): Leave out the sortKeys added with exclude().
+        """
+        query = "SELECT sort_key, attributes FROM parents WHERE partition_key = ?"
+        if excluded:
+            query += " AND sort_key NOT IN (SELECT sort_key FROM excluded)"
+        query += " ORDER BY RANDOM()" if sample else " ORDER BY sort_key"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        with self.lock:
+            rows = self.connection.execute(query, (partition_key,)).fetchall()
+        items = []
+        for sort_key, attributes in rows:
+            item = {"partitionKey": {"S": partition_key}, "sortKey": {"S": sort_key}}
+            item.update(json.loads(attributes))
+            items.append(item)
+        return items
+
+    def pages(self, partition_key, page_size=RECORD_BUFFER_SIZE):
+        """Yields the indexed items of a partition like load(), `page_size` at a time in key order."""
+        last_sort_key = ""
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT sort_key, attributes FROM parents WHERE partition_key = ? AND sort_key > ?"
+                    " ORDER BY sort_key LIMIT ?", (partition_key, last_sort_key, page_size)).fetchall()
+            if not rows:
+                return
+            yield [{"partitionKey": {"S": partition_key}, "sortKey": {"S": sort_key}, **json.loads(attributes)}
+                   for sort_key, attributes in rows]
+            last_sort_key = rows[-1][0]
+
+    def partition(self, partition_key, page_size=RECORD_BUFFER_SIZE):
+        """Returns an IndexedPartition: the partition's items, streamed from pages() every time it is iterated."""
+        return IndexedPartition(self, partition_key, page_size)
+
+    def load_or_refresh(self, client, table_name, partition_key, limit=None, sample=False, excluded=False):
+        """Like load(), but first rebuilds the partition from the table if nothing is indexed for it yet."""
+        if not self._refresh_if_empty(client, table_name, partition_key):
+            return []
+        items = self.load(partition_key, limit=limit, sample=sample, excluded=excluded)
+        if items:
+            print(f"✅ Loaded {len(items)} '{partition_key}' items from the parent index")
+        else:
+            print(f"⚠️ Warning: Found 0 items with partition key '{partition_key}'")
+        return items
+
+    def partition_or_refresh(self, client, table_name, partition_key):
+        """Like partition(), but first rebuilds the partition from the table if nothing is indexed for it yet."""
+        self._refresh_if_empty(client, table_name, partition_key)
+        items = self.partition(partition_key)
+        if items:
+            print(f"✅ Streaming {len(items)} '{partition_key}' items from the parent index")
+        else:
+            print(f"⚠️ Warning: Found 0 items with partition key '{partition_key}'")
+        return items
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    # --- Rebuilding from the table ---
+
+    def _refresh_if_empty(self, client, table_name, partition_key):
+        """Rebuilds a partition nothing is indexed for yet; False if reading the table failed."""
+        if self.count(partition_key) == 0:
+            print(f"⚠️ No '{partition_key}' items in the parent index. Rebuilding it from the table...")
+            try:
+                self.refresh(client, table_name, [partition_key])
+            except Exception as e:
+                print(f"❌ Error fetching items for {partition_key}: {e}")
+                return False
+        return True
+
+    def refresh(self, client, table_name, partition_keys=None):
+        """Rebuilds the given partitions (default: all indexed ones) from the table, one paginated query each, in parallel."""
+        partition_keys = partition_keys or list(INDEXED_ATTRIBUTES)
+        with ThreadPoolExecutor(max_workers=len(partition_keys)) as pool:
+            counts = pool.map(lambda pk: self._refresh_partition(client, table_name, pk), partition_keys)
+            for partition_key, count in zip(partition_keys, counts):
+                print(f"🔄 Indexed {count} items for '{partition_key}' from the table")
+
+    def _refresh_partition(self, client, table_name, partition_key):
+        self.clear(partition_key)
+        count = 0
+        for items in query_pages(client, table_name, partition_key):
+            self.record(items)
+            count += len(items)
+        return count
+
+    def _to_row(self, item):
+        partition_key = item["partitionKey"]["S"]
+        if partition_key not in INDEXED_ATTRIBUTES:
+            return None
+        kept = {k: item[k] for k in INDEXED_ATTRIBUTES[partition_key] if k in item}
+        return partition_key, item["sortKey"]["S"], json.dumps(kept, ensure_ascii=False)
+
+
+def query_pages(client, table_name, partition_key, attributes=None):
+    """
+    Yields a partition's items from the table one query page at a time, projected to what
+    child stages read, or to `attributes` (a list of top-level attribute names) when given.
+    """
+    paginator = client.get_paginator("query")
+    query_args = {
+        "TableName": table_name,
+        "KeyConditionExpression": "partitionKey = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": partition_key}},
+    }
+    # Only the projected attributes are transferred
+    if attributes is None:
+        query_args["ProjectionExpression"], query_args["ExpressionAttributeNames"] = projection_expression(partition_key)
+    else:
+        query_args["ProjectionExpression"] = ", ".join(f"#a{i}" for i in range(len(attributes)))
+        query_args["ExpressionAttributeNames"] = {f"#a{i}": name for i, name in enumerate(attributes)}
+
+    metrics = get_metrics()
+    requested = time.monotonic()
+    for page in paginator.paginate(**query_args):
+        items = page.get("Items", [])
+        metrics.record_read("query", partition_key, time.monotonic() - requested, len(items))
+        yield items
+        requested = time.monotonic()
+
+
+class IndexedPartition:
+    """
+    The indexed items of one partition, read page by page in key order each time it is
+    iterated, so it can be passed where a list of parents is expected (and iterated twice)
+    without holding the partition in memory.
+    """
+
+    def __init__(self, index, partition_key, page_size=RECORD_BUFFER_SIZE):
+        self.index = index
+        self.partition_key = partition_key
+        self.page_size = page_size
+
+    def __iter__(self):
+        for page in self.index.pages(self.partition_key, self.page_size):
+            yield from page
+
+    def __len__(self):
+        return self.index.count(self.partition_key)
+
+
+class IndexedWriter:
+    """Wraps a writer so the items of every fully acknowledged batch are recorded; otherwise behaves like the writer."""
+
+    def __init__(self, writer, index):
+        self.writer = writer
+        self.index = index
+
+    def write_batch(self, items):
+        succeeded = self.writer.write_batch(items)
+        if succeeded == len(items):
+            self.index.record(items)
+        return succeeded
+
+    def put_items(self, items, total=None):
+        # Batch by batch, so each one is recorded only once it is acknowledged
+        self.writer.total = total or self.writer.total  # Progress lines read it when a batch completes
+        written = []
+        workers = getattr(self.writer, "in_flight", None) or 1
+        run_pipeline([items], lambda batch: written.append(self.write_batch(batch)), workers=workers)
+        return sum(written)
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+def indexes(stage):
+    """True if a writer for `stage` (e.g. "EXAM" or "PAYMENT+CERTIFICATION") writes an indexed partition."""
+    return any(partition_key in INDEXED_ATTRIBUTES for partition_key in stage.split("+"))
+
+
+_parent_index = None
+
+
+def get_parent_index():
+    """Returns the shared ParentIndex of seed_config's table and endpoint, opening it on first use."""
+    global _parent_index
+    if _parent_index is None:
+        _parent_index = ParentIndex()
+    return _parent_index
+
+
+def set_parent_index(index):
+    """Makes get_parent_index() return `index` from now on (e.g. a scratch index for benchmarks)."""
+    global _parent_index
+    _parent_index = index
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    from seed_config import get_dynamodb_client
+
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the local parent-key index.")
+    parser.add_argument("--refresh", nargs="*", metavar="PARTITION", default=None,
+                        help="Rebuild these partitions (all indexed partitions if none are given) from the table")
+    args = parser.parse_args()
+
+    index = get_parent_index()
+    if args.refresh is not None:
+        print(f"🔄 Rebuilding parent index '{index.path}' from table '{TABLE_NAME}'...")
+        index.refresh(get_dynamodb_client(), TABLE_NAME, args.refresh)
+
+    for partition in INDEXED_ATTRIBUTES:
+        print(f"  {partition:<14} {index.count(partition):>10} indexed")
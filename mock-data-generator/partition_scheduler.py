@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk_writer import BATCH_SIZE
+
+# --- Cross-partition interleaved write scheduler ---
+# Every stage writes all of its items under one partitionKey value, so a
+# stage on its own is capped by the write ceiling of a single physical
+# partition however much capacity the rest of the table has. This scheduler
+# drains several independent stages at the same time:
+#
+# - Each partition key value has its own item source. Batches are filled
+#   round-robin across the sources, so every BatchWriteItem carries a mix of
+#   partitions.
+# - The shared AdaptiveBatchWriter (created with partition_wcu) paces every
+#   partition key with its own token bucket and, on throttling, only slows
+#   down the partitions whose items came back.
+# - A partition that is out of tokens is skipped while a batch is filled, so
+#   one hot partition does not hold back the others.
+#
+# Aggregate throughput then grows with the number of partitions seeded at once.
+# ---------------------------------------------
+
+WRITER_THREADS = 4  # Batches in flight at once
+IDLE_WAIT_SECONDS = 0.01  # Pause when every remaining partition is out of tokens
+
+
+class RoundRobinBatcher:
+    """Fills batches by taking one item from each ready partition source in turn. Thread-safe."""
+
+    def __init__(self, sources, ready=None, batch_size=BATCH_SIZE):
+        self.sources = deque((partition_key, iter(items)) for partition_key, items in sources.items())
+        self.ready = ready or (lambda partition_key: True)
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+
+    def next_batch(self):
+        """
+        Returns the next batch of items, an empty list while every remaining partition
+        is out of tokens, or None once all sources are exhausted.
+        """
+        with self.lock:
+            batch = []
+            skipped = 0
+            while self.sources and len(batch) < self.batch_size and skipped < len(self.sources):
+                partition_key, items = self.sources[0]
+                self.sources.rotate(-1)
+                if not self.ready(partition_key):
+                    skipped += 1
+                    continue
+                item = next(items, None)
+                if item is None:
+                    self.sources.pop()  # The exhausted source was just rotated to the end
+                    continue
+                batch.append(item)
+                skipped = 0
+            return batch if batch or self.sources else None
+
+
+def write_interleaved(writer, sources, workers=WRITER_THREADS):
+    """
+    Writes several partitions' items concurrently, interleaved within every batch.
+    The sources are only pulled under a lock, so plain generators are safe to pass.
+
+    Args:
+        writer (AdaptiveBatchWriter): Shared writer; with partition_wcu every partition is paced separately.
+        sources (dict): {partition key value: iterable of low-level items}.
+        workers (int): Threads sending batches in parallel.
+
+    Returns:
+        int: Number of items written.
+    """
+    batcher = RoundRobinBatcher(sources, ready=writer.partition_ready)
+
+    def drain():
+        written = 0
+        while True:
+            batch = batcher.next_batch()
+            if batch is None:
+                return written
+            if not batch:
+                time.sleep(IDLE_WAIT_SECONDS)
+                continue
+            written += writer.write_batch(batch)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(drain) for _ in range(workers)]
+        return sum(future.result() for future in futures)
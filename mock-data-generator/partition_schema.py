@@ -0,0 +1,252 @@
+import argparse
+
+from dataset_stamp import RUN_ID_ATTRIBUTE, TTL_ATTRIBUTE
+
+# --- Partition schema registry ---
+# One description of every partition in the single table: its attributes and
+# their stored DynamoDB types, the defaults generators fill in, which parent
+# items its attributes reference and which parent attributes it reads.
+#
+# - Generators build records from it: apply_defaults() fills in missing
+#   attributes (stages 1-3), and inherited_attributes() copies a parent's
+#   attributes with their defaults (EXAM_HOLD inherits most of its EXAM).
+# - ItemEncoder (fast_serializer.py) validates every attribute against it the
+#   first time the attribute is encoded, so an undeclared attribute or a type
+#   change fails immediately instead of landing in the table.
+# - Parent reads are projected: the parent index (parent_index.py) keeps, and
+#   queries with a ProjectionExpression, only the attributes some child reads.
+#   Rebuilding EXAM or EXAM_HOLD from the table then transfers a fraction of
+#   each item.
+#
+# References are "attribute" or "listAttribute.mapKey" paths whose value is a
+# parent's sortKey. Run this file to print the registry and the projections.
+# ---------------------------------------------
+
+KEY_ATTRIBUTES = ["partitionKey", "sortKey"]
+AUDIT_ATTRIBUTES = ["createdBy", "createdOn", "updatedBy", "updatedOn"]
+# Added to every item of a stamped run by the writer (dataset_stamp.py), so no partition declares them
+STAMP_ATTRIBUTES = {TTL_ATTRIBUTE: "N", RUN_ID_ATTRIBUTE: "S"}
+
+
+def _strings(*names):
+    return {name: "S" for name in names}
+
+
+# Fields EXAM_HOLD copies from its exam, with the value used when the exam has none
+EXAM_HOLD_INHERITED_DEFAULTS = {
+    "timeRequired": "60",
+    "score": [],
+    "scoreComment": "",
+    "examItems": [],
+    "faceImgRequired": "false",
+    "lesson": "false",
+    "certificationType": "none",
+    "certificationTemporaryDeadline": "false",
+    "certificationShipped": 14,
+    "certificationPrefix": "",
+    "licenseExpirationDate": "",
+    "renewText": "none",
+    "renewTextInclusion": "none",
+    "renewLesson": "none",
+    "renewLessonInclusion": "none",
+    "revisionLawInformation": "false",
+    "examFee": "0",
+    "studentFee": "",
+    "groupFee": "",
+    "lessonFee": "",
+    "certificationFee": "",
+    "renewalFee": "",
+    "renewTextFee": "",
+    "renewLessonFee": "",
+    "specialFee": "",
+}
+
+_STUDENT_ATTRIBUTES = [
+    "partitionKey", "sortKey", "online", "lastName", "firstName", "lastNameKana", "firstNameKana",
+    "birthday", "gender", "phoneNumber1", "phoneNumber2", "faxNumber", "email", "occupation",
+    "organization", "postalCode", "prefecture", "city", "addressLine", "mansionBuilding",
+    "sendingAddress", "organizationPostalCode", "organizationPrefecture", "organizationCity",
+    "organizationAddressLine", "organizationMansionBuilding", "organizationPN", "noticeName",
+    "noticeStudent", "resignation", "username", "createdOn", "createdBy", "updatedOn", "updatedBy",
+]
+
+_EXAM_FEES = ["examFee", "studentFee", "groupFee", "lessonFee", "certificationFee", "renewalFee",
+              "renewTextFee", "renewLessonFee", "specialFee"]
+
+SCHEMAS = {
+    "STUDENT": {
+        "attributes": _strings(*_STUDENT_ATTRIBUTES),
+        # Every attribute is stored, as an empty string when there is no value
+        "defaults": {name: "" for name in _STUDENT_ATTRIBUTES if name not in KEY_ATTRIBUTES},
+        "references": {},
+        "reads": {},
+    },
+    "EXAM_PLACE": {
+        "attributes": _strings(*KEY_ATTRIBUTES, "placeName", "prefecture", "city", "addressLine", "building",
+                               "postalCode", "phoneNumber", "placeCapacity", "memo", "placeUrl", *AUDIT_ATTRIBUTES),
+        "defaults": {"memo": "", "placeUrl": ""},
+        "references": {},
+        "reads": {},
+    },
+    "BANK_ACCOUNT": {
+        "attributes": _strings(*KEY_ATTRIBUTES, "bankName", "branchName", "depositType", "accountNumber",
+                               "accountHolder", "memo", *AUDIT_ATTRIBUTES),
+        "defaults": {"memo": ""},
+        "references": {},
+        "reads": {},
+    },
+    "EXAM": {
+        "attributes": {
+            **_strings(*KEY_ATTRIBUTES, "examName", "timeRequired", "scoreComment", "faceImgRequired", "lesson",
+                       "certificationType", "certificationTemporaryDeadline", "certificationPrefix",
+                       "licenseExpirationDate", "renewText", "renewTextInclusion", "renewLesson",
+                       "renewLessonInclusion", "revisionLawInformation", *_EXAM_FEES, "bankAccountId", "examUrl",
+                       "memo", *AUDIT_ATTRIBUTES),
+            "score": "L",  # [{"display_name", "perfectScore", "passingScore"}]
+            "examItems": "L",
+            "certificationShipped": "N",
+        },
+        "defaults": {},
+        "references": {"bankAccountId": "BANK_ACCOUNT"},
+        "reads": {"BANK_ACCOUNT": []},
+    },
+    "EXAM_HOLD": {
+        "attributes": {
+            **_strings(*KEY_ATTRIBUTES, "examId", "examName", "bankAccountId", "timeRequired", "scoreComment",
+                       "faceImgRequired", "lesson", "certificationType", "certificationTemporaryDeadline",
+                       "certificationPrefix", "licenseExpirationDate", "renewText", "renewTextInclusion",
+                       "renewLesson", "renewLessonInclusion", "revisionLawInformation", *_EXAM_FEES,
+                       "examHoldDate", "applicationPeriodFrom", "applicationPeriodTo", "resultDay",
+                       "downloadPermissionDate", "certificationPeriodTo", "startTime", "openTime", "lessonStartTime",
+                       "lessonOpenTime", "examHoldActivation", "renewal", "renewalReserve", "memo", *AUDIT_ATTRIBUTES),
+            "examHoldNo": "N",
+            "score": "L",
+            "examItems": "L",
+            "certificationShipped": "N",
+            "prefectures": "L",
+            "examHoldPlace": "L",  # [{"placeId", "capacity"}]
+            "documentsRequired": "L",
+            "cautions": "L",
+        },
+        "defaults": EXAM_HOLD_INHERITED_DEFAULTS,
+        "references": {"examId": "EXAM", "bankAccountId": "BANK_ACCOUNT", "examHoldPlace.placeId": "EXAM_PLACE"},
+        "reads": {"EXAM": ["examName", "bankAccountId", *EXAM_HOLD_INHERITED_DEFAULTS], "EXAM_PLACE": ["prefecture"]},
+    },
+    "APPLICATION": {
+        "attributes": _strings(*KEY_ATTRIBUTES, "studentId", "examHoldId", "examId", "examName", "examDate",
+                               "examPlace",  # The exam hold's examHoldPlace, stored as its string form
+                               "applicationDate", "paymentMethod", "paymentStatus", "examFee", "lessonFee",
+                               "certificationFee", "totalFee", "memo", *AUDIT_ATTRIBUTES),
+        "defaults": {},
+        "references": {"studentId": "STUDENT", "examHoldId": "EXAM_HOLD", "examId": "EXAM"},
+        "reads": {
+            "STUDENT": ["firstName", "lastName"],
+            "EXAM_HOLD": ["examId", "examName", "examHoldDate", "examHoldPlace", "examFee", "lessonFee",
+                          "certificationFee"],
+        },
+    },
+    "PAYMENT": {
+        "attributes": _strings(*KEY_ATTRIBUTES, "applicationId", "studentId", "paymentDate", "paymentAmount",
+                               "paymentMethod", "status", "memo", *AUDIT_ATTRIBUTES),
+        "defaults": {},
+        "references": {"applicationId": "APPLICATION", "studentId": "STUDENT"},
+        "reads": {"APPLICATION": ["studentId", "totalFee", "paymentMethod", "paymentStatus"]},
+    },
+    "CERTIFICATION": {
+        "attributes": _strings(*KEY_ATTRIBUTES, "applicationId", "studentId", "examId", "examName", "issueDate",
+                               "expirationDate", "certificationNumber", "status", "memo", *AUDIT_ATTRIBUTES),
+        "defaults": {},
+        "references": {"applicationId": "APPLICATION", "studentId": "STUDENT", "examId": "EXAM"},
+        "reads": {"APPLICATION": ["studentId", "paymentStatus", "examId", "examName"]},
+    },
+}
+
+
+def get_schema(partition_key):
+    """Returns the schema dict of a partition."""
+    if partition_key not in SCHEMAS:
+        raise ValueError(f"Unknown partition '{partition_key}'. Choose one of: {', '.join(SCHEMAS)}")
+    return SCHEMAS[partition_key]
+
+
+def attribute_names(partition_key):
+    """Declared attributes of a partition, in declaration order."""
+    return list(get_schema(partition_key)["attributes"])
+
+
+def apply_defaults(partition_key, record):
+    """Fills in the partition's default for every attribute missing from `record`, in place. Returns the record."""
+    for name, default in get_schema(partition_key)["defaults"].items():
+        record.setdefault(name, default)
+    return record
+
+
+def inherited_attributes(partition_key, parent_partition_key, parent):
+    """
+    Returns the attributes `partition_key` copies from a (deserialized) parent record:
+    every attribute it reads from that parent and has a default for, the default when the parent lacks it.
+    """
+    schema = get_schema(partition_key)
+    defaults = schema["defaults"]
+    return {name: parent.get(name, defaults[name])
+            for name in schema["reads"][parent_partition_key] if name in defaults}
+
+
+def check_attribute(partition_key, name, attribute_type):
+    """Raises ValueError unless `name` is a declared attribute of the partition stored as `attribute_type`."""
+    declared = get_schema(partition_key)["attributes"].get(name, STAMP_ATTRIBUTES.get(name))
+    if declared is None:
+        raise ValueError(f"'{name}' is not a declared {partition_key} attribute (see partition_schema.py)")
+    if declared != attribute_type:
+        raise ValueError(f"{partition_key}.{name} is declared as {declared} but was encoded as {attribute_type}")
+
+
+def reference_values(item, path):
+    """Yields the sortKeys a low-level item references through `path` ('attribute' or 'listAttribute.mapKey')."""
+    name, _, map_key = path.partition(".")
+    value = item.get(name)
+    if value is None:
+        return
+    if not map_key:
+        if "S" in value:
+            yield value["S"]
+        return
+    for element in value.get("L", []):
+        target = element.get("M", {}).get(map_key)
+        if target and "S" in target:
+            yield target["S"]
+
+
+def parent_partitions():
+    """Partitions that some other partition reads from, in registry order."""
+    read = {parent for schema in SCHEMAS.values() for parent in schema["reads"]}
+    return [partition_key for partition_key in SCHEMAS if partition_key in read]
+
+
+def projected_attributes(partition_key):
+    """Attributes of a parent partition that its children read (besides the key), in declaration order."""
+    read = {name for schema in SCHEMAS.values() for name in schema["reads"].get(partition_key, [])}
+    return [name for name in attribute_names(partition_key) if name in read and name not in KEY_ATTRIBUTES]
+
+
+def projection_expression(partition_key):
+    """Returns (ProjectionExpression, ExpressionAttributeNames) reading the key and the projected attributes."""
+    names = KEY_ATTRIBUTES + projected_attributes(partition_key)
+    return (", ".join(f"#a{i}" for i in range(len(names))),
+            {f"#a{i}": name for i, name in enumerate(names)})
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the partition schema registry.")
+    parser.add_argument("partitions", nargs="*", help="Partitions to print (default: all)")
+    args = parser.parse_args()
+
+    for partition in args.partitions or SCHEMAS:
+        schema = get_schema(partition)
+        print(f"{partition} ({len(schema['attributes'])} attributes)")
+        for reference, parent in schema["references"].items():
+            print(f"  {reference} -> {parent}")
+        if partition in parent_partitions():
+            print(f"  read by children: {', '.join(projected_attributes(partition)) or '(key only)'}")
+    print(f"Stamped runs add to every item: {', '.join(f'{name} ({kind})' for name, kind in STAMP_ATTRIBUTES.items())}")
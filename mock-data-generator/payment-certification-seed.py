@@ -0,0 +1,120 @@
+import argparse
+import importlib
+import random
+from collections import Counter
+from itertools import zip_longest
+
+from async_engine import in_flight_from_argv
+from bulk_writer import PARTITION_WCU_LIMIT, create_writer
+from export_writer import export_dir_from_argv
+from parent_index import RECORD_BUFFER_SIZE, get_parent_index, query_pages
+from scale_profiles import profile_from_argv
+from seed_config import TABLE_NAME, get_dynamodb_client
+from write_backends import backend_from_argv
+
+# --- Fused PAYMENT + CERTIFICATION stage ---
+# 7-payment-seed.py and 8-certification-seed.py each load the whole
+# APPLICATION partition and write on their own, although both only read the
+# application's sortKey, studentId, totalFee, paymentMethod, paymentStatus,
+# examId and examName. This stage reads the applications once, one page at a
+# time, and writes both children through one interleaved writer:
+#
+#   APPLICATION page ─┬─> payments ───────┐
+#                     └─> certifications ─┴─> one writer, PAYMENT and
+#                                             CERTIFICATION alternating
+#
+# Pages come from the local parent index (parent_index.py) when it has the
+# applications, otherwise from one paginated query projected to those seven
+# attributes (--from-table forces that); the queried pages are recorded in the
+# index on the way. Only one page of applications and its children is held
+# in memory. The writer paces each partition key on its own, up to
+# PARTITION_WCU_LIMIT, while TARGET_WCU caps the two together.
+#
+# Items are generated by the stages' own functions, so they are the same
+# kind of items the two scripts write; with a given --seed the random draws of
+# the two stages interleave page by page, so the items differ from theirs.
+# ---------------------------------------------
+
+# --- Configuration ---
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 200 # Write capacity the fused writer paces itself towards (both partitions together)
+WRITE_BACKEND = backend_from_argv("batch_write") # --backend partiql|batch_write|put_item
+EXPORT_DIR = export_dir_from_argv() # --export-dir DIR writes gzipped DynamoDB JSON import files instead
+IN_FLIGHT = in_flight_from_argv() # --in-flight N keeps N batches in flight on the asyncio engine (async_engine.py)
+SCALE_PROFILE = profile_from_argv() # --profile small|prod-like|10x-peak (see scale_profiles.py)
+PAYMENTS_PER_APPLICATION = SCALE_PROFILE["payments_per_application"] # {payments: weight} per application
+PAGE_SIZE = RECORD_BUFFER_SIZE # Applications per page when reading from the parent index
+# ---------------------
+
+# AWS Setup
+dynamodb_client = get_dynamodb_client()
+
+payment_stage = importlib.import_module("7-payment-seed")
+certification_stage = importlib.import_module("8-certification-seed")
+
+
+def application_pages(from_table=False, page_size=PAGE_SIZE):
+    """Yields the applications page by page, from the parent index when it has them, else from the table."""
+    index = get_parent_index()
+    indexed = index.count("APPLICATION")
+    if indexed and not from_table:
+        print(f"✅ Streaming {indexed} 'APPLICATION' items from the parent index")
+        yield from index.pages("APPLICATION", page_size)
+        return
+    print(f"🔍 Streaming 'APPLICATION' from table '{TABLE_NAME}' (one projected query, page by page)...")
+    for applications in query_pages(dynamodb_client, TABLE_NAME, "APPLICATION"):
+        index.record(applications)
+        yield applications
+
+
+def generate_fused(pages, payments_per_application=PAYMENTS_PER_APPLICATION, counts=None, rng=random):
+    """
+    Yields the serialized payment and certification items of every page of (serialized)
+    applications, alternating between the two partitions. `counts` (a Counter), when
+    given, is updated with the items yielded per partition. Random draws come from `rng`.
+    """
+    for applications in pages:
+        payments = [payment_stage.serialize_record(payment) for payment in
+                    payment_stage.create_hardcoded_payment_data(applications, payments_per_application, rng)]
+        certifications = [certification_stage.serialize_record(certification) for certification in
+                          certification_stage.create_hardcoded_certification_data(applications, rng)]
+        if counts is not None:
+            counts.update({"PAYMENT": len(payments), "CERTIFICATION": len(certifications)})
+        for pair in zip_longest(payments, certifications):
+            yield from (item for item in pair if item is not None)
+
+
+def run_stage(pages, seed=None, payments_per_application=PAYMENTS_PER_APPLICATION):
+    """
+    Generates and inserts payments and certifications for pages of (serialized) applications.
+    Returns {partition key: items generated}.
+    """
+    # A private generator: the writer draws backoff jitter from `random` while pages are generated
+    rng = random.Random(seed)
+    writer = create_writer(dynamodb_client, TABLE_NAME, "PAYMENT+CERTIFICATION", export_dir=EXPORT_DIR,
+                           target_wcu=TARGET_WCU, partition_wcu=PARTITION_WCU_LIMIT, backend=WRITE_BACKEND,
+                           in_flight=IN_FLIGHT)
+    counts = Counter()
+    writer.put_items(generate_fused(pages, payments_per_application, counts, rng))
+    writer.close()
+    writer.print_summary()
+    return dict(counts)
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Insert mock payments and certifications from one pass over the applications "
+                    "(also accepts the shared seed flags, e.g. --profile, --backend, --export-dir, --lifetime).")
+    parser.add_argument("--from-table", action="store_true",
+                        help="Read the applications from the table even if the parent index has them")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible items")
+    args, _ = parser.parse_known_args()
+
+    print(f"🚀 Starting script to insert mock payments and certifications into table '{TABLE_NAME}'...")
+    generated = run_stage(application_pages(args.from_table), seed=args.seed)
+
+    if generated:
+        print(f"✅ Generated {generated['PAYMENT']} payment and {generated['CERTIFICATION']} certification records.")
+    else:
+        print("❌ Script stopped. Cannot create payments or certifications without existing applications to link.")
@@ -0,0 +1,102 @@
+import queue
+import threading
+
+# --- Bounded producer/consumer pipeline ---
+# Streams items from one or more producer iterables (each drained by its own
+# thread) to a pool of consumer threads through a bounded queue. Producers
+# block once `max_pending` items are waiting, so memory stays constant no
+# matter how many items flow through, and production overlaps with I/O.
+# ---------------------------------------------
+
+_DONE = object()  # Sentinel telling a consumer that all producers have finished
+
+
+def run_pipeline(sources, handle_batch, workers=4, batch_size=25, max_pending=1000, limit=None):
+    """
+    Feeds every item from `sources` to `handle_batch(batch)` in batches of up to
+    `batch_size`, using `workers` consumer threads.
+
+    Args:
+        sources (list): Iterables to drain concurrently, one thread each.
+        handle_batch (callable): Called with a list of items from a consumer thread.
+        workers (int): Number of consumer threads.
+        batch_size (int): Maximum items handed to a single `handle_batch` call.
+        max_pending (int): Maximum items buffered between producers and consumers.
+        limit (int, optional): Stop producing once this many items were queued.
+
+    Returns:
+        int: The number of items that were queued.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()  # Set when any thread fails
+    limit_reached = threading.Event()
+    errors = []
+    counter_lock = threading.Lock()
+    queued = [0]
+
+    def produce(source):
+        try:
+            for item in source:
+                if stop.is_set() or limit_reached.is_set():
+                    break
+                with counter_lock:
+                    if limit is not None and queued[0] >= limit:
+                        limit_reached.set()
+                        break
+                    queued[0] += 1
+                _put(pending, item, stop)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            close = getattr(source, "close", None)
+            if close:
+                close()
+
+    def consume():
+        batch = []
+        finished = False
+        try:
+            while True:
+                item = pending.get()
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    handle_batch(batch)
+                    batch = []
+            if batch:
+                handle_batch(batch)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            # Keep draining so producers blocked on a full queue can finish
+            while not finished:
+                finished = pending.get() is _DONE
+
+    producer_threads = [threading.Thread(target=produce, args=(source,), daemon=True) for source in sources]
+    consumer_threads = [threading.Thread(target=consume, daemon=True) for _ in range(workers)]
+    for thread in producer_threads + consumer_threads:
+        thread.start()
+
+    for thread in producer_threads:
+        thread.join()
+    for _ in consumer_threads:
+        pending.put(_DONE)
+    for thread in consumer_threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return queued[0]
+
+
+def _put(pending, item, stop):
+    """Blocks until there is room in the queue, giving up if the pipeline was stopped."""
+    while not stop.is_set():
+        try:
+            pending.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
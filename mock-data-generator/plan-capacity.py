@@ -0,0 +1,182 @@
+import argparse
+import contextlib
+import importlib
+import math
+import os
+import tempfile
+import threading
+
+from bulk_writer import DEFAULT_TARGET_WCU, PARTITION_WCU_LIMIT
+from local_dynamodb import WRITE_UNIT_BYTES, InMemoryDynamoDB, item_size, write_units
+from parent_index import ParentIndex, set_parent_index
+from run_manifest import set_run_manifest
+from scale_profiles import DEFAULT_PROFILE, SCALE_PROFILES, expected_items, get_profile
+from seed_config import set_dynamodb_client
+from snapshot_cache import set_snapshot_cache
+
+# --- Dry-run capacity and cost planner ---
+# Answers "how many WCU, how long and how much" before a seed run, without a
+# single API call. The whole seed chain (seed-all.py) runs against a sizing
+# stand-in that stores nothing and measures every item it is handed, using
+# DynamoDB's own item size rules (attribute names + values, 3 bytes plus
+# 1 byte per element for lists and maps such as `score` or `examHoldPlace`,
+# 1 WCU per started KB; see local_dynamodb.item_size).
+#
+#   python3 plan-capacity.py --profile prod-like --capacity 100 1000 4000
+#
+# Large profiles are measured on a sample of --sample-students students and
+# extrapolated with the profile's expected counts (scale_profiles.py); the
+# hardcoded partitions and EXAM_HOLD do not grow with the student count and
+# are measured in full. The table has no GSIs, so every item is written once.
+#
+# Wall time per capacity assumes the stages run one after the other, each
+# paced at the capacity but never above PARTITION_WCU_LIMIT (one partition
+# key value per stage); with --interleave the independent stages share it.
+# ---------------------------------------------
+
+DEFAULT_SAMPLE_STUDENTS = 2000  # Students actually generated; larger runs are extrapolated
+DEFAULT_CAPACITIES = [DEFAULT_TARGET_WCU, PARTITION_WCU_LIMIT]  # WCU/s to estimate wall time for
+SAMPLE_SEED = 0  # Fixed master seed, so plans are repeatable
+ON_DEMAND_PRICE_PER_MILLION_WRU = 0.715  # USD, ap-northeast-1 Standard table class; check current pricing
+PROVISIONED_PRICE_PER_WCU_HOUR = 0.000742  # USD, ap-northeast-1 Standard table class
+# Stages seed-all.py --interleave writes together; the others run on their own
+INTERLEAVED_GROUPS = [("STUDENT", "EXAM_PLACE", "BANK_ACCOUNT"), ("PAYMENT", "CERTIFICATION")]
+
+
+class SizingClient(InMemoryDynamoDB):
+    """Stand-in client that stores nothing and records the size and WCU of every item written, per partition."""
+
+    def __init__(self):
+        super().__init__(store_items=False)
+        self.partitions = {}
+        self.size_lock = threading.Lock()
+
+    def _put(self, item):
+        size = item_size(item)
+        units = write_units(item)
+        with self.size_lock:
+            stats = self.partitions.setdefault(item["partitionKey"]["S"], {
+                "items": 0, "bytes": 0, "max_bytes": 0, "wcu": 0,
+            })
+            stats["items"] += 1
+            stats["bytes"] += size
+            stats["max_bytes"] = max(stats["max_bytes"], size)
+            stats["wcu"] += units
+        return super()._put(item)
+
+
+def measure_sample(students, processes=1, columnar=False):
+    """
+    Runs the seed chain for `students` students against a SizingClient and returns its per-partition stats.
+    The stages read --profile from the command line. Nothing reaches DynamoDB, the real
+    parent index, the snapshot cache or a run manifest.
+    """
+    client = SizingClient()
+    set_dynamodb_client(client)
+    scratch_dir = tempfile.TemporaryDirectory(prefix="seed-plan-")
+    set_parent_index(ParentIndex(os.path.join(scratch_dir.name, "parent_index.sqlite3")))
+    set_snapshot_cache(None)
+    set_run_manifest(None)
+    seed_all_module = importlib.import_module("seed-all")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        seed_all_module.seed_all(students, target_wcu=10**9, processes=processes, columnar=columnar,
+                                 master_seed=SAMPLE_SEED)
+    scratch_dir.cleanup()
+    return client.partitions
+
+
+def extrapolate(sampled, profile, students, sample_students):
+    """
+    Scales sampled per-partition stats to `students`: partitions that grow with the student
+    count get the profile's expected item count at the sampled average size and WCU.
+    """
+    if students == sample_students:
+        return sampled
+    expected = expected_items(profile, students)
+    planned = {}
+    for partition, stats in sampled.items():
+        count = expected.get(partition, stats["items"])
+        if partition == "EXAM_HOLD":
+            count = stats["items"]  # Fixed by the profile, not by the student count
+        scale = count / stats["items"]
+        planned[partition] = {
+            "items": count,
+            "bytes": round(stats["bytes"] * scale),
+            "max_bytes": stats["max_bytes"],
+            "wcu": round(stats["wcu"] * scale),
+        }
+    return planned
+
+
+def stage_seconds(partition_wcu, capacity):
+    """Seconds to write stages together at `capacity` WCU/s, each key capped at PARTITION_WCU_LIMIT."""
+    per_partition = min(capacity, PARTITION_WCU_LIMIT)
+    return max(sum(partition_wcu) / capacity, max(wcu / per_partition for wcu in partition_wcu))
+
+
+def wall_seconds(plan, capacity, interleave=False):
+    """Estimated write time of the whole seed chain at `capacity` WCU/s."""
+    groups = INTERLEAVED_GROUPS if interleave else []
+    grouped = {partition for group in groups for partition in group}
+    seconds = sum(stage_seconds([stats["wcu"]], capacity)
+                  for partition, stats in plan.items() if partition not in grouped)
+    for group in groups:
+        wcu = [plan[partition]["wcu"] for partition in group if partition in plan]
+        if wcu:
+            seconds += stage_seconds(wcu, capacity)
+    return seconds
+
+
+def format_duration(seconds):
+    hours, rest = divmod(round(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def print_plan(plan, capacities, interleave, on_demand_price, provisioned_price):
+    total_items = sum(stats["items"] for stats in plan.values())
+    total_wcu = sum(stats["wcu"] for stats in plan.values())
+    print(f"  {'partition':<14} {'items':>12} {'avg B':>8} {'max B':>8} {'WCU/item':>9} {'WCU':>14}")
+    for partition, stats in plan.items():
+        print(f"  {partition:<14} {stats['items']:>12,} {stats['bytes'] / stats['items']:>8.0f} "
+              f"{stats['max_bytes']:>8,} {stats['wcu'] / stats['items']:>9.2f} {stats['wcu']:>14,}")
+    print(f"  {'total':<14} {total_items:>12,} {'':>8} {'':>8} {'':>9} {total_wcu:>14,}")
+
+    print(f"\n💰 On-demand: {total_wcu:,} write request units ≈ "
+          f"${total_wcu / 1e6 * on_demand_price:,.2f} (at ${on_demand_price}/million)")
+    mode = "interleaved" if interleave else "stage by stage"
+    print(f"\n⏱️  Wall time {mode} (provisioned cost for that long at ${provisioned_price}/WCU-hour):")
+    for capacity in capacities:
+        seconds = wall_seconds(plan, capacity, interleave)
+        cost = capacity * math.ceil(seconds / 3600) * provisioned_price
+        print(f"  {capacity:>8,} WCU/s  {format_duration(seconds):>12}  ≈ ${cost:,.2f}")
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate the WCU, wall time and cost of a seed run without calling AWS.")
+    parser.add_argument("--profile", choices=sorted(SCALE_PROFILES), default=DEFAULT_PROFILE,
+                        help="Scale profile to plan for (see scale_profiles.py)")
+    parser.add_argument("--students", type=int, default=None, help="Number of students (default: the profile's)")
+    parser.add_argument("--sample-students", type=int, default=DEFAULT_SAMPLE_STUDENTS,
+                        help="Students actually generated; larger runs are extrapolated from them")
+    parser.add_argument("--capacity", type=int, nargs="+", default=DEFAULT_CAPACITIES,
+                        help="Write capacities (WCU/s) to estimate the wall time for")
+    parser.add_argument("--interleave", action="store_true", help="Estimate for seed-all.py --interleave")
+    parser.add_argument("--processes", type=int, default=1, help="Generator processes for the student stage")
+    parser.add_argument("--columnar", action="store_true", help="Use the columnar NumPy student generator")
+    parser.add_argument("--on-demand-price", type=float, default=ON_DEMAND_PRICE_PER_MILLION_WRU,
+                        help="USD per million on-demand write request units")
+    parser.add_argument("--provisioned-price", type=float, default=PROVISIONED_PRICE_PER_WCU_HOUR,
+                        help="USD per provisioned WCU-hour")
+    args = parser.parse_args()
+
+    scale_profile = get_profile(args.profile)
+    number_of_students = args.students or scale_profile["students"]
+    sample_students = min(number_of_students, args.sample_students)
+    print(f"📊 Planning {number_of_students:,} students with the '{args.profile}' profile "
+          f"(measuring {sample_students:,}, no API calls)...")
+    sizes = measure_sample(sample_students, processes=args.processes, columnar=args.columnar)
+    print_plan(extrapolate(sizes, scale_profile, number_of_students, sample_students), args.capacity,
+               args.interleave, args.on_demand_price, args.provisioned_price)
+    print(f"\n(1 WCU = {WRITE_UNIT_BYTES} bytes of item, rounded up per item)")
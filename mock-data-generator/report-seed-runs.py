@@ -0,0 +1,94 @@
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_stamp import RUN_ID_ATTRIBUTE, TTL_ATTRIBUTE
+from partition_schema import SCHEMAS
+from seed_config import TABLE_NAME, get_dynamodb_client
+
+# --- Seed run report ---
+# Lists the seed runs stamped with --lifetime / --run-id (dataset_stamp.py)
+# that still have items in the table, with per-partition counts of:
+#
+# - live:    `ttl` in the future, or no `ttl` at all
+# - expired: `ttl` passed, waiting for DynamoDB's background TTL deletion
+#            (usually gone within a few days; reads still return them)
+#
+# Items without a `seedRunId` are counted as "(unstamped)". One parallel
+# segmented Scan reads only the partition key, `seedRunId` and `ttl`.
+# ---------------------------------------------
+
+TOTAL_SEGMENTS = 8 # Parallel scan segments (one scanning thread each)
+UNSTAMPED = "(unstamped)"
+
+dynamodb_client = get_dynamodb_client()
+
+
+def scan_segment(segment, total_segments, now):
+    """Counts one segment's items as {(run id, partition key, expiry or None, live): count}."""
+    counts = Counter()
+    paginator = dynamodb_client.get_paginator("scan")
+    for page in paginator.paginate(TableName=TABLE_NAME, ProjectionExpression="#pk, #run, #ttl",
+                                   ExpressionAttributeNames={"#pk": "partitionKey", "#run": RUN_ID_ATTRIBUTE,
+                                                             "#ttl": TTL_ATTRIBUTE},
+                                   Segment=segment, TotalSegments=total_segments):
+        for item in page.get("Items", []):
+            run_id = item.get(RUN_ID_ATTRIBUTE, {}).get("S", UNSTAMPED)
+            expires_at = int(item[TTL_ATTRIBUTE]["N"]) if TTL_ATTRIBUTE in item else None
+            live = expires_at is None or expires_at > now
+            counts[(run_id, item["partitionKey"]["S"], expires_at, live)] += 1
+    return counts
+
+
+def collect_runs(total_segments=TOTAL_SEGMENTS):
+    """
+    Scans the table and returns {run id: {"expires_at": latest ttl or None,
+    "partitions": {partition key: {"live": n, "expired": n}}}}.
+    """
+    now = time.time()
+    counts = Counter()
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        for segment_counts in pool.map(lambda segment: scan_segment(segment, total_segments, now), range(total_segments)):
+            counts.update(segment_counts)
+
+    runs = {}
+    for (run_id, partition_key, expires_at, live), count in counts.items():
+        run = runs.setdefault(run_id, {"expires_at": None, "partitions": {}})
+        if expires_at is not None:
+            run["expires_at"] = max(run["expires_at"] or 0, expires_at)
+        tally = run["partitions"].setdefault(partition_key, {"live": 0, "expired": 0})
+        tally["live" if live else "expired"] += count
+    return runs
+
+
+def print_runs(runs):
+    if not runs:
+        print("No items found.")
+        return
+    order = list(SCHEMAS)
+    for run_id in sorted(runs, key=lambda name: (name == UNSTAMPED, name)):
+        run = runs[run_id]
+        expires_at = run["expires_at"]
+        if expires_at is None:
+            expiry = "no expiry"
+        else:
+            state = "expires" if expires_at > time.time() else "expired"
+            expiry = f"{state} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires_at))}"
+        live = sum(tally["live"] for tally in run["partitions"].values())
+        expired = sum(tally["expired"] for tally in run["partitions"].values())
+        print(f"\n🏷️ {run_id}  ({expiry}): {live:,} live, {expired:,} awaiting TTL deletion")
+        partitions = sorted(run["partitions"].items(),
+                            key=lambda entry: order.index(entry[0]) if entry[0] in order else len(order))
+        for partition_key, tally in partitions:
+            print(f"  {partition_key:<14} {tally['live']:>12,} live {tally['expired']:>12,} expired")
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count the live and expired items of every stamped seed run.")
+    parser.add_argument("--segments", type=int, default=TOTAL_SEGMENTS, help="Parallel scan segments")
+    args = parser.parse_args()
+
+    print(f"🔍 Scanning '{TABLE_NAME}' with {args.segments} segments (partition key, {RUN_ID_ATTRIBUTE} and {TTL_ATTRIBUTE} only)...")
+    print_runs(collect_runs(args.segments))
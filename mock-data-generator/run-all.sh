@@ -1,29 +1,11 @@
 #!/bin/bash
 
-# This script runs all the mock data generator scripts in the correct order.
+# This script runs all the mock data generator stages in the correct order.
+# seed-all.py runs every stage in one Python process with one shared DynamoDB
+# client, handing each stage's written items to its dependents in memory.
+# Extra arguments are passed through, e.g. ./run-all.sh --students 1000
 
-echo "Running 1-students-seed.py..."
-python 1-students-seed.py
-
-echo "Running 2-venues-seed.py..."
-python 2-venues-seed.py
-
-echo "Running 3-bank-seed.py..."
-python 3-bank-seed.py
-
-echo "Running 4-exam-seed.py..."
-python 4-exam-seed.py
-
-echo "Running 5-examhold-seed.py..."
-python 5-examhold-seed.py
-
-echo "Running 6-application-seed.py..."
-python 6-application-seed.py
-
-echo "Running 7-payment-seed.py..."
-python 7-payment-seed.py
-
-echo "Running 8-certification-seed.py..."
-python 8-certification-seed.py
+echo "Running seed-all.py..."
+python seed-all.py "$@"
 
 echo "All mock data generation scripts have been executed."
@@ -0,0 +1,254 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from pipeline import run_pipeline
+
+# --- Crash-safe run journal ---
+# A seed run that dies halfway (expired credentials, laptop sleep, a
+# throttling storm) used to start over. Rerunning then failed on every
+# existing item (PartiQL INSERT) or created duplicates under new sortKeys
+# (BatchWriteItem).
+#
+# Seeded runs are deterministic (see snapshot_cache.py), so replaying a stage
+# only needs the seed and the settings of the run, plus which items were
+# already acknowledged by DynamoDB. Each run keeps a directory:
+#
+#   journal/<run id>/run.json         seed-all settings and master seed
+#   journal/<run id>/<STAGE>.jsonl    append-only, one line per acknowledged
+#                                     batch: {"acked": [[start, end], ...]}
+#                                     (positions in the stage's item stream),
+#                                     then {"complete": true}
+#
+# On resume every stage regenerates its items from the same seed and skips
+# the acknowledged positions, so finished batches are never written again.
+# Lines are flushed as soon as a batch is acknowledged and fsynced at most
+# every FSYNC_INTERVAL seconds. A torn last line from a crash is ignored, and
+# its batch is simply written again (same keys, so nothing is duplicated).
+# ---------------------------------------------
+
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "journal")
+FSYNC_INTERVAL = 1.0  # Seconds between fsyncs of the journal files
+JOURNAL_WRITER_THREADS = 4  # Threads sending batches for put_items() when the writer has no in_flight
+SKIPPED_BUFFER_SIZE = 1000  # Skipped items handed to a pending() callback at a time
+
+
+class StageJournal:
+    """Acknowledged positions of one stage's item stream, backed by an append-only JSON-lines file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.acked = bytearray()  # Bitmap of acknowledged positions
+        self.acked_count = 0
+        self.complete = False
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+        self.file = open(path, "a", encoding="utf-8")
+        self.synced = time.monotonic()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn last line of a crashed run
+                for start, end in entry.get("acked", []):
+                    for position in range(start, end):
+                        self._mark(position)
+                self.complete = self.complete or entry.get("complete", False)
+
+    def _mark(self, position):
+        byte, bit = divmod(position, 8)
+        if byte >= len(self.acked):
+            self.acked.extend(bytes(byte - len(self.acked) + 1))
+        if not self.acked[byte] & (1 << bit):
+            self.acked[byte] |= 1 << bit
+            self.acked_count += 1
+
+    def is_acked(self, position):
+        byte, bit = divmod(position, 8)
+        return byte < len(self.acked) and bool(self.acked[byte] & (1 << bit))
+
+    def append(self, positions):
+        """Journals a batch of acknowledged positions as ranges."""
+        ranges = []
+        for position in sorted(positions):
+            if ranges and ranges[-1][1] == position:
+                ranges[-1][1] = position + 1
+            else:
+                ranges.append([position, position + 1])
+        self._write({"acked": ranges})
+        with self.lock:
+            for position in positions:
+                self._mark(position)
+
+    def mark_complete(self):
+        self._write({"complete": True})
+        self.complete = True
+
+    def _write(self, entry):
+        with self.lock:
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            if time.monotonic() - self.synced >= FSYNC_INTERVAL:
+                os.fsync(self.file.fileno())
+                self.synced = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+
+
+class RunJournal:
+    """The journals of one seed run; pass it to the stages' run_stage(journal=...)."""
+
+    def __init__(self, run_dir, settings):
+        self.run_dir = run_dir
+        self.settings = settings
+        self.stages = {}
+        self.in_flight = {}  # id(item) -> (StageJournal, position) for items being written
+        self.lock = threading.Lock()
+
+    @classmethod
+    def start(cls, settings, journal_dir=JOURNAL_DIR):
+        """Creates a new run directory recording `settings` (everything needed to replay the run)."""
+        run_id = time.strftime("%Y%m%d-%H%M%S")
+        run_dir = os.path.join(journal_dir, run_id)
+        os.makedirs(run_dir)
+        with open(os.path.join(run_dir, "run.json"), "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=2)
+        print(f"📝 Journaling run '{run_id}' to {run_dir} (resume it with --resume)")
+        return cls(run_dir, settings)
+
+    @classmethod
+    def resume(cls, run_id=None, journal_dir=JOURNAL_DIR):
+        """Opens the run `run_id`, or the latest unfinished run. Returns None if there is none."""
+        runs = sorted(os.listdir(journal_dir)) if os.path.isdir(journal_dir) else []
+        if run_id is None and runs:
+            run_id = runs[-1]
+        if run_id not in runs:
+            return None
+        run_dir = os.path.join(journal_dir, run_id)
+        with open(os.path.join(run_dir, "run.json"), encoding="utf-8") as f:
+            settings = json.load(f)
+        journal = cls(run_dir, settings)
+        for name in sorted(os.listdir(run_dir)):
+            if name.endswith(".jsonl"):
+                stage = journal.stage(name[:-len(".jsonl")])
+                state = "complete" if stage.complete else f"{stage.acked_count} items acknowledged"
+                print(f"  {name[:-len('.jsonl')]:<14} {state}")
+        return journal
+
+    def stage(self, name):
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = StageJournal(os.path.join(self.run_dir, f"{name}.jsonl"))
+            return self.stages[name]
+
+    def pending(self, stage_name, items, skipped=None):
+        """
+        Yields the items of a stage that were not acknowledged yet. The whole stream is
+        always consumed, so wrappers that collect parents still see it. With `skipped`,
+        the items an earlier attempt acknowledged are passed to it in lists.
+        """
+        stage = self.stage(stage_name)
+        buffer = []
+        for position, item in enumerate(items):
+            if stage.complete or stage.is_acked(position):
+                if skipped is not None:
+                    buffer.append(item)
+                    if len(buffer) >= SKIPPED_BUFFER_SIZE:
+                        skipped(buffer)
+                        buffer = []
+                continue
+            with self.lock:
+                self.in_flight[id(item)] = (stage, position)
+            yield item
+        if buffer:
+            skipped(buffer)
+
+    def acknowledge(self, items, succeeded):
+        """
+        Journals a written batch and returns True. Partly failed batches are not
+        journaled (returns False), so a resume writes them again.
+        """
+        by_stage = {}
+        with self.lock:
+            for item in items:
+                stage, position = self.in_flight.pop(id(item))
+                by_stage.setdefault(stage, []).append(position)
+        if succeeded != len(items):
+            return False
+        for stage, positions in by_stage.items():
+            stage.append(positions)
+        return True
+
+    def complete(self, stage_name):
+        self.stage(stage_name).mark_complete()
+
+    def incomplete(self):
+        """Names of the stages not marked complete, i.e. with batches that failed or were never written."""
+        return sorted(name for name, stage in self.stages.items() if not stage.complete)
+
+    def writer(self, writer, stage_names):
+        """Wraps `writer` so its batches are journaled and `stage_names` are marked complete on close()."""
+        return JournaledWriter(writer, self, stage_names)
+
+    def close(self):
+        for stage in self.stages.values():
+            stage.close()
+
+    def finish(self):
+        """Closes and deletes the journal of a run that completed."""
+        self.close()
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+
+class JournaledWriter:
+    """Wraps a writer so every acknowledged batch is journaled; otherwise behaves like the writer."""
+
+    def __init__(self, writer, journal, stage_names):
+        self.writer = writer
+        self.journal = journal
+        self.stage_names = stage_names
+        self.unacknowledged = 0  # Batches that partly failed; their stages stay incomplete
+
+    def write_batch(self, items):
+        succeeded = self.writer.write_batch(items)
+        if not self.journal.acknowledge(items, succeeded):
+            self.unacknowledged += 1
+        return succeeded
+
+    def put_items(self, items, total=None):
+        # Batch by batch, so each one is journaled as soon as it is acknowledged
+        written = []
+        workers = getattr(self.writer, "in_flight", None) or JOURNAL_WRITER_THREADS
+        run_pipeline([items], lambda batch: written.append(self.write_batch(batch)), workers=workers)
+        return sum(written)
+
+    def close(self):
+        self.writer.close()
+        if self.unacknowledged:
+            print(f"⚠️ {self.unacknowledged} batch(es) failed; --resume will write them again.")
+            return
+        for stage_name in self.stage_names:
+            self.journal.complete(stage_name)
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+def journaled(journal, stage_name, writer, items, skipped=None):
+    """
+    Returns (writer, items) that skip and journal acknowledged batches; unchanged without a journal.
+    With `skipped`, the items skipped because an earlier attempt wrote them are passed to it in lists.
+    """
+    if journal is None:
+        return writer, items
+    return journal.writer(writer, [stage_name]), journal.pending(stage_name, items, skipped)
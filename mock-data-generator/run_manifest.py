@@ -0,0 +1,169 @@
+import argparse
+import gzip
+import os
+import threading
+import time
+import zlib
+
+from dataset_stamp import get_dataset_stamp, new_run_id
+
+# --- Run manifests ---
+# Every seed run that writes to the table records the keys it wrote, so the
+# run can later be removed with teardown-run.py: a delete per written key,
+# with no Scan and no guessing from attributes such as `username`.
+#
+#   manifests/<run id>/<PARTITION>.<attempt>.keys.gz   one sortKey per line, gzipped
+#
+# The partition key is the file name, so a line is just the 36-character
+# sortKey (about 20 bytes per key once compressed). Keys are recorded before
+# their batch is sent and flushed at most every FLUSH_INTERVAL seconds.
+# Every process writes its own files (the attempt is its start time and pid),
+# so the stages of one run and seed-all.py --resume share one manifest
+# directory without appending to each other's files. After a crash a file
+# ends in a torn gzip member; readers stop there and go on with the next file.
+# Keys of batches that failed are recorded too; deleting a key that was
+# never written is a no-op.
+#
+# The run id is the --run-id / start time of the dataset stamp when there is
+# one (dataset_stamp.py), otherwise the start time. --no-manifest turns
+# recording off; exports (--export-dir) never record.
+# ---------------------------------------------
+
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manifests")
+MANIFEST_SUFFIX = ".keys.gz"
+FLUSH_INTERVAL = 1.0  # Seconds between flushes of the manifest files
+RECORD_BUFFER_SIZE = 1000  # Items buffered before recording while streaming put_items()
+
+
+class RunManifest:
+    """The keys one seed run wrote, one gzipped sortKey list per partition under `manifest_dir/<run id>/`."""
+
+    def __init__(self, run_id, manifest_dir=MANIFEST_DIR):
+        self.run_id = run_id
+        self.run_dir = os.path.join(manifest_dir, run_id)
+        self.attempt = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"  # Names this process's files
+        self.files = {}  # partition key -> open text stream
+        self.lock = threading.Lock()
+        self.flushed = time.monotonic()
+
+    def record(self, items):
+        """Appends the sortKeys of written low-level items to their partitions' files."""
+        by_partition = {}
+        for item in items:
+            by_partition.setdefault(item["partitionKey"]["S"], []).append(item["sortKey"]["S"] + "\n")
+        with self.lock:
+            for partition_key, lines in by_partition.items():
+                self._file(partition_key).write("".join(lines))
+            if time.monotonic() - self.flushed >= FLUSH_INTERVAL:
+                for manifest_file in self.files.values():
+                    manifest_file.flush()
+                self.flushed = time.monotonic()
+
+    def close(self):
+        """Completes the open files; later records append new gzip members to them."""
+        with self.lock:
+            for manifest_file in self.files.values():
+                manifest_file.close()
+            self.files = {}
+
+    def writer(self, writer):
+        return ManifestWriter(writer, self)
+
+    def _file(self, partition_key):
+        if partition_key not in self.files:
+            os.makedirs(self.run_dir, exist_ok=True)
+            path = os.path.join(self.run_dir, f"{partition_key}.{self.attempt}{MANIFEST_SUFFIX}")
+            self.files[partition_key] = gzip.open(path, "at", encoding="utf-8")
+        return self.files[partition_key]
+
+
+class ManifestWriter:
+    """Wraps a writer so the keys of every batch it writes are recorded; otherwise behaves like the writer."""
+
+    def __init__(self, writer, manifest):
+        self.writer = writer
+        self.manifest = manifest
+
+    def write_batch(self, items):
+        self.manifest.record(items)  # Before the write, so a crash mid-batch still leaves the keys to tear down
+        return self.writer.write_batch(items)
+
+    def put_items(self, items, total=None):
+        return self.writer.put_items(self._recording(items), total=total)
+
+    def close(self):
+        self.writer.close()
+        self.manifest.close()
+
+    def _recording(self, items):
+        # Every item is recorded before it is handed to the writer
+        buffer = []
+        for item in items:
+            buffer.append(item)
+            if len(buffer) >= RECORD_BUFFER_SIZE:
+                self.manifest.record(buffer)
+                yield from buffer
+                buffer = []
+        self.manifest.record(buffer)
+        yield from buffer
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+def _manifest_files(run_dir):
+    """{partition key: manifest file names} in `run_dir`, every attempt's files in name order."""
+    files = {}
+    for name in sorted(os.listdir(run_dir)):
+        if name.endswith(MANIFEST_SUFFIX):
+            files.setdefault(name[:-len(MANIFEST_SUFFIX)].split(".")[0], []).append(name)
+    return files
+
+
+def manifest_partitions(run_dir):
+    """Partition keys that have a manifest file in `run_dir`."""
+    return sorted(_manifest_files(run_dir))
+
+
+def read_manifest(run_dir, partition_key):
+    """Yields the sortKeys recorded for a partition by every attempt, skipping the torn end a crash leaves in a file."""
+    for name in _manifest_files(run_dir).get(partition_key, []):
+        try:
+            with gzip.open(os.path.join(run_dir, name), "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield line[:-1]
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            continue
+
+
+def manifest_from_argv():
+    """Reads an optional `--no-manifest` flag; returns this run's RunManifest, or None when turned off."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--no-manifest", action="store_true")
+    args, _ = parser.parse_known_args()
+    if args.no_manifest:
+        return None
+    stamp = get_dataset_stamp()
+    return RunManifest(stamp.run_id if stamp else new_run_id())
+
+
+_UNSET = object()
+_run_manifest = _UNSET
+
+
+def get_run_manifest():
+    """Returns the manifest of this process's run (created on first use), or None when recording is off."""
+    global _run_manifest
+    if _run_manifest is _UNSET:
+        _run_manifest = manifest_from_argv()
+        if _run_manifest:
+            print(f"🧾 Recording written keys to {_run_manifest.run_dir} "
+                  f"(remove them with: python3 teardown-run.py {_run_manifest.run_id})")
+    return _run_manifest
+
+
+def set_run_manifest(manifest):
+    """Makes get_run_manifest() return `manifest` (a RunManifest or None) from now on."""
+    global _run_manifest
+    _run_manifest = manifest
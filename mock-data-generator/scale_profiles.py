@@ -0,0 +1,118 @@
+import argparse
+import bisect
+import itertools
+import random
+
+# --- Named scale profiles ---
+# A profile sets the root counts and the per-parent fan-out of every
+# partition, so the whole chain generates a consistently shaped dataset:
+#
+#   students                  STUDENT items
+#   exam_holds                EXAM_HOLD items (spread over the EXAM items)
+#   applications_per_student  {applications: weight} drawn for each student
+#   exam_hold_skew            Zipf exponent for which exam hold an application
+#                             targets (0 = uniform, >1 = a few sessions get
+#                             most applications, like real peak days)
+#   payments_per_application  {payments: weight} drawn for each application
+#                             (all but the last attempt failed and were retried)
+#
+# CERTIFICATION keeps its rule of one per application with a completed
+# payment (about a third of them). Every seed script accepts --profile NAME.
+# ---------------------------------------------
+
+DEFAULT_PROFILE = "small"
+
+SCALE_PROFILES = {
+    # Today's behaviour: one application per student, one payment each
+    "small": {
+        "students": 100,
+        "exam_holds": 5,
+        "applications_per_student": {1: 1.0},
+        "exam_hold_skew": 0.0,
+        "payments_per_application": {1: 1.0},
+    },
+    # Shaped like production: some students never apply, popular sessions dominate
+    "prod-like": {
+        "students": 1000000,
+        "exam_holds": 200,
+        "applications_per_student": {0: 0.15, 1: 0.55, 2: 0.20, 3: 0.07, 4: 0.03},
+        "exam_hold_skew": 1.1,
+        "payments_per_application": {1: 0.92, 2: 0.07, 3: 0.01},
+    },
+    # Ten times a peak registration period (about 20M items in total)
+    "10x-peak": {
+        "students": 3000000,
+        "exam_holds": 500,
+        "applications_per_student": {1: 0.30, 2: 0.35, 3: 0.20, 4: 0.10, 6: 0.05},
+        "exam_hold_skew": 1.3,
+        "payments_per_application": {1: 0.85, 2: 0.12, 3: 0.03},
+    },
+}
+
+COMPLETED_PAYMENT_SHARE = 1 / 3  # Applications pick their paymentStatus from three values
+
+
+def get_profile(name):
+    """Returns the profile dict for `name`."""
+    if name not in SCALE_PROFILES:
+        raise ValueError(f"Unknown scale profile '{name}'. Choose one of: {', '.join(SCALE_PROFILES)}")
+    return SCALE_PROFILES[name]
+
+
+def profile_from_argv(default=DEFAULT_PROFILE):
+    """Reads an optional `--profile` flag from the command line and returns that profile."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", choices=sorted(SCALE_PROFILES), default=default)
+    args, _ = parser.parse_known_args()
+    return get_profile(args.profile)
+
+
+class FanOut:
+    """Draws child counts from a {count: weight} distribution using `rng` (default: the `random` module)."""
+
+    def __init__(self, distribution, rng=random):
+        self.rng = rng
+        self.counts = list(distribution)
+        self.weights = list(distribution.values())
+        self.cum_weights = list(itertools.accumulate(self.weights))
+
+    def draw(self):
+        return self.rng.choices(self.counts, cum_weights=self.cum_weights)[0]
+
+    def mean(self):
+        return sum(count * weight for count, weight in zip(self.counts, self.weights)) / sum(self.weights)
+
+
+class SkewedChoice:
+    """Picks list elements with Zipf-like popularity: element i has weight 1 / (i + 1) ** exponent."""
+
+    def __init__(self, elements, exponent=0.0, rng=random):
+        self.rng = rng
+        self.elements = elements
+        self.cum_weights = list(itertools.accumulate(1 / (i + 1) ** exponent for i in range(len(elements))))
+
+    def pick(self):
+        position = bisect.bisect(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+        return self.elements[min(position, len(self.elements) - 1)]
+
+
+def expected_items(profile, students=None):
+    """Expected item count per generated partition for a profile (hardcoded partitions excluded)."""
+    students = profile["students"] if students is None else students
+    applications = students * FanOut(profile["applications_per_student"]).mean()
+    return {
+        "STUDENT": students,
+        "EXAM_HOLD": profile["exam_holds"],
+        "APPLICATION": round(applications),
+        "PAYMENT": round(applications * FanOut(profile["payments_per_application"]).mean()),
+        "CERTIFICATION": round(applications * COMPLETED_PAYMENT_SHARE),
+    }
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    for profile_name, scale_profile in SCALE_PROFILES.items():
+        counts = expected_items(scale_profile)
+        print(f"{profile_name} (~{sum(counts.values()):,} items)")
+        for partition, count in counts.items():
+            print(f"  {partition:<14} {count:>12,}")
@@ -0,0 +1,293 @@
+import argparse
+import importlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from async_engine import DEFAULT_IN_FLIGHT, in_flight_from_argv
+from bulk_writer import DEFAULT_TARGET_WCU, PARTITION_WCU_LIMIT, create_writer
+from dataset_stamp import DatasetStamp, get_dataset_stamp, parse_lifetime, set_dataset_stamp
+from parallel_generation import derive_seed
+from parent_index import ParentIndex
+from partition_scheduler import WRITER_THREADS, write_interleaved
+from run_journal import RunJournal
+from run_manifest import RunManifest, get_run_manifest, set_run_manifest
+from scale_profiles import DEFAULT_PROFILE, SCALE_PROFILES, expected_items, get_profile
+from seed_config import TABLE_NAME, get_dynamodb_client
+from snapshot_cache import SCHEMA_SOURCES, set_snapshot_cache, source_fingerprint
+from write_backends import BACKENDS, backend_from_argv
+
+# --- Single-process seeding orchestrator ---
+# Runs all eight seed stages in order inside one Python process that shares one
+# DynamoDB client (seed_config.get_dynamodb_client). The parent stages'
+# run_stage() returns the parent rows their children read, and those are
+# handed straight to the stages that depend on them:
+#
+#   STUDENT ─────────────────────────────┐
+#   EXAM_PLACE ──────────┐               ├─> APPLICATION ─┬─> PAYMENT
+#   BANK_ACCOUNT ─> EXAM ┴─> EXAM_HOLD ──┘                └─> CERTIFICATION
+#
+# Applications are too many to hold: they are recorded in a ParentIndex
+# (parent_index.py) private to the run, in a temporary directory, and the
+# PAYMENT and CERTIFICATION generators stream them from it page by page. The
+# leaf stages' items stream into their writers and are never listed.
+#
+# Nothing is read back from the table, so this also works with --export-dir to
+# produce a complete, consistent dataset offline.
+#
+# With --seed every stage gets its own seed derived from the master seed, so
+# the whole dataset is reproducible and each stage's output is cached
+# (snapshot_cache.py): an identical rerun streams cached items instead of
+# generating them again.
+#
+# With --interleave the independent stages are written together instead of
+# one after the other (partition_scheduler.py): STUDENT, EXAM_PLACE and
+# BANK_ACCOUNT share every batch, then PAYMENT and CERTIFICATION do. Each
+# partition key is paced on its own, up to PARTITION_WCU_LIMIT, while
+# --target-wcu caps the table as a whole.
+#
+# Table runs are journaled (run_journal.py): if one dies, --resume replays it
+# from the recorded master seed and skips every batch DynamoDB acknowledged.
+#
+# With --lifetime every item gets a `ttl` and a `seedRunId` (dataset_stamp.py),
+# so the dataset expires on its own instead of needing delete-all.py. The keys
+# every table run writes are recorded in a manifest (run_manifest.py), which
+# teardown-run.py deletes without scanning the table.
+# ---------------------------------------------
+
+INTERLEAVE_BACKEND = backend_from_argv("batch_write") # Backend of the shared interleaved writer
+IN_FLIGHT = in_flight_from_argv() # --in-flight N also applies to the interleaved writer
+# Everything that shapes the generated items; a resume refuses to continue if it changed
+GENERATOR_FINGERPRINT = source_fingerprint(
+    "1-students-seed.py", "2-venues-seed.py", "3-bank-seed.py", "4-exam-seed.py", "5-examhold-seed.py",
+    "6-application-seed.py", "7-payment-seed.py", "8-certification-seed.py", "student_columns.py",
+    "parallel_generation.py", "scale_profiles.py", *SCHEMA_SOURCES)
+
+
+def load_stage(module_name):
+    """Imports a numbered seed script (e.g. '4-exam-seed') as a module."""
+    return importlib.import_module(module_name)
+
+
+def write_stages_interleaved(sources, target_wcu=None, journal=None):
+    """
+    Writes independent stages' items through one writer that paces every partition key separately.
+    Acknowledged items are recorded in the parent index by the writer, like in the stages themselves.
+
+    Args:
+        sources (dict): {partition key value: iterable of low-level items}.
+        target_wcu (int, optional): Capacity of the whole table; defaults to DEFAULT_TARGET_WCU per partition.
+        journal (RunJournal, optional): Skips and journals acknowledged batches (run_journal.py).
+    """
+    writer = create_writer(get_dynamodb_client(), TABLE_NAME, "+".join(sources), in_flight=IN_FLIGHT,
+                           target_wcu=target_wcu or DEFAULT_TARGET_WCU * len(sources),
+                           partition_wcu=PARTITION_WCU_LIMIT, backend=INTERLEAVE_BACKEND)
+    if journal:
+        writer = journal.writer(writer, list(sources))
+        sources = {partition_key: journal.pending(partition_key, items) for partition_key, items in sources.items()}
+    print(f"Interleaving {', '.join(sources)} in every batch...")
+    write_interleaved(writer, sources, workers=IN_FLIGHT or WRITER_THREADS)
+    writer.close()
+    writer.print_summary()
+
+
+def seed_all(number_of_students, target_wcu=None, processes=1, columnar=False, master_seed=None,
+             measure_stage=None, interleave=False, journal=None):
+    """
+    Runs every stage in dependency order, passing parent items in memory and streaming the
+    applications from a run-scoped parent index. Returns seconds per stage.
+
+    Args:
+        measure_stage (callable, optional): Called as measure_stage(name, run) around each
+            stage; it must call run() and return its result (see benchmark-seeding.py).
+        interleave (bool): Write independent stages together (see partition_scheduler.py).
+            Table writes only; not for --export-dir.
+        journal (RunJournal, optional): Journals acknowledged batches, and skips those an
+            earlier attempt of the same run wrote (see run_journal.py). Table writes only.
+    """
+    students_stage = load_stage("1-students-seed")
+    venues_stage = load_stage("2-venues-seed")
+    bank_stage = load_stage("3-bank-seed")
+    exam_stage = load_stage("4-exam-seed")
+    examhold_stage = load_stage("5-examhold-seed")
+    application_stage = load_stage("6-application-seed")
+    payment_stage = load_stage("7-payment-seed")
+    certification_stage = load_stage("8-certification-seed")
+
+    if target_wcu:
+        for stage in (venues_stage, bank_stage, exam_stage, examhold_stage, application_stage,
+                      payment_stage, certification_stage):
+            stage.TARGET_WCU = target_wcu
+
+    def stage_seed(stage_number):
+        return None if master_seed is None else derive_seed(master_seed, stage_number, 0)
+
+    timings = {}
+
+    def timed(name, run):
+        print(f"\n===== {name} =====")
+        started = time.perf_counter()
+        result = measure_stage(name, run) if measure_stage else run()
+        timings[name] = time.perf_counter() - started
+        return result
+
+    student_options = {"processes": processes, "columnar": columnar, "master_seed": master_seed, "journal": journal}
+    if target_wcu:
+        student_options["target_wcu"] = target_wcu
+    if interleave:
+        def seed_roots():
+            # The hardcoded stages are generated up front: the student generator is lazy
+            # and reseeding `random` while it runs would change the students
+            venues = venues_stage.generate_stage(seed=stage_seed(2))
+            bank_accounts = bank_stage.generate_stage(seed=stage_seed(3))
+            students = []
+            student_items = students_stage.generate_stage(number_of_students, processes=processes,
+                                                          master_seed=master_seed, columnar=columnar)
+            write_stages_interleaved({
+                "STUDENT": students_stage.collect_parent_attributes(student_items, students),
+                "EXAM_PLACE": [venues_stage.serialize_record(venue) for venue in venues],
+                "BANK_ACCOUNT": [bank_stage.serialize_record(account) for account in bank_accounts],
+            }, target_wcu, journal)
+            return students, venues, bank_accounts
+
+        students, venues, bank_accounts = timed("STUDENT+EXAM_PLACE+BANK_ACCOUNT", seed_roots)
+    else:
+        students = timed("STUDENT", lambda: students_stage.run_stage(number_of_students, **student_options))
+        venues = timed("EXAM_PLACE", lambda: venues_stage.run_stage(seed=stage_seed(2), journal=journal))
+        bank_accounts = timed("BANK_ACCOUNT", lambda: bank_stage.run_stage(seed=stage_seed(3), journal=journal))
+
+    bank_ids = [account["sortKey"] for account in bank_accounts]
+    exams = timed("EXAM", lambda: exam_stage.run_stage(bank_ids, seed=stage_seed(4), journal=journal))
+
+    # Stage 5 works on plain Python dicts, as if it had queried and deserialized the exams
+    deserializer = TypeDeserializer()
+    plain_exams = [deserializer.deserialize({"M": exam}) for exam in exams]
+    exam_holds = timed("EXAM_HOLD", lambda: examhold_stage.run_stage(plain_exams, venues, seed=stage_seed(5),
+                                                                     journal=journal))
+
+    # Only this run's applications: the shared index also holds those of earlier runs and records nothing on export
+    with tempfile.TemporaryDirectory(prefix="seed-all-") as scratch_dir:
+        run_index = ParentIndex(os.path.join(scratch_dir, "applications.sqlite3"))
+        timed("APPLICATION", lambda: application_stage.run_stage(students, exam_holds, seed=stage_seed(6),
+                                                                 journal=journal, index=run_index))
+        applications = run_index.partition("APPLICATION")
+        if journal and "APPLICATION" in journal.incomplete():
+            # Only acknowledged applications are indexed; the resume writes every leaf of the full set
+            print("⚠️ Skipping PAYMENT and CERTIFICATION until the failed APPLICATION batches are written.")
+        elif interleave:
+            timed("PAYMENT+CERTIFICATION", lambda: write_stages_interleaved({
+                "PAYMENT": payment_stage.generate_stage(applications, seed=stage_seed(7)),
+                "CERTIFICATION": certification_stage.generate_stage(applications, seed=stage_seed(8)),
+            }, target_wcu, journal))
+        else:
+            timed("PAYMENT", lambda: payment_stage.run_stage(applications, seed=stage_seed(7), journal=journal))
+            timed("CERTIFICATION", lambda: certification_stage.run_stage(applications, seed=stage_seed(8),
+                                                                         journal=journal))
+        run_index.close()
+    return timings
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every seed stage in one process, passing parent keys in memory.")
+    parser.add_argument("--profile", choices=sorted(SCALE_PROFILES), default=DEFAULT_PROFILE,
+                        help="Scale profile: counts and fan-out of every partition (see scale_profiles.py)")
+    parser.add_argument("--students", type=int, default=None, help="Number of students (default: the profile's)")
+    parser.add_argument("--target-wcu", type=int, default=None, help="Write capacity every stage paces towards")
+    parser.add_argument("--processes", type=int, default=1, help="Generator processes for the student stage")
+    parser.add_argument("--columnar", action="store_true", help="Use the columnar NumPy student generator")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed; makes the dataset reproducible and cached")
+    parser.add_argument("--no-cache", action="store_true", help="Always generate, never read or write snapshots")
+    parser.add_argument("--interleave", action="store_true",
+                        help="Write independent stages together, pacing each partition key separately")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help="Continue an interrupted run (default: the latest) without rewriting finished batches")
+    # Read by each stage module itself; declared here so they show up in --help
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Write backend for every stage")
+    parser.add_argument("--export-dir", help="Write gzipped DynamoDB JSON import files instead of calling the API")
+    parser.add_argument("--in-flight", type=int, nargs="?", const=DEFAULT_IN_FLIGHT,
+                        help="Batch requests kept in flight by the asyncio engine (needs aiobotocore)")
+    parser.add_argument("--lifetime", type=parse_lifetime,
+                        help="Stamp a TTL (e.g. 12h, 7d) and a seedRunId on every item so the data expires on its own")
+    parser.add_argument("--run-id", help="seedRunId to stamp and manifest name (default: the start time)")
+    parser.add_argument("--no-manifest", action="store_true", help="Do not record the written keys for teardown-run.py")
+    parser.add_argument("--metrics-dir", help="Write seed_metrics.prom / seed_metrics.json (Prometheus textfile, JSON) here")
+    args = parser.parse_args()
+    if args.no_cache:
+        set_snapshot_cache(None)
+    if args.interleave and args.export_dir:
+        print("⚠️ --interleave only applies to table writes; exporting the stages one after the other.")
+        args.interleave = False
+
+    run_journal = None
+    if args.resume:
+        if args.export_dir:
+            sys.exit("❌ --resume only applies to table writes, not to --export-dir.")
+        run_journal = RunJournal.resume(None if args.resume == "latest" else args.resume)
+        if run_journal is None:
+            sys.exit("❌ No interrupted run to resume.")
+        settings = run_journal.settings
+        if settings["generator"] != GENERATOR_FINGERPRINT:
+            sys.exit("❌ The seed scripts changed since this run started, so a resume would write different items.")
+        if settings["profile"] != args.profile:
+            # The stages read --profile themselves, so it has to be given again
+            sys.exit(f"❌ Resume with the run's profile: --profile {settings['profile']}")
+        args.students, args.seed = settings["students"], settings["seed"]
+        args.processes, args.columnar, args.interleave = settings["processes"], settings["columnar"], settings["interleave"]
+        args.target_wcu = settings["target_wcu"]
+        if not settings.get("cached", True):
+            set_snapshot_cache(None)  # Like the interrupted attempt, whose seed was generated
+        if settings.get("stamp"):
+            # The same ttl and seedRunId as the interrupted attempt
+            set_dataset_stamp(DatasetStamp.from_settings(settings["stamp"]))
+            print(f"🏷️ Stamping every item with {get_dataset_stamp().describe()}")
+        else:
+            set_dataset_stamp(None)
+        # Keys written by the resume go to the interrupted attempt's manifest
+        set_run_manifest(RunManifest(settings["manifest"]) if settings.get("manifest") else None)
+    elif not args.export_dir:
+        dataset_stamp = get_dataset_stamp()
+        run_manifest = get_run_manifest()
+        cached = not args.no_cache
+        if args.seed is None:
+            set_snapshot_cache(None) # A random seed is never repeated, so there is nothing to cache
+            cached = False
+            args.seed = random.randrange(2**32)
+            print(f"Master seed: {args.seed}")
+        run_journal = RunJournal.start({
+            "profile": args.profile, "students": args.students or get_profile(args.profile)["students"],
+            "seed": args.seed, "cached": cached, "processes": args.processes, "columnar": args.columnar,
+            "interleave": args.interleave, "target_wcu": args.target_wcu, "generator": GENERATOR_FINGERPRINT,
+            "stamp": dataset_stamp.to_settings() if dataset_stamp else None,
+            "manifest": run_manifest.run_id if run_manifest else None,
+        })
+
+    number_of_students = args.students or get_profile(args.profile)["students"]
+    expected = expected_items(get_profile(args.profile), number_of_students)
+    print(f"🚀 Seeding all partitions with the '{args.profile}' profile in a single process "
+          f"(~{sum(expected.values()):,} items)...")
+    try:
+        stage_timings = seed_all(number_of_students, target_wcu=args.target_wcu, processes=args.processes,
+                                 columnar=args.columnar, master_seed=args.seed, interleave=args.interleave,
+                                 journal=run_journal)
+    except BaseException:
+        if run_journal:
+            run_journal.close()
+            print("\n⚠️ Run interrupted. Continue it with: python3 seed-all.py --resume")
+        raise
+    if run_journal:
+        incomplete = run_journal.incomplete()
+        if incomplete:
+            # Finishing would delete the journal, and with it the only record of what is missing
+            run_journal.close()
+            print(f"\n⚠️ Batches of {', '.join(incomplete)} failed. Write them with: python3 seed-all.py --resume")
+            sys.exit(1)
+        run_journal.finish()
+
+    print("\n✅ All stages complete.")
+    for stage_name, seconds in stage_timings.items():
+        print(f"  {stage_name:<14} {seconds:>8.1f}s")
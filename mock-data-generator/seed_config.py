@@ -0,0 +1,73 @@
+import os
+
+import boto3
+from botocore.config import Config
+
+# --- Shared configuration ---
+# Every script reads its table name and AWS settings from here. The DynamoDB
+# client is created on first use and then shared, so running several stages
+# in one process (see seed-all.py) reuses one session and one keep-alive
+# connection pool instead of building a new session per script.
+#
+# Set DYNAMODB_ENDPOINT_URL (e.g. http://localhost:8000 for DynamoDB Local) to
+# point every script at a local endpoint, or call set_dynamodb_client() before
+# importing the stages to hand them any client, such as local_dynamodb's fake.
+# ---------------------------------------------
+
+TABLE_NAME = "fossy_stg" # Your confirmed table name
+AWS_PROFILE_NAME = "asdf" # Add your profile name here
+AWS_REGION = "ap-northeast-1"
+MAX_POOL_CONNECTIONS = 50 # HTTP connections shared by all writer threads
+READ_RETRIES = {'max_attempts': 3, 'mode': 'standard'} # botocore retries of the shared client (scans, queries)
+WRITER_RETRIES = {'total_max_attempts': 1, 'mode': 'standard'} # One attempt: the batch writers retry and back off themselves
+DYNAMODB_ENDPOINT_URL = os.environ.get("DYNAMODB_ENDPOINT_URL") # Local endpoint override; None uses AWS
+# ---------------------
+
+_dynamodb_client = None
+_writer_client = None
+_session = None
+
+
+def _create_client(session, retries):
+    return session.client(
+        'dynamodb',
+        region_name=AWS_REGION,
+        endpoint_url=DYNAMODB_ENDPOINT_URL,
+        config=Config(max_pool_connections=MAX_POOL_CONNECTIONS, retries=retries),
+    )
+
+
+def get_dynamodb_client():
+    """Returns the shared DynamoDB client, creating it (and its session) on first use."""
+    global _dynamodb_client, _session
+    if _dynamodb_client is None:
+        if DYNAMODB_ENDPOINT_URL:
+            # Local endpoints accept any credentials, so no AWS profile is needed
+            print(f"Using local DynamoDB endpoint: {DYNAMODB_ENDPOINT_URL}")
+            _session = boto3.Session(aws_access_key_id="local", aws_secret_access_key="local")
+        else:
+            print(f"Using AWS Profile: {AWS_PROFILE_NAME}")
+            _session = boto3.Session(profile_name=AWS_PROFILE_NAME)
+        _dynamodb_client = _create_client(_session, READ_RETRIES)
+    return _dynamodb_client
+
+
+def writer_client_for(client):
+    """
+    Returns the client a batch writer should send with: for the shared client, a twin from
+    the same session with WRITER_RETRIES; any other client (e.g. a fake) unchanged.
+    """
+    global _writer_client
+    if client is not _dynamodb_client or _session is None:
+        return client
+    if _writer_client is None:
+        _writer_client = _create_client(_session, WRITER_RETRIES)
+    return _writer_client
+
+
+def set_dynamodb_client(client):
+    """Makes get_dynamodb_client() return `client` from now on. Call it before importing the stages."""
+    global _dynamodb_client, _writer_client, _session
+    _dynamodb_client = client
+    _writer_client = None
+    _session = None
@@ -0,0 +1,288 @@
+import argparse
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+# --- Seeding metrics ---
+# The shared write path (bulk_writer.AdaptiveBatchWriter and its asyncio
+# subclass) and the shared read path (parent_index.py rebuilds) report here
+# instead of printing a line per batch. Per stage:
+#
+# - request latency histogram (one observation per send, retries included)
+# - consumed WCU (ReturnConsumedCapacity), throttled requests, retries
+# - items succeeded / failed, and items/s
+#
+# and per stage and partition key: items sent and items DynamoDB returned as
+# unprocessed. Reads are counted per partition (pages, items, page latency).
+#
+# With --metrics-dir DIR every seed script also writes, at most every
+# FLUSH_INTERVAL seconds and once more on exit:
+#
+#   DIR/seed_metrics.prom   Prometheus text format, for node_exporter's
+#                           textfile collector (written atomically)
+#   DIR/seed_metrics.json   the same numbers as a JSON summary
+#
+# Console progress lines of the writers are limited to one every
+# PROGRESS_INTERVAL seconds (bulk_writer.py).
+# ---------------------------------------------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+FLUSH_INTERVAL = 10.0  # Seconds between metric file writes while a run is going
+PROM_FILE = "seed_metrics.prom"
+JSON_FILE = "seed_metrics.json"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with +Inf."""
+        running = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None without observations)."""
+        if not self.count:
+            return None
+        for bound, running in self.cumulative():
+            if running >= q * self.count:
+                return bound
+        return float("inf")
+
+
+class _StageStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.requests = 0
+        self.consumed_wcu = 0.0
+        self.throttles = 0
+        self.retries = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.partitions = {}  # partition key -> {"sent": n, "unprocessed": n}
+        self.started = time.monotonic()
+        self.last = self.started
+
+
+class _ReadStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.pages = 0
+        self.items = 0
+
+
+class SeedMetrics:
+    """Thread-safe collector of write and read metrics, optionally flushed to `metrics_dir`."""
+
+    def __init__(self, metrics_dir=None, flush_interval=FLUSH_INTERVAL):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.stages = {}  # stage -> _StageStats
+        self.reads = {}  # (operation, partition key) -> _ReadStats
+        self.lock = threading.Lock()
+        self.flushed = time.monotonic()
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+            atexit.register(self.flush)
+
+    # --- Recording ---
+
+    def record_request(self, stage, seconds, consumed, sent, unprocessed):
+        """
+        One send of a batch. `sent` and `unprocessed` are {partition key: item count};
+        a request with unprocessed items counts as throttled.
+        """
+        with self.lock:
+            stats = self._stage(stage)
+            stats.latency.observe(seconds)
+            stats.requests += 1
+            stats.consumed_wcu += consumed or 0.0
+            if unprocessed:
+                stats.throttles += 1
+            for partition_key, count in sent.items():
+                self._partition(stats, partition_key)["sent"] += count
+            for partition_key, count in unprocessed.items():
+                self._partition(stats, partition_key)["unprocessed"] += count
+            stats.last = time.monotonic()
+        self._maybe_flush()
+
+    def record_retry(self, stage):
+        with self.lock:
+            self._stage(stage).retries += 1
+
+    def record_batch(self, stage, succeeded, failed):
+        """A batch finished (after its retries) with these outcomes."""
+        with self.lock:
+            stats = self._stage(stage)
+            stats.succeeded += succeeded
+            stats.failed += failed
+            stats.last = time.monotonic()
+
+    def record_read(self, operation, partition_key, seconds, items):
+        """One page of a paginated read."""
+        with self.lock:
+            stats = self.reads.setdefault((operation, partition_key), _ReadStats())
+            stats.latency.observe(seconds)
+            stats.pages += 1
+            stats.items += items
+        self._maybe_flush()
+
+    def _stage(self, stage):
+        if stage not in self.stages:
+            self.stages[stage] = _StageStats()
+        return self.stages[stage]
+
+    @staticmethod
+    def _partition(stats, partition_key):
+        if partition_key not in stats.partitions:
+            stats.partitions[partition_key] = {"sent": 0, "unprocessed": 0}
+        return stats.partitions[partition_key]
+
+    # --- Export ---
+
+    def summary(self):
+        """All metrics as a JSON-serializable dict."""
+        with self.lock:
+            stages = {}
+            for stage, stats in self.stages.items():
+                elapsed = max(stats.last - stats.started, 1e-9)
+                stages[stage] = {
+                    "requests": stats.requests,
+                    "succeeded": stats.succeeded,
+                    "failed": stats.failed,
+                    "items_per_second": stats.succeeded / elapsed,
+                    "consumed_wcu": stats.consumed_wcu,
+                    "throttles": stats.throttles,
+                    "retries": stats.retries,
+                    "latency_seconds": {
+                        "count": stats.latency.count,
+                        "sum": stats.latency.sum,
+                        "p50_le": stats.latency.quantile(0.5),
+                        "p95_le": stats.latency.quantile(0.95),
+                        "p99_le": stats.latency.quantile(0.99),
+                    },
+                    "partitions": {
+                        partition_key: {**counts, "items_per_second": (counts["sent"] - counts["unprocessed"]) / elapsed}
+                        for partition_key, counts in stats.partitions.items()
+                    },
+                }
+            reads = [{"operation": operation, "partition": partition_key, "pages": stats.pages, "items": stats.items,
+                      "latency_seconds": {"count": stats.latency.count, "sum": stats.latency.sum,
+                                          "p95_le": stats.latency.quantile(0.95)}}
+                     for (operation, partition_key), stats in self.reads.items()]
+        return {"updated": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "stages": stages, "reads": reads}
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{value_}"' for key, value_ in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+
+        with self.lock:
+            stages = list(self.stages.items())
+            reads = list(self.reads.items())
+            metric("seed_write_requests_total", "counter", "Batch write requests sent, retries included",
+                   [({"stage": stage}, stats.requests) for stage, stats in stages])
+            metric("seed_items_total", "counter", "Items whose batch finished, by outcome",
+                   [({"stage": stage, "outcome": outcome}, count) for stage, stats in stages
+                    for outcome, count in (("succeeded", stats.succeeded), ("failed", stats.failed))])
+            metric("seed_partition_items_sent_total", "counter", "Items sent per partition key, retries included",
+                   [({"stage": stage, "partition": partition_key}, counts["sent"]) for stage, stats in stages
+                    for partition_key, counts in stats.partitions.items()])
+            metric("seed_partition_items_unprocessed_total", "counter", "Items DynamoDB returned unprocessed",
+                   [({"stage": stage, "partition": partition_key}, counts["unprocessed"]) for stage, stats in stages
+                    for partition_key, counts in stats.partitions.items()])
+            metric("seed_consumed_wcu_total", "counter", "Write capacity units reported by ReturnConsumedCapacity",
+                   [({"stage": stage}, stats.consumed_wcu) for stage, stats in stages])
+            metric("seed_throttled_requests_total", "counter", "Requests that came back throttled or with unprocessed items",
+                   [({"stage": stage}, stats.throttles) for stage, stats in stages])
+            metric("seed_retries_total", "counter", "Batch resends after throttling",
+                   [({"stage": stage}, stats.retries) for stage, stats in stages])
+            metric("seed_items_per_second", "gauge", "Succeeded items per second since the stage's first write",
+                   [({"stage": stage}, stats.succeeded / max(stats.last - stats.started, 1e-9)) for stage, stats in stages])
+            lines.append("# HELP seed_write_request_seconds Latency of batch write requests")
+            lines.append("# TYPE seed_write_request_seconds histogram")
+            for stage, stats in stages:
+                self._histogram_lines(lines, "seed_write_request_seconds", f'stage="{stage}"', stats.latency)
+            metric("seed_read_items_total", "counter", "Items read by paginated queries",
+                   [({"operation": operation, "partition": partition_key}, stats.items)
+                    for (operation, partition_key), stats in reads])
+            lines.append("# HELP seed_read_page_seconds Latency of read pages")
+            lines.append("# TYPE seed_read_page_seconds histogram")
+            for (operation, partition_key), stats in reads:
+                self._histogram_lines(lines, "seed_read_page_seconds",
+                                      f'operation="{operation}",partition="{partition_key}"', stats.latency)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(lines, name, labels, histogram):
+        for bound, running in histogram.cumulative():
+            bound_text = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{labels},le="{bound_text}"}} {running}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:g}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def flush(self):
+        """Writes both metric files (atomically, so collectors never read half a file)."""
+        if not self.metrics_dir:
+            return
+        self.flushed = time.monotonic()
+        for file_name, text in ((PROM_FILE, self.prometheus_text()),
+                                (JSON_FILE, json.dumps(self.summary(), indent=2) + "\n")):
+            path = os.path.join(self.metrics_dir, file_name)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temporary, path)
+
+    def _maybe_flush(self):
+        if self.metrics_dir and time.monotonic() - self.flushed >= self.flush_interval:
+            self.flush()
+
+
+def metrics_dir_from_argv():
+    """Reads an optional `--metrics-dir DIR` flag; None keeps the metrics in memory only."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--metrics-dir", default=None)
+    args, _ = parser.parse_known_args()
+    return args.metrics_dir
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Returns the process-wide SeedMetrics, writing to --metrics-dir when that flag is given."""
+    global _metrics
+    if _metrics is None:
+        _metrics = SeedMetrics(metrics_dir_from_argv())
+    return _metrics
+
+
+def set_metrics(metrics):
+    """Makes get_metrics() return `metrics` from now on (e.g. a fresh collector per benchmark run)."""
+    global _metrics
+    _metrics = metrics
@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# --- Content-addressed snapshot cache ---
+# Generating the same dataset twice (same counts, same master seed) produces
+# the same items, yet used to cost the full Faker CPU every time. Stage outputs
+# are cached here as gzipped, already-serialized item shards:
+#
+#   snapshot_cache/<key>/part-00000.json.gz   one low-level item per line
+#   snapshot_cache/<key>/meta.json             stage, item count, size
+#
+# The key is a SHA-256 over the stage name, the generator version (a hash of
+# the generator source files, SCHEMA_SOURCES included), the seed, the stage parameters and the keys of
+# the parent items the stage links to. Any change to one of them produces a
+# new key, so a cached snapshot is never stale. A snapshot only becomes
+# visible once it is completely written. The least recently used snapshots
+# are evicted once the cache grows past MAX_CACHE_BYTES.
+#
+# Only seeded runs are cached: without a seed the output is never repeated.
+# ---------------------------------------------
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot_cache")
+MAX_CACHE_BYTES = 5 * 1024**3  # Evict least recently used snapshots beyond this total size
+SHARD_ITEMS = 100000  # Items per shard file
+COMPRESS_LEVEL = 1  # Fast gzip; the shards are read back far more often than written
+SNAPSHOT_FORMAT_VERSION = 1
+# Shared modules that shape the items of every stage (defaults, encoding); part of every generator version
+SCHEMA_SOURCES = ("partition_schema.py", "fast_serializer.py")
+
+
+def source_fingerprint(*paths):
+    """
+    Hashes the contents of the given source files; changes whenever the generator code changes.
+    Relative paths are resolved against this directory (where all the seed scripts live).
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), path), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def parent_digest(parents):
+    """Hashes the sortKeys of parent items (low-level or plain) or plain IDs, in order."""
+    digest = hashlib.sha256()
+    for parent in parents:
+        sort_key = parent if isinstance(parent, str) else parent["sortKey"]
+        digest.update((sort_key["S"] if isinstance(sort_key, dict) else sort_key).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def snapshot_key(stage, generator_version, seed, params=None, parents=()):
+    """Builds the content address of a stage output."""
+    description = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "stage": stage,
+        "generator_version": generator_version,
+        "seed": seed,
+        "params": params or {},
+        "parents": [parent_digest(group) for group in parents],
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SnapshotCache:
+    """Directory of completed snapshots, one sub-directory per key, evicted by least recent use."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self._path(key), "meta.json"))
+
+    def read(self, key):
+        """Yields the cached items of `key` in their original order and marks the snapshot as used."""
+        path = self._path(key)
+        os.utime(os.path.join(path, "meta.json"))
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".json.gz"):
+                continue
+            with gzip.open(os.path.join(path, name), "rt", encoding="utf-8") as shard:
+                for line in shard:
+                    yield json.loads(line)
+
+    def recording(self, key, stage, items):
+        """
+        Passes `items` through unchanged while writing them as a new snapshot.
+        The snapshot is only published if the stream is consumed to the end.
+        """
+        temp_path = os.path.join(self.cache_dir, f".tmp-{key}-{os.getpid()}")
+        os.makedirs(temp_path, exist_ok=True)
+        shard = None
+        count = 0
+        try:
+            for item in items:
+                if count % SHARD_ITEMS == 0:
+                    if shard:
+                        shard.close()
+                    shard_name = f"part-{count // SHARD_ITEMS:05d}.json.gz"
+                    shard = gzip.open(os.path.join(temp_path, shard_name), "wt", encoding="utf-8",
+                                      compresslevel=COMPRESS_LEVEL)
+                shard.write(json.dumps(item, ensure_ascii=False))
+                shard.write("\n")
+                count += 1
+                yield item
+        except BaseException:
+            if shard:
+                shard.close()
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+        if shard:
+            shard.close()
+        self._publish(key, stage, temp_path, count)
+
+    def store(self, key, stage, items):
+        """Writes a complete list of items as a snapshot."""
+        for _ in self.recording(key, stage, items):
+            pass
+
+    def _publish(self, key, stage, temp_path, count):
+        size = sum(os.path.getsize(os.path.join(temp_path, name)) for name in os.listdir(temp_path))
+        with open(os.path.join(temp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"stage": stage, "items": count, "bytes": size, "created": time.time()}, f)
+        try:
+            os.rename(temp_path, self._path(key))
+        except OSError:
+            # Another run published the same snapshot first; the contents are identical
+            shutil.rmtree(temp_path, ignore_errors=True)
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """Deletes least recently used snapshots until the cache fits in max_bytes."""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            meta_path = os.path.join(self._path(key), "meta.json")
+            if key.startswith(".") or not os.path.exists(meta_path):
+                continue
+            with open(meta_path, encoding="utf-8") as f:
+                size = json.load(f)["bytes"]
+            entries.append((os.path.getmtime(meta_path), key, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+            print(f"🧹 Evicted snapshot {key[:12]} ({size / 2**20:.1f} MB) from the cache")
+
+
+_snapshot_cache = None
+_caching_enabled = True
+
+
+def get_snapshot_cache():
+    """Returns the shared SnapshotCache, or None when caching was turned off with set_snapshot_cache(None)."""
+    global _snapshot_cache
+    if _snapshot_cache is None and _caching_enabled:
+        _snapshot_cache = SnapshotCache()
+    return _snapshot_cache
+
+
+def set_snapshot_cache(cache):
+    """Replaces the shared cache; None turns caching off."""
+    global _snapshot_cache, _caching_enabled
+    _snapshot_cache = cache
+    _caching_enabled = cache is not None
+
+
+def cached_items(stage, generator_version, seed, generate, params=None, parents=()):
+    """
+    Returns an iterator over a stage's serialized items: streamed from the cache
+    when an identical run was cached before, otherwise from `generate()`, which is
+    recorded into the cache as it is consumed. Unseeded runs bypass the cache.
+
+    Args:
+        stage (str): Partition name of the stage (e.g. "APPLICATION").
+        generator_version (str): Fingerprint of the generator code (see source_fingerprint).
+        seed (int, optional): Seed the stage generates from; None disables caching.
+        generate (callable): Returns an iterable of low-level items.
+        params (dict, optional): Every other input that changes the output (counts, flags).
+        parents (sequence of lists, optional): Parent item lists the stage links to.
+    """
+    cache = get_snapshot_cache()
+    if cache is None or seed is None:
+        return iter(generate())
+    key = snapshot_key(stage, generator_version, seed, params, parents)
+    if cache.contains(key):
+        print(f"♻️ Using cached '{stage}' snapshot {key[:12]} (generation skipped)")
+        return cache.read(key)
+    return cache.recording(key, stage, generate())
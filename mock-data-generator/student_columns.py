@@ -0,0 +1,215 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from faker import Faker
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the columnar generator
+    np = None
+
+from partition_schema import attribute_names
+
+# --- Vectorized columnar student generator ---
+# Calling Faker once per field per record is the biggest CPU cost of
+# 1-students-seed.py. This generator calls Faker only to build value pools
+# once (names, kana, addresses, companies, emails, ...) and then produces
+# whole columns at a time with NumPy index sampling. Phone numbers, birthdays
+# and timestamps are built with vectorized arithmetic and string ops. Rows are
+# only assembled, as low-level DynamoDB items, when they are handed to the
+# writer. The attribute layout and value distributions match
+# generate_mock_item_for_fossy_stg.
+#
+# Requires numpy (pip3 install numpy). Run this file directly to benchmark it
+# against the per-record path.
+# ---------------------------------------------
+
+DEFAULT_POOL_SIZE = 5000  # Distinct values drawn per pooled Faker field
+DEFAULT_BATCH_ROWS = 10000  # Rows generated per column batch (bounds memory)
+
+# User's current time context (JST), converted to UTC, as in 1-students-seed.py
+BASE_UTC_TIME = datetime(2025, 9, 1, 20, 50, 8) - timedelta(hours=9)
+
+OCCUPATIONS = ["Engineer", "Teacher", "Doctor", "Office Worker", "Student", ""]
+
+# Attribute order of a student item (the STUDENT schema in partition_schema.py)
+STUDENT_COLUMNS = attribute_names("STUDENT")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The columnar student generator needs numpy. Install it with: pip3 install numpy")
+
+
+def build_value_pools(seed=0, pool_size=DEFAULT_POOL_SIZE):
+    """Calls Faker `pool_size` times per pooled field and returns the values as NumPy string arrays."""
+    _require_numpy()
+    fake_ja = Faker('ja_JP')
+    fake_en = Faker()
+    fake_ja.seed_instance(seed)
+    fake_en.seed_instance(seed)
+
+    def pool(make):
+        return np.array([make() for _ in range(pool_size)])
+
+    return {
+        "lastName": pool(fake_ja.last_name),
+        "firstName": pool(fake_ja.first_name),
+        "lastNameKana": pool(fake_ja.last_kana_name),
+        "firstNameKana": pool(fake_ja.first_kana_name),
+        "fullName": pool(fake_ja.name),
+        "email": pool(fake_en.email),
+        "username": pool(fake_en.user_name),
+        "company": pool(fake_ja.company),
+        "university": pool(lambda: fake_ja.word() + "大学"),
+        "postalCode": pool(fake_ja.zipcode),
+        "prefecture": pool(fake_ja.prefecture),
+        "city": pool(lambda: f"{fake_ja.city()}{fake_ja.town() or ''}".strip()),
+        "addressLine": pool(lambda: f"{fake_ja.chome()}-{fake_ja.ban()}-{fake_ja.gou()}"),
+        "building": pool(fake_ja.building_name),
+    }
+
+
+def _join(*parts):
+    """Concatenates string arrays / scalars element-wise."""
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+def _digits(rng, low, high, count):
+    return rng.integers(low, high + 1, count).astype(str)
+
+
+def _sample(rng, pool, count):
+    return pool[rng.integers(0, len(pool), count)]
+
+
+def _coin(rng, count):
+    return rng.random(count) < 0.5
+
+
+def generate_student_columns(count, pools, rng, base_utc_time=BASE_UTC_TIME):
+    """Generates `count` students as a dict of equally long NumPy string columns."""
+    _require_numpy()
+    columns = {}
+    empty = np.full(count, "", dtype="<U1")
+
+    columns["partitionKey"] = np.full(count, "STUDENT")
+    raw = np.frombuffer(rng.bytes(16 * count), dtype=np.uint8).reshape(count, 16)
+    columns["sortKey"] = np.array([str(uuid.UUID(bytes=row.tobytes(), version=4)) for row in raw])
+    columns["online"] = np.where(_coin(rng, count), "true", "false")
+
+    for name in ("lastName", "firstName", "lastNameKana", "firstNameKana"):
+        columns[name] = _sample(rng, pools[name], count)
+
+    # Birthdays between 18 and 65 years before the reference time (not today: seeded runs must repeat)
+    today = np.datetime64((base_utc_time + timedelta(hours=9)).date(), "D")
+    ages_in_days = rng.integers(int(18 * 365.25), int(66 * 365.25), count)
+    columns["birthday"] = np.datetime_as_string(today - ages_in_days, unit="D")
+    columns["gender"] = np.array(["male", "female", "other"])[rng.integers(0, 3, count)]
+
+    # 0X0-XXXX-XXXX mobile numbers, optional 0X-XXXX-XXXX landlines
+    columns["phoneNumber1"] = _join("0", _digits(rng, 7, 9, count), "0-", _digits(rng, 1000, 9999, count),
+                                    "-", _digits(rng, 1000, 9999, count))
+    landline = _join("0", _digits(rng, 3, 9, count), "-", _digits(rng, 1000, 9999, count),
+                     "-", _digits(rng, 1000, 9999, count))
+    columns["phoneNumber2"] = np.where(_coin(rng, count), landline, "")
+    columns["faxNumber"] = empty
+    columns["email"] = _sample(rng, pools["email"], count)
+
+    occupation = np.array(OCCUPATIONS)[rng.integers(0, len(OCCUPATIONS), count)]
+    columns["occupation"] = occupation
+    employed = (occupation != "Student") & (occupation != "")
+    columns["organization"] = np.where(
+        employed & _coin(rng, count), _sample(rng, pools["company"], count),
+        np.where(occupation == "Student", _sample(rng, pools["university"], count), ""))
+
+    # Home address
+    for name in ("postalCode", "prefecture", "city", "addressLine"):
+        columns[name] = _sample(rng, pools[name], count)
+    columns["mansionBuilding"] = np.where(_coin(rng, count), _sample(rng, pools["building"], count), "")
+
+    sending_address = np.where(_coin(rng, count), "home", "work")
+    columns["sendingAddress"] = sending_address
+    has_work_address = (sending_address == "work") | ((columns["organization"] != "") & _coin(rng, count))
+    work_pn = _join("0", _digits(rng, 3, 9, count), "-", _digits(rng, 1000, 9999, count),
+                    "-", _digits(rng, 1000, 9999, count))
+    columns["organizationPostalCode"] = np.where(has_work_address, _sample(rng, pools["postalCode"], count), "")
+    columns["organizationPrefecture"] = np.where(has_work_address, _sample(rng, pools["prefecture"], count), "")
+    columns["organizationCity"] = np.where(has_work_address, _sample(rng, pools["city"], count), "")
+    columns["organizationAddressLine"] = np.where(has_work_address, _sample(rng, pools["addressLine"], count), "")
+    columns["organizationMansionBuilding"] = np.where(
+        has_work_address & _coin(rng, count), _sample(rng, pools["building"], count), "")
+    columns["organizationPN"] = np.where(has_work_address, work_pn, "")
+
+    has_notice = rng.random(count) < 1 / 3
+    columns["noticeName"] = np.where(has_notice, _sample(rng, pools["fullName"], count), "")
+    columns["noticeStudent"] = np.where(has_notice, _join(columns["firstName"], " ", columns["lastName"]), "")
+    columns["resignation"] = empty
+
+    # Timestamps: created within the last year, updated between creation and the base time
+    username = _sample(rng, pools["username"], count)
+    columns["username"] = username
+    base = np.datetime64(base_utc_time, "ms")
+    created = base - (rng.integers(1, 366, count) * 1440 + rng.integers(0, 24, count) * 60
+                      + rng.integers(0, 60, count)).astype("timedelta64[m]")
+    duration_days = (base - created).astype("timedelta64[D]").astype(np.int64)
+    updated = created + (rng.integers(0, duration_days + 1) * 1440 + rng.integers(0, 24, count) * 60
+                         + rng.integers(0, 60, count)).astype("timedelta64[m]")
+    updated = np.maximum(np.minimum(updated, base), created)
+    columns["createdOn"] = np.char.add(np.datetime_as_string(created, unit="ms"), "Z")
+    columns["createdBy"] = np.full(count, "system_batch")
+    columns["updatedOn"] = np.char.add(np.datetime_as_string(updated, unit="ms"), "Z")
+    updated_by = rng.integers(0, 3, count)
+    columns["updatedBy"] = np.where(updated_by == 0, "system_update", np.where(updated_by == 1, "admin_portal", username))
+
+    return columns
+
+
+def iter_student_items(columns):
+    """Assembles rows from the columns as low-level DynamoDB items, one at a time."""
+    names = STUDENT_COLUMNS
+    values = [columns[name].tolist() for name in names]
+    for row in zip(*values):
+        yield {name: {'S': value} for name, value in zip(names, row)}
+
+
+def generate_columnar_items(count, seed=0, base_utc_time=BASE_UTC_TIME, batch_rows=DEFAULT_BATCH_ROWS,
+                            pool_size=DEFAULT_POOL_SIZE):
+    """Yields `count` serialized student items, generated `batch_rows` columns at a time."""
+    _require_numpy()
+    pools = build_value_pools(seed, pool_size)
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, batch_rows):
+        columns = generate_student_columns(min(batch_rows, count - start), pools, rng, base_utc_time)
+        yield from iter_student_items(columns)
+
+
+def benchmark(count=20000, seed=0):
+    """Compares records/s of the per-record Faker path with the columnar path."""
+    import importlib
+    from local_dynamodb import InMemoryDynamoDB
+    from seed_config import set_dynamodb_client
+    set_dynamodb_client(InMemoryDynamoDB(store_items=False))  # CPU only: the seed module must not create an AWS client
+    students_seed = importlib.import_module("1-students-seed")
+
+    started = time.perf_counter()
+    for record in students_seed.generate_mock_items(count):
+        students_seed.serialize_record(record)
+    per_record = count / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in generate_columnar_items(count, seed):
+        pass
+    columnar = count / (time.perf_counter() - started)
+
+    print(f"Per-record Faker: {per_record:>10.1f} records/s")
+    print(f"Columnar NumPy:   {columnar:>10.1f} records/s (including pool build, {columnar / per_record:.1f}x)")
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    benchmark()
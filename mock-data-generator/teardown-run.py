@@ -0,0 +1,135 @@
+import argparse
+import os
+import shutil
+import sys
+
+from bulk_writer import AdaptiveBatchWriter
+from parent_index import INDEXED_ATTRIBUTES, RECORD_BUFFER_SIZE, get_parent_index
+from partition_schema import SCHEMAS
+from pipeline import run_pipeline
+from run_manifest import MANIFEST_DIR, manifest_partitions, read_manifest
+from seed_config import TABLE_NAME, get_dynamodb_client
+
+# --- Manifest-driven teardown ---
+# Deletes exactly the items one seed run wrote, as recorded in its manifest
+# (run_manifest.py), instead of scanning the whole table like delete-all.py:
+#
+#   python3 teardown-run.py                  # list the recorded runs
+#   python3 teardown-run.py 20261018-091500  # delete that run's items
+#
+# Cost is one delete per recorded key and nothing else. Partitions are
+# deleted children first (registry order of partition_schema.py, reversed),
+# so an interrupted teardown leaves no orphans; run it again to finish.
+# Each partition's keys stream from the manifest through a bounded queue to
+# parallel, retrying delete writers. The manifest is removed once every
+# delete succeeded.
+# ---------------------------------------------
+
+# --- Configuration ---
+# Table name and AWS profile are set in seed_config.py
+TARGET_WCU = 100 # Write capacity the delete writers pace themselves towards
+DELETE_WORKERS = 4 # Concurrent delete writer threads
+MAX_PENDING_KEYS = 5000 # Keys buffered between the manifest reader and the delete writers
+# ---------------------
+
+dynamodb_client = get_dynamodb_client()
+
+
+def resolve_run_dir(run):
+    """Accepts a run id under MANIFEST_DIR or a path to a manifest directory."""
+    run_dir = run if os.path.isdir(run) else os.path.join(MANIFEST_DIR, run)
+    return run_dir if os.path.isdir(run_dir) else None
+
+
+def teardown_order(partition_keys):
+    """Children first: partitions unknown to the registry, then the registry order reversed."""
+    order = list(SCHEMAS)
+    return sorted(partition_keys, key=lambda partition_key: -order.index(partition_key) if partition_key in order else -len(order))
+
+
+def count_keys(run_dir):
+    """Returns {partition key: recorded keys} of a manifest, children first."""
+    return {partition_key: sum(1 for _ in read_manifest(run_dir, partition_key))
+            for partition_key in teardown_order(manifest_partitions(run_dir))}
+
+
+def manifest_keys(run_dir, partition_key):
+    """Yields the primary keys recorded for a partition and removes them from the parent index as they go."""
+    index = get_parent_index() if partition_key in INDEXED_ATTRIBUTES else None
+    buffer = []
+    for sort_key in read_manifest(run_dir, partition_key):
+        yield {"partitionKey": {"S": partition_key}, "sortKey": {"S": sort_key}}
+        if index:
+            buffer.append(sort_key)
+            if len(buffer) >= RECORD_BUFFER_SIZE:
+                index.forget(partition_key, buffer)
+                buffer = []
+    if index:
+        index.forget(partition_key, buffer)
+
+
+def teardown(run_dir, target_wcu=TARGET_WCU, delete_workers=DELETE_WORKERS):
+    """Deletes every key of a manifest, partition by partition, children first. Returns the writer."""
+    writer = AdaptiveBatchWriter(dynamodb_client, TABLE_NAME, target_wcu=target_wcu, action="Deleted")
+
+    def delete_unique(keys):
+        # A resumed run can record a key twice, and BatchWriteItem rejects duplicate keys in one request
+        writer.delete_batch(list({key["sortKey"]["S"]: key for key in keys}.values()))
+
+    for partition_key in teardown_order(manifest_partitions(run_dir)):
+        print(f"\n🗑️ Deleting {partition_key}...")
+        run_pipeline([manifest_keys(run_dir, partition_key)], delete_unique, workers=delete_workers,
+                     max_pending=MAX_PENDING_KEYS)
+    writer.print_summary()
+    return writer
+
+
+def list_runs():
+    runs = sorted(os.listdir(MANIFEST_DIR)) if os.path.isdir(MANIFEST_DIR) else []
+    if not runs:
+        print(f"No run manifests in {MANIFEST_DIR}.")
+    for run_id in runs:
+        counts = count_keys(os.path.join(MANIFEST_DIR, run_id))
+        print(f"  {run_id:<24} {sum(counts.values()):>12,} keys  ({', '.join(counts)})")
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete exactly the items a seed run wrote, using its manifest.")
+    parser.add_argument("run", nargs="?", help="Run id under manifests/, or a manifest directory (omit to list runs)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the recorded keys")
+    parser.add_argument("--keep-manifest", action="store_true", help="Keep the manifest after a complete teardown")
+    parser.add_argument("--target-wcu", type=float, default=TARGET_WCU, help="Write capacity to pace the deletes towards")
+    parser.add_argument("--workers", type=int, default=DELETE_WORKERS, help="Concurrent delete writer threads")
+    args = parser.parse_args()
+
+    if not args.run:
+        list_runs()
+        sys.exit(0)
+    manifest_dir = resolve_run_dir(args.run)
+    if manifest_dir is None:
+        sys.exit(f"❌ No manifest '{args.run}' (run without arguments to list them).")
+
+    key_counts = count_keys(manifest_dir)
+    total = sum(key_counts.values())
+    print(f"🧾 Manifest {manifest_dir} (deletion order, children first):")
+    for partition, count in key_counts.items():
+        print(f"  {partition:<14} {count:>12,}")
+
+    if total == 0:
+        print("\n✅ No keys recorded. Nothing to do.")
+    elif args.dry_run:
+        print(f"\n🛑 Dry run: {total:,} recorded keys would be deleted from '{TABLE_NAME}'.")
+    else:
+        confirm = input(f"\nAre you sure you want to permanently delete these {total:,} records from '{TABLE_NAME}'? (type 'yes' to confirm): ")
+        if confirm.lower() == 'yes':
+            delete_writer = teardown(manifest_dir, args.target_wcu, args.workers)
+            if delete_writer.failed:
+                print(f"\n⚠️ {delete_writer.failed} deletes failed; run the teardown again to retry them.")
+            elif not args.keep_manifest:
+                shutil.rmtree(manifest_dir, ignore_errors=True)
+                print(f"\n✅ Teardown complete. Removed the manifest {manifest_dir}.")
+            else:
+                print("\n✅ Teardown complete.")
+        else:
+            print("\n🛑 Operation cancelled by user. No records were deleted.")
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_manifest import manifest_partitions, read_manifest  # noqa: E402
+
+# Records one batch, flushes it and dies without closing the gzip member (like a crash),
+# or records and closes normally when "close" is given
+ATTEMPT = """
+import os, sys
+sys.path.insert(0, {root!r})
+import run_manifest
+run_manifest.FLUSH_INTERVAL = 0
+manifest = run_manifest.RunManifest("run", manifest_dir={manifest_dir!r})
+manifest.record([{{"partitionKey": {{"S": "STUDENT"}}, "sortKey": {{"S": key}}}} for key in {keys!r}])
+if {close!r}:
+    manifest.close()
+else:
+    os._exit(1)
+"""
+
+
+def run_attempt(manifest_dir, keys, close):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ATTEMPT.format(root=root, manifest_dir=str(manifest_dir), keys=keys, close=close)
+    subprocess.run([sys.executable, "-c", code], check=False)
+
+
+def test_manifest_survives_a_crash_followed_by_a_resume(tmp_path):
+    run_attempt(tmp_path, ["a", "b"], close=False)  # Crashes mid-record
+    run_attempt(tmp_path, ["c", "d"], close=True)  # The resume records the rest
+
+    run_dir = tmp_path / "run"
+    assert manifest_partitions(str(run_dir)) == ["STUDENT"]
+    assert sorted(read_manifest(str(run_dir), "STUDENT")) == ["a", "b", "c", "d"]
+
+
+def test_torn_file_does_not_hide_later_files(tmp_path):
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    (run_dir / "STUDENT.1-1.keys.gz").write_bytes(b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff\x07")  # Garbage block
+    run_attempt(tmp_path, ["c"], close=True)
+
+    assert list(read_manifest(str(run_dir), "STUDENT")) == ["c"]
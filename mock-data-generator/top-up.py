@@ -0,0 +1,268 @@
+import argparse
+import importlib
+import itertools
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from partition_schema import SCHEMAS, reference_values
+from parent_index import ParentIndex, get_parent_index, query_pages
+from scale_profiles import COMPLETED_PAYMENT_SHARE, DEFAULT_PROFILE, SCALE_PROFILES, FanOut, expected_items, get_profile
+from seed_config import TABLE_NAME, get_dynamodb_client
+from seed_metrics import get_metrics
+
+# --- Incremental top-up ---
+# Rerunning a seed script appends a full batch every time (and the hardcoded
+# venue, bank and exam lists come back as duplicates under new sortKeys).
+# This script instead brings the table up to a scale profile:
+#
+#   python3 top-up.py --profile prod-like --dry-run   # counts and deltas only
+#   python3 top-up.py --profile prod-like             # write the deltas
+#
+# 1. Every partition is counted with a paginated `Select=COUNT` query, all
+#    partitions in parallel. Only counts come back; the read cost is that of
+#    the key-condition query, with nothing transferred or deserialized.
+# 2. Targets are expected_items() of the profile (scale_profiles.py) for the
+#    generated partitions and the list length for the hardcoded ones.
+# 3. Only the missing items are generated and written, parents first. A
+#    hardcoded list that is partly present gets the entries whose natural key
+#    (venue name, account number, exam name) is absent from its partition (one
+#    query projected to that key). Children are generated from the
+#    parents this run wrote first, then from parents sampled at random from the
+#    parent index (parent_index.py), until the delta is reached. Parents this
+#    run wrote, parents some existing child already references (one query of
+#    the child partition, projected to the reference) and parents sampled in
+#    an earlier round are never sampled.
+#
+# The parents this run writes are recorded in a ParentIndex private to the run
+# (in a temporary directory) and streamed back from it, so no partition is
+# held in memory.
+#
+# Partitions at or above their target are left alone; nothing is deleted.
+# ---------------------------------------------
+
+# --- Configuration ---
+# Table name and AWS profile are set in seed_config.py
+COUNT_WORKERS = 8 # Partitions counted in parallel
+SAMPLE_ROUNDS = 5 # Times parents are sampled again when a delta is not reached yet
+SAMPLE_MARGIN = 1.2 # Extra parents sampled over the expected need
+# ---------------------
+
+dynamodb_client = get_dynamodb_client()
+
+
+def count_items(partition_key):
+    """Counts a partition's items with a paginated Select=COUNT query."""
+    paginator = dynamodb_client.get_paginator("query")
+    metrics = get_metrics()
+    total = 0
+    requested = time.monotonic()
+    for page in paginator.paginate(TableName=TABLE_NAME, KeyConditionExpression="partitionKey = :pk",
+                                   ExpressionAttributeValues={":pk": {"S": partition_key}}, Select="COUNT"):
+        metrics.record_read("count", partition_key, time.monotonic() - requested, page["Count"])
+        total += page["Count"]
+        requested = time.monotonic()
+    return total
+
+
+def count_partitions(partition_keys, workers=COUNT_WORKERS):
+    """Returns {partition key: item count}, counting the partitions in parallel."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(partition_keys, pool.map(count_items, partition_keys)))
+
+
+class TopUp:
+    """Brings every partition up to its target count, writing only the missing items."""
+
+    def __init__(self, profile, students=None, target_wcu=None):
+        self.stages = {partition_key: importlib.import_module(module_name) for partition_key, module_name in (
+            ("STUDENT", "1-students-seed"), ("EXAM_PLACE", "2-venues-seed"), ("BANK_ACCOUNT", "3-bank-seed"),
+            ("EXAM", "4-exam-seed"), ("EXAM_HOLD", "5-examhold-seed"), ("APPLICATION", "6-application-seed"),
+            ("PAYMENT", "7-payment-seed"), ("CERTIFICATION", "8-certification-seed"))}
+        self.profile = profile
+        self.students = profile["students"] if students is None else students
+        self.target_wcu = target_wcu
+        if target_wcu:
+            for partition_key, stage in self.stages.items():
+                if partition_key != "STUDENT":
+                    stage.TARGET_WCU = target_wcu
+        self.scratch_dir = tempfile.TemporaryDirectory(prefix="top-up-")
+        # The parents this run wrote, for the next stages
+        self.written = ParentIndex(os.path.join(self.scratch_dir.name, "written.sqlite3"))
+
+    def targets(self):
+        """{partition key: target count} in registry order."""
+        targets = expected_items(self.profile, self.students)
+        targets["EXAM_PLACE"] = len(self.stages["EXAM_PLACE"].create_hardcoded_venue_data())
+        targets["BANK_ACCOUNT"] = len(self.stages["BANK_ACCOUNT"].create_hardcoded_bank_account_data())
+        targets["EXAM"] = len(self.stages["EXAM"].create_hardcoded_exam_data([""]))
+        return {partition_key: targets[partition_key] for partition_key in SCHEMAS if partition_key in targets}
+
+    def run(self, deltas):
+        """Writes the missing items for every partition in `deltas` ({partition key: missing}), parents first."""
+        for partition_key in SCHEMAS:
+            missing = deltas.get(partition_key, 0)
+            if missing > 0:
+                print(f"\n===== {partition_key}: +{missing:,} =====")
+                getattr(self, f"_top_up_{partition_key.lower()}")(missing)
+
+    def close(self):
+        """Deletes the run's own index of written parents."""
+        self.written.close()
+        self.scratch_dir.cleanup()
+
+    # --- Roots and hardcoded lists ---
+
+    def _top_up_student(self, missing):
+        options = {"target_wcu": self.target_wcu} if self.target_wcu else {}
+        self.stages["STUDENT"].stream_insert_records(missing, index=self.written, **options)
+
+    def _top_up_exam_place(self, missing):
+        stage = self.stages["EXAM_PLACE"]
+        venues = self._absent("EXAM_PLACE", "placeName", stage.create_hardcoded_venue_data())
+        if venues:
+            stage.batch_insert_records(venues, len(venues))
+
+    def _top_up_bank_account(self, missing):
+        stage = self.stages["BANK_ACCOUNT"]
+        accounts = self._absent("BANK_ACCOUNT", "accountNumber", stage.create_hardcoded_bank_account_data())
+        if accounts:
+            stage.batch_insert_records(accounts, len(accounts))
+
+    def _top_up_exam(self, missing):
+        stage = self.stages["EXAM"]
+        bank_ids = stage.get_existing_ids("BANK_ACCOUNT")
+        if not bank_ids:
+            print("❌ Cannot create exams without bank accounts to link.")
+            return
+        exams = [stage.serialize_record(exam)
+                 for exam in self._absent("EXAM", "examName", stage.create_hardcoded_exam_data(bank_ids))]
+        if exams:
+            stage.batch_insert_records(exams, len(exams))
+
+    def _absent(self, partition_key, key, records):
+        """Returns the `records` whose natural `key` no item of `partition_key` has yet (one query projected to the key)."""
+        present = {item[key]["S"] for page in query_pages(dynamodb_client, TABLE_NAME, partition_key, [key])
+                   for item in page if key in item}
+        absent = [record for record in records if record[key] not in present]
+        if not absent:
+            print(f"✅ Every hardcoded '{partition_key}' entry is already present (the count includes duplicates).")
+        return absent
+
+    # --- Generated partitions ---
+
+    def _top_up_exam_hold(self, missing):
+        stage = self.stages["EXAM_HOLD"]
+        exams = stage.get_full_items_by_pk("EXAM")
+        venues = stage.get_full_items_by_pk("EXAM_PLACE")
+        if not (exams and venues):
+            print("❌ Cannot create exam holds without exams and venues to link.")
+            return
+        exam_holds = (stage.serialize_record(schedule) for schedule in stage.create_mock_schedule_data(exams, venues, missing))
+        stage.batch_insert_records(exam_holds, missing)
+
+    def _top_up_application(self, missing):
+        stage = self.stages["APPLICATION"]
+        exam_holds = stage.get_existing_items("EXAM_HOLD")
+        if not exam_holds:
+            print("❌ Cannot create applications without exam holds to link.")
+            return
+        per_student = FanOut(self.profile["applications_per_student"]).mean()
+        applications = self._children(missing, "APPLICATION", "STUDENT", per_student, lambda students: (
+            stage.serialize_record(application) for application in stage.create_hardcoded_application_data(
+                students, exam_holds, self.profile["applications_per_student"], self.profile["exam_hold_skew"])))
+        stage.batch_insert_records(applications, missing, index=self.written)
+
+    def _top_up_payment(self, missing):
+        stage = self.stages["PAYMENT"]
+        per_application = FanOut(self.profile["payments_per_application"]).mean()
+        payments = self._children(missing, "PAYMENT", "APPLICATION", per_application, lambda applications: (
+            stage.serialize_record(payment) for payment in stage.create_hardcoded_payment_data(
+                applications, self.profile["payments_per_application"])))
+        stage.batch_insert_records(payments, missing)
+
+    def _top_up_certification(self, missing):
+        stage = self.stages["CERTIFICATION"]
+        certifications = self._children(missing, "CERTIFICATION", "APPLICATION", COMPLETED_PAYMENT_SHARE, lambda applications: (
+            stage.serialize_record(certification)
+            for certification in stage.create_hardcoded_certification_data(applications)))
+        stage.batch_insert_records(certifications, missing)
+
+    def _children(self, missing, partition_key, parent_partition, per_parent, generate):
+        """
+        Yields up to `missing` children of `partition_key`, from the parents this run wrote first,
+        then from parents sampled from the parent index that have no such children yet.
+        `generate(parents)` yields the serialized children of an iterable of parents.
+        """
+        own_parents = self.written.partition(parent_partition)
+        produced = 0
+        for item in itertools.islice(generate(own_parents), missing):
+            produced += 1
+            yield item
+        if produced >= missing:
+            return
+
+        index = get_parent_index()
+        index.clear_excluded()
+        index.exclude(parent["sortKey"]["S"] for parent in own_parents)
+        index.exclude(self._referenced_parents(partition_key, parent_partition))
+        for _ in range(SAMPLE_ROUNDS):
+            if produced >= missing:
+                break
+            wanted = math.ceil((missing - produced) / max(per_parent, 0.01) * SAMPLE_MARGIN)
+            parents = index.load_or_refresh(dynamodb_client, TABLE_NAME, parent_partition,
+                                            limit=wanted, sample=True, excluded=True)
+            if not parents:
+                break
+            index.exclude(parent["sortKey"]["S"] for parent in parents)
+            for item in itertools.islice(generate(parents), missing - produced):
+                produced += 1
+                yield item
+        index.clear_excluded()
+        if produced < missing:
+            print(f"⚠️ Only {produced} of {missing} missing items could be generated from the existing parents.")
+
+    def _referenced_parents(self, partition_key, parent_partition):
+        """Yields the sortKeys of `parent_partition` items that existing `partition_key` items reference."""
+        paths = [path for path, parent in SCHEMAS[partition_key]["references"].items() if parent == parent_partition]
+        print(f"🔍 Reading which '{parent_partition}' items already have '{partition_key}' items (projected query)...")
+        for page in query_pages(dynamodb_client, TABLE_NAME, partition_key, [path.partition(".")[0] for path in paths]):
+            for item in page:
+                for path in paths:
+                    yield from reference_values(item, path)
+
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Count every partition and write only the items missing to reach a scale profile "
+                    "(also accepts the shared seed flags, e.g. --backend, --export-dir, --lifetime).")
+    parser.add_argument("--profile", choices=sorted(SCALE_PROFILES), default=DEFAULT_PROFILE,
+                        help="Scale profile to top the table up to (see scale_profiles.py)")
+    parser.add_argument("--students", type=int, default=None, help="Target number of students (default: the profile's)")
+    parser.add_argument("--target-wcu", type=int, default=None, help="Write capacity every stage paces towards")
+    parser.add_argument("--dry-run", action="store_true", help="Only count and print the deltas")
+    args, _ = parser.parse_known_args()
+
+    top_up = TopUp(get_profile(args.profile), args.students, args.target_wcu)
+    targets = top_up.targets()
+    print(f"🔢 Counting {len(targets)} partitions of '{TABLE_NAME}' (Select=COUNT)...")
+    counts = count_partitions(list(targets))
+    deltas = {partition_key: max(target - counts[partition_key], 0) for partition_key, target in targets.items()}
+    print(f"  {'partition':<14} {'existing':>12} {'target':>12} {'missing':>12}")
+    for partition_key, target in targets.items():
+        print(f"  {partition_key:<14} {counts[partition_key]:>12,} {target:>12,} {deltas[partition_key]:>12,}")
+
+    total = sum(deltas.values())
+    if total == 0:
+        print(f"\n✅ '{TABLE_NAME}' already matches the '{args.profile}' profile. Nothing to do.")
+    elif args.dry_run:
+        print(f"\n🛑 Dry run: {total:,} items would be written.")
+    else:
+        try:
+            top_up.run(deltas)
+        finally:
+            top_up.close()
+        print(f"\n✅ Top-up complete: {total:,} missing items requested.")
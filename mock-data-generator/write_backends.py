@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+# --- Interchangeable write backends ---
+# The seed scripts historically used two write paths: PartiQL INSERT strings
+# with BatchExecuteStatement (stages 1-3) and TypeSerializer + BatchWriteItem
+# (stages 4-8). Every backend here takes the same input - low-level DynamoDB
+# items ({"attr": {"S": "..."}}) - so AdaptiveBatchWriter can switch between
+# them with a flag:
+#
+# - partiql:     BatchExecuteStatement with parameterized INSERTs. Values keep
+#                their types, but existing keys fail with DuplicateItem.
+# - batch_write: BatchWriteItem PutRequests. Overwrites existing keys.
+# - put_item:    Individual PutItem calls fanned out over a thread pool.
+#
+# Each backend's send(pending) returns (unprocessed, failed_count, consumed_wcu,
+# transient_count), where the last `transient_count` of the unprocessed items
+# failed with a transient error (a server fault or a transaction conflict)
+# rather than throttling, and partition_of(request) returns the partitionKey
+# value a request writes. close() releases what the backend holds (the
+# PutItem thread pool).
+# send_async(async_client, pending) does the same through an asyncio client
+# (see async_engine.py).
+# ---------------------------------------------
+
+# Client-level error codes that mean "slow down and try again"
+THROTTLE_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+# Client-level error codes of transient faults: tried again after a backoff, without slowing down
+TRANSIENT_ERROR_CODES = {
+    "InternalServerError",
+    "ServiceUnavailable",
+    "TransactionConflictException",
+}
+
+# Per-statement error codes returned by BatchExecuteStatement that are safe to retry
+RETRYABLE_STATEMENT_ERRORS = {
+    "ProvisionedThroughputExceeded",
+    "RequestLimitExceeded",
+    "ThrottlingError",
+    "InternalServerError",
+    "TransactionConflict",
+}
+
+# The retryable statement errors that are not throttling: tried again without slowing down
+TRANSIENT_STATEMENT_ERRORS = {
+    "InternalServerError",
+    "TransactionConflict",
+}
+
+
+class BatchWriteBackend:
+    """BatchWriteItem with PutRequest / DeleteRequest entries."""
+
+    name = "batch_write"
+
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+
+    def prepare(self, item):
+        return {"PutRequest": {"Item": item}}
+
+    def prepare_delete(self, key):
+        return {"DeleteRequest": {"Key": key}}
+
+    def partition_of(self, request):
+        entry = request["PutRequest"]["Item"] if "PutRequest" in request else request["DeleteRequest"]["Key"]
+        return entry["partitionKey"]["S"]
+
+    def send(self, pending):
+        response = self.client.batch_write_item(
+            RequestItems={self.table_name: pending},
+            ReturnConsumedCapacity="TOTAL",
+        )
+        return self._result(response)
+
+    async def send_async(self, async_client, pending):
+        response = await async_client.batch_write_item(
+            RequestItems={self.table_name: pending},
+            ReturnConsumedCapacity="TOTAL",
+        )
+        return self._result(response)
+
+    def _result(self, response):
+        unprocessed = response.get("UnprocessedItems", {}).get(self.table_name, [])
+        return unprocessed, 0, sum_consumed_capacity(response), 0
+
+    def close(self):
+        """Nothing to release; present so every backend can be closed alike."""
+
+
+class PartiQLBackend:
+    """BatchExecuteStatement with parameterized INSERT statements."""
+
+    name = "partiql"
+
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+
+    def prepare(self, item):
+        # partitionKey always goes first, so partition_of() can find it in the parameters
+        keys = sorted(item, key=lambda key: key != "partitionKey")
+        attributes = ", ".join("'{}': ?".format(key.replace("'", "''")) for key in keys)
+        return {
+            "Statement": f"INSERT INTO \"{self.table_name}\" VALUE {{{attributes}}}",
+            "Parameters": [item[key] for key in keys],
+        }
+
+    def partition_of(self, request):
+        return request["Parameters"][0]["S"]
+
+    def send(self, pending):
+        response = self.client.batch_execute_statement(
+            Statements=pending,
+            ReturnConsumedCapacity="TOTAL",
+        )
+        return self._result(pending, response)
+
+    async def send_async(self, async_client, pending):
+        response = await async_client.batch_execute_statement(
+            Statements=pending,
+            ReturnConsumedCapacity="TOTAL",
+        )
+        return self._result(pending, response)
+
+    def _result(self, pending, response):
+        throttled = []
+        transient = []
+        failed = 0
+        for statement, res in zip(pending, response.get("Responses", [])):
+            if "Error" not in res:
+                continue
+            code = res["Error"].get("Code", "")
+            if code in TRANSIENT_STATEMENT_ERRORS:
+                transient.append(statement)
+            elif code in RETRYABLE_STATEMENT_ERRORS:
+                throttled.append(statement)
+            else:
+                failed += 1
+                print(f"  Error in statement: {code} - {res['Error'].get('Message', '')}")
+        return throttled + transient, failed, sum_consumed_capacity(response), len(transient)
+
+    def close(self):
+        """Nothing to release; present so every backend can be closed alike."""
+
+
+class ParallelPutBackend:
+    """One PutItem call per item, sent concurrently from a thread pool."""
+
+    name = "put_item"
+
+    def __init__(self, client, table_name, threads=8):
+        self.client = client
+        self.table_name = table_name
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.lock = threading.Lock()
+
+    def prepare(self, item):
+        return item
+
+    def partition_of(self, request):
+        return request["partitionKey"]["S"]
+
+    def _put(self, item):
+        try:
+            response = self.client.put_item(TableName=self.table_name, Item=item, ReturnConsumedCapacity="TOTAL")
+            return "ok", response.get("ConsumedCapacity", {}).get("CapacityUnits", 0.0)
+        except ClientError as e:
+            return self._error_outcome(e)
+
+    async def _put_async(self, async_client, item):
+        try:
+            response = await async_client.put_item(TableName=self.table_name, Item=item, ReturnConsumedCapacity="TOTAL")
+            return "ok", response.get("ConsumedCapacity", {}).get("CapacityUnits", 0.0)
+        except ClientError as e:
+            return self._error_outcome(e)
+
+    def _error_outcome(self, error):
+        code = error.response.get("Error", {}).get("Code", "")
+        if code in THROTTLE_ERROR_CODES:
+            return "retry", 0.0
+        if code in TRANSIENT_ERROR_CODES:
+            return "transient", 0.0
+        print(f"  Error in PutItem: {code} - {error}")
+        return "failed", 0.0
+
+    def send(self, pending):
+        return self._result(pending, self.executor.map(self._put, pending))
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def send_async(self, async_client, pending):
+        # The puts of one batch share the event loop instead of the thread pool
+        outcomes = await asyncio.gather(*(self._put_async(async_client, item) for item in pending))
+        return self._result(pending, outcomes)
+
+    def _result(self, pending, outcomes):
+        throttled = []
+        transient = []
+        failed = 0
+        consumed = 0.0
+        for item, (outcome, units) in zip(pending, outcomes):
+            consumed += units
+            if outcome == "retry":
+                throttled.append(item)
+            elif outcome == "transient":
+                transient.append(item)
+            elif outcome == "failed":
+                failed += 1
+        return throttled + transient, failed, consumed, len(transient)
+
+
+BACKENDS = {
+    BatchWriteBackend.name: BatchWriteBackend,
+    PartiQLBackend.name: PartiQLBackend,
+    ParallelPutBackend.name: ParallelPutBackend,
+}
+
+
+def create_backend(name, client, table_name):
+    """Instantiates a backend by its flag name ('partiql', 'batch_write' or 'put_item')."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown write backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](client, table_name)
+
+
+def backend_from_argv(default):
+    """Reads an optional `--backend` flag from the command line, falling back to `default`."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=default)
+    args, _ = parser.parse_known_args()
+    return args.backend
+
+
+def sum_consumed_capacity(response):
+    """Adds up CapacityUnits from a ReturnConsumedCapacity='TOTAL' response."""
+    return sum(entry.get("CapacityUnits", 0.0) for entry in response.get("ConsumedCapacity", []) or [])